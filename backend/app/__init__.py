@@ -42,19 +42,139 @@ def create_app(config_name='default'):
     
     # 初始化扩展
     db.init_app(app)
-    CORS(app, origins=app.config['CORS_ORIGINS'])
+    CORS(app, origins=app.config['CORS_ORIGINS'], expose_headers=['ETag', 'Last-Modified'])
+
+    # 初始化出站 HTTP 连接池
+    from app.services.http_client import http_client
+    http_client.init_app(app)
+
+    # 初始化词典缓存（启动时从磁盘预热）、并发查询合并、本地离线词典和词形还原表
+    from app.services.dictionary_cache import dictionary_cache
+    from app.services.single_flight import single_flight
+    from app.services.local_dictionary import local_dictionary
+    from app.services.lemmatizer import lemmatizer
+    dictionary_cache.init_app(app)
+    single_flight.init_app(app)
+    local_dictionary.init_app(app)
+    lemmatizer.init_app(app)
+
+    # 初始化 PDF 导出引擎（字体目录、并行渲染参数）
+    from app.services.pdf_engine import pdf_engine
+    pdf_engine.init_app(app)
+
+    # 初始化复习调度算法（含负载均衡）、批量复习提交和复习量预测
+    from app.services.scheduler_service import scheduler_service
+    from app.services.review_service import review_service
+    from app.services.forecast_service import forecast_service
+    from app.services.load_balancer import load_balancer
+    scheduler_service.init_app(app)
+    load_balancer.init_app(app)
+    review_service.init_app(app)
+    forecast_service.init_app(app)
     
     # 注册蓝图
-    from app.routes import auth, words, learning, statistics, ai
+    from app.routes import auth, words, learning, statistics, ai, sync
     app.register_blueprint(auth.bp)
     app.register_blueprint(words.bp)
     app.register_blueprint(learning.bp)
     app.register_blueprint(statistics.bp)
     app.register_blueprint(ai.bp)
+    app.register_blueprint(sync.bp)
     
     # 创建数据库表
     with app.app_context():
         db.create_all()
-    
+        upgrade_schema()
+
+    # 初始化后台 AI 增强线程池、批量查词线程池、后台导出线程池和字幕导入线程池
+    from app.services.enrichment_service import enrichment_service
+    from app.services.vocabulary_service import vocabulary_service
+    from app.services.export_job_service import export_job_service
+    from app.services.subtitle_job_service import subtitle_job_service
+    enrichment_service.init_app(app)
+    vocabulary_service.init_app(app)
+    export_job_service.init_app(app)
+    subtitle_job_service.init_app(app)
+
+    # 注册增量同步的变更记录和待复习水位维护，初始化单词本快照缓存
+    from app.services.sync_service import sync_service
+    from app.services.due_queue_service import due_queue_service
+    from app.services.snapshot_service import snapshot_service
+    sync_service.init_app(app)
+    due_queue_service.init_app(app)
+    snapshot_service.init_app(app)
+
+    # 升级后首次启动时回填用户单词本汇总表和变更日志，创建单词搜索索引并构建自动补全树
+    from app.services.search_index import search_index
+    from app.services.autocomplete_service import autocomplete_service
+    with app.app_context():
+        vocabulary_service.backfill_if_needed()
+        sync_service.backfill_if_needed()
+        search_index.init_app(app)
+        autocomplete_service.init_app(app)
+
+    register_commands(app)
+
     return app
 
+
+def register_commands(app):
+    """
+    注册一次性维护命令（flask --app run.py <命令>），不在应用启动时执行
+
+    merge-inflected-words：把词形还原之前按输入词形保存的单词并入原形。
+    会改写查询/复习记录并删除旧单词，执行前请备份数据库，可先用 --dry-run 查看将要合并的单词。
+    执行后重启服务，各 worker 的自动补全树才会去掉旧词形。
+    """
+    import click
+
+    @app.cli.command('merge-inflected-words')
+    @click.option('--dry-run', is_flag=True, help='只列出将要合并的单词，不修改数据库')
+    def merge_inflected_words_command(dry_run):
+        """把按输入词形保存的单词并入原形"""
+        from app.services.vocabulary_service import vocabulary_service
+
+        pairs = vocabulary_service.find_inflected_words()
+        for text, lemma in pairs:
+            click.echo(f'{text} -> {lemma}')
+        if dry_run or not pairs:
+            click.echo(f'共 {len(pairs)} 个单词待合并')
+            return
+        click.echo(f'已合并 {vocabulary_service.merge_inflected_words(pairs)} 个单词')
+
+
+def upgrade_schema():
+    """
+    为已存在的表补充模型中新增的列和索引
+
+    db.create_all() 只会创建缺失的表，不会修改已有表，
+    这里对新增的可空列执行 ALTER TABLE ADD COLUMN 并创建缺失的索引，保证旧数据库可以直接升级。
+    """
+    from sqlalchemy import inspect, text
+
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            existing_columns = {col['name'] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+                if column.server_default is not None:
+                    ddl += f' DEFAULT {column.server_default.arg}'
+                conn.execute(text(ddl))
+                print(f"[数据库] 已为表 {table.name} 添加列 {column.name}")
+
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(conn)
+                    print(f"[数据库] 已为表 {table.name} 创建索引 {index.name}")
+
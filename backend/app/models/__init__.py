@@ -4,6 +4,9 @@ from app.models.word import Word
 from app.models.query_log import QueryLog
 from app.models.learning_plan import LearningPlan
 from app.models.review_log import ReviewLog
+from app.models.user_word import UserWord
+from app.models.change_log import ChangeLog
+from app.models.review_session import ReviewSession
 
-__all__ = ['User', 'Word', 'QueryLog', 'LearningPlan', 'ReviewLog']
+__all__ = ['User', 'Word', 'QueryLog', 'LearningPlan', 'ReviewLog', 'UserWord', 'ChangeLog', 'ReviewSession']
 
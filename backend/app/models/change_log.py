@@ -0,0 +1,34 @@
+"""变更日志模型（客户端增量同步）"""
+from datetime import datetime
+from app import db
+
+
+class ChangeLog(db.Model):
+    """
+    变更日志表：每个用户每个实体只保留最新的一行
+
+    seq 为每个用户单调递增的变更序号，客户端保存最后一次同步到的序号，
+    下次只拉取序号更大的变更；同一实体再次变化时删除旧行（压缩），表的大小与实体数量成正比。
+
+    seq 通过 UPDATE users SET change_seq = change_seq + n 分配，该行锁持有到事务提交，
+    同一用户的变更按序号顺序提交。全局自增 id 没有这个保证：PostgreSQL 上并发事务可能先提交较大的 id，
+    客户端在两次提交之间同步会永久跳过较小的 id。
+    """
+    __tablename__ = 'change_log'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    seq = db.Column(db.Integer)  # 用户内的变更序号（升级前的记录回填为 id）
+    entity = db.Column(db.String(20), nullable=False)  # word / learning_plan / query_log / review_log
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False, default='upsert')  # upsert / delete
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # 按序号拉取某个用户的变更
+        db.Index('ix_change_log_user_sequence', 'user_id', 'seq', unique=True),
+        # 压缩时查找同一实体的旧记录
+        db.Index('ix_change_log_user_entity', 'user_id', 'entity', 'entity_id'),
+        # SQLite 默认会复用被删除的最大 id，序号必须严格递增
+        {'sqlite_autoincrement': True},
+    )
@@ -1,5 +1,5 @@
 """学习计划模型"""
-from datetime import datetime, timedelta
+from datetime import datetime
 from app import db
 
 
@@ -15,40 +15,31 @@ class LearningPlan(db.Model):
     last_review = db.Column(db.DateTime)
     next_review = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     is_mastered = db.Column(db.Boolean, default=False, index=True)
+    # SM-2 调度状态（旧版固定间隔产生的学习计划为 NULL，首次按 SM-2 复习时由掌握度换算）
+    ease_factor = db.Column(db.Float)
+    interval_days = db.Column(db.Float)
+    repetitions = db.Column(db.Integer)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # 添加唯一约束：每个用户的每个单词只能有一个学习计划
-    __table_args__ = (db.UniqueConstraint('user_id', 'word_id', name='_user_word_uc'),)
+    # 待复习队列按 (user_id, is_mastered, next_review) 范围扫描，顺序即逾期时长
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'word_id', name='_user_word_uc'),
+        db.Index('ix_learning_plans_due', 'user_id', 'is_mastered', 'next_review', 'id'),
+    )
     
-    # 艾宾浩斯遗忘曲线间隔（天）
+    # 艾宾浩斯遗忘曲线间隔（天），scheduler_service 中 fixed 算法使用
     REVIEW_INTERVALS = [1, 2, 4, 7, 15]
     
-    def calculate_next_review(self, is_correct):
+    def calculate_next_review(self, is_correct, params=None):
         """
         计算下次复习时间
         :param is_correct: 本次复习是否正确
+        :param params: 用户的调度参数（scheduler_service.params_for），不传时使用默认算法
         """
-        if is_correct:
-            # 答对了，提升掌握度
-            self.mastery_level = min(self.mastery_level + 1, 5)
-            if self.mastery_level >= len(self.REVIEW_INTERVALS):
-                # 已完全掌握
-                self.is_mastered = True
-                self.next_review = None
-            else:
-                # 计算下次复习时间
-                interval = self.REVIEW_INTERVALS[self.mastery_level]
-                self.next_review = datetime.utcnow() + timedelta(days=interval)
-        else:
-            # 答错了，重置掌握度
-            self.mastery_level = max(self.mastery_level - 1, 0)
-            self.is_mastered = False
-            interval = self.REVIEW_INTERVALS[0]
-            self.next_review = datetime.utcnow() + timedelta(days=interval)
-        
-        self.review_count += 1
-        self.last_review = datetime.utcnow()
+        from app.services.scheduler_service import scheduler_service
+        scheduler_service.review(self, is_correct, params)
     
     def to_dict(self):
         """转换为字典"""
@@ -13,6 +13,7 @@ class QueryLog(db.Model):
     tv_show = db.Column(db.String(200))
     season_episode = db.Column(db.String(50))
     context_note = db.Column(db.Text)
+    surface_form = db.Column(db.String(100))  # 用户实际输入的词形（如 running），word_id 指向原形
     query_time = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     def to_dict(self):
@@ -23,6 +24,7 @@ class QueryLog(db.Model):
             'tv_show': self.tv_show,
             'season_episode': self.season_episode,
             'context_note': self.context_note,
+            'surface_form': self.surface_form,
             'query_time': self.query_time.isoformat() if self.query_time else None
         }
 
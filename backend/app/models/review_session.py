@@ -0,0 +1,23 @@
+"""复习会话模型（批量提交复习结果的幂等记录）"""
+from datetime import datetime
+from app import db
+
+
+class ReviewSession(db.Model):
+    """
+    复习会话表：客户端为每次批量提交生成 session_id
+
+    同一用户的同一 session_id 只会应用一次，网络重试、离线补传重复提交时直接返回已应用的结果。
+    """
+    __tablename__ = 'review_sessions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    session_id = db.Column(db.String(64), nullable=False)
+    review_count = db.Column(db.Integer, nullable=False, default=0)  # 实际应用的复习记录数
+    word_ids = db.Column(db.Text)  # JSON数组，本次会话复习过的单词（重复提交时返回它们的学习计划）
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'session_id', name='_user_review_session_uc'),
+    )
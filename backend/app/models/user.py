@@ -14,6 +14,15 @@ class User(db.Model):
     password_hash = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime)
+    # 数据版本：查词、复习、单词修改时递增，用于生成 GET 接口的 ETag
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    data_updated_at = db.Column(db.DateTime)
+    # 未掌握学习计划中最早的下次复习时间（下界，NULL 表示未知），见 due_queue_service
+    next_due_at = db.Column(db.DateTime)
+    # 复习调度参数（JSON，未设置的项使用默认值，见 scheduler_service）
+    scheduler_params = db.Column(db.Text)
+    # 已分配的最大变更序号（change_log.seq），在更新本行时分配，见 sync_service
+    change_seq = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     # 关联关系
     query_logs = db.relationship('QueryLog', backref='user', lazy='dynamic')
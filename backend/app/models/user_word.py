@@ -0,0 +1,65 @@
+"""用户单词本模型（由查询记录和学习计划汇总的反规范化表）"""
+import json
+from datetime import datetime
+from app import db
+
+
+class UserWord(db.Model):
+    """用户单词本表：每个用户的每个单词一行，由 query_word / submit_review 在同一事务中维护"""
+    __tablename__ = 'user_words'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    word_id = db.Column(db.Integer, db.ForeignKey('words.id'), primary_key=True)
+    query_count = db.Column(db.Integer, nullable=False, default=0)
+    first_query_time = db.Column(db.DateTime, default=datetime.utcnow)
+    last_query_time = db.Column(db.DateTime, default=datetime.utcnow)
+    mastery_level = db.Column(db.Integer, nullable=False, default=0)
+    tv_shows = db.Column(db.Text)  # JSON数组，该用户查询该单词时出现过的剧集（去重）
+
+    # 列表排序用的复合索引（与游标 (排序字段, word_id) 一致）：
+    # 一个用户的单词本按任意顺序分页都是一次索引范围扫描
+    __table_args__ = (
+        db.Index('ix_user_words_time_cursor', 'user_id', 'last_query_time', 'word_id'),
+        db.Index('ix_user_words_frequency_cursor', 'user_id', 'query_count', 'word_id'),
+        db.Index('ix_user_words_mastery_cursor', 'user_id', 'mastery_level', 'word_id'),
+        # 单词被修改时查找持有该单词的用户
+        db.Index('ix_user_words_word_id', 'word_id'),
+    )
+
+    # 剧集列表最多保存的数量
+    MAX_TV_SHOWS = 20
+
+    @property
+    def shows(self):
+        """剧集列表"""
+        return json.loads(self.tv_shows) if self.tv_shows else []
+
+    def record_query(self, tv_show='', query_time=None):
+        """
+        记录一次查询
+        :param tv_show: 本次查询的剧集
+        :param query_time: 查询时间，默认为当前时间
+        """
+        query_time = query_time or datetime.utcnow()
+        self.query_count = (self.query_count or 0) + 1
+        if not self.first_query_time or query_time < self.first_query_time:
+            self.first_query_time = query_time
+        if not self.last_query_time or query_time > self.last_query_time:
+            self.last_query_time = query_time
+
+        if tv_show:
+            shows = self.shows
+            if tv_show not in shows and len(shows) < self.MAX_TV_SHOWS:
+                shows.append(tv_show)
+                self.tv_shows = json.dumps(shows, ensure_ascii=False)
+
+    def to_dict(self, word):
+        """
+        转换为单词列表项（单词信息 + 当前用户的查询统计）
+        :param word: 对应的 Word 实例
+        """
+        word_dict = word.to_dict(query_count=self.query_count)
+        word_dict['tv_shows'] = self.shows
+        word_dict['mastery_level'] = self.mastery_level
+        word_dict['last_query'] = self.last_query_time.isoformat() if self.last_query_time else None
+        return word_dict
@@ -13,15 +13,21 @@ class Word(db.Model):
     translation = db.Column(db.Text)
     definition = db.Column(db.Text)
     examples = db.Column(db.Text)  # JSON格式存储例句
+    enrichment_status = db.Column(db.String(20))  # AI增强状态：pending/done/failed，为空表示无需增强
+    enrichment_submitted_at = db.Column(db.DateTime)  # 最近一次提交 AI 增强任务的时间（跨进程租约）
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # 释义、例句、AI 增强等修改时间（单词详情的 ETag）
     
     # 关联关系
     query_logs = db.relationship('QueryLog', backref='word', lazy='dynamic')
     learning_plan = db.relationship('LearningPlan', backref='word', uselist=False)
     review_logs = db.relationship('ReviewLog', backref='word', lazy='dynamic')
     
-    def to_dict(self):
-        """转换为字典"""
+    def to_dict(self, query_count=None):
+        """
+        转换为字典
+        :param query_count: 已批量统计好的查询次数，为空时单独查询
+        """
         import json
         return {
             'id': self.id,
@@ -31,6 +37,7 @@ class Word(db.Model):
             'definition': self.definition,
             'examples': json.loads(self.examples) if self.examples else [],
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'query_count': self.query_logs.count()
+            'enrichment': self.enrichment_status,
+            'query_count': query_count if query_count is not None else self.query_logs.count()
         }
 
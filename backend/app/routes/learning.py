@@ -1,52 +1,164 @@
 """学习计划相关API"""
+import json
+import uuid
 from flask import Blueprint, request, jsonify, g
 from app import db
 from app.models.word import Word
 from app.models.learning_plan import LearningPlan
 from app.models.review_log import ReviewLog
+from app.models.user_word import UserWord
+from app.services.vocabulary_service import vocabulary_service
+from app.services.scheduler_service import scheduler_service
+from app.services.review_service import review_service
+from app.services.due_queue_service import due_queue_service
+from app.services.forecast_service import forecast_service
 from app.utils.auth import login_required
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_after
+from app.utils.conditional import conditional_get
 from datetime import datetime
-from sqlalchemy import and_
+from sqlalchemy import and_, func
 
 bp = Blueprint('learning', __name__, url_prefix='/api/learning')
 
 
+def _due_query(user_id, now):
+    """
+    待复习队列：一条联表查询取出学习计划、单词和当前用户的查询次数
+
+    Returns:
+        (query, due): 查询（未排序）和待复习条件（用于单独计数）
+    """
+    due = and_(
+        LearningPlan.user_id == user_id,
+        LearningPlan.next_review <= now,
+        LearningPlan.is_mastered == False
+    )
+    query = db.session.query(LearningPlan, Word, UserWord.query_count).join(
+        Word, Word.id == LearningPlan.word_id
+    ).outerjoin(
+        UserWord, and_(UserWord.user_id == LearningPlan.user_id, UserWord.word_id == LearningPlan.word_id)
+    ).filter(due)
+    return query, due
+
+
 @bp.route('/today', methods=['GET'])
 @login_required
 def get_today_review():
-    """获取今日待复习单词"""
+    """获取今日待复习单词（逾期最久的排在前面）"""
     try:
-        # 查询当前用户需要复习的单词
-        learning_plans = LearningPlan.query.filter(
-            and_(
-                LearningPlan.user_id == g.current_user.id,
-                LearningPlan.next_review <= datetime.utcnow(),
-                LearningPlan.is_mastered == False
-            )
-        ).all()
-        
+        cursor = request.args.get('cursor')
+        limit = request.args.get('limit', type=int)
+        now = datetime.utcnow()
+        query, due = _due_query(g.current_user.id, now)
+
+        if cursor:
+            next_review, plan_id = decode_cursor(cursor, 'due', is_datetime=True)
+            query = query.filter(keyset_after(
+                [LearningPlan.next_review, LearningPlan.id], [next_review, plan_id], descending=False
+            ))
+
+        query = query.order_by(LearningPlan.next_review, LearningPlan.id)
+
+        # 不传 limit / cursor 时返回全部（保持原有行为）
+        paginated = limit is not None or cursor is not None
+        if paginated:
+            limit = min(max(limit or 50, 1), 500)
+
+        # 水位在未来：没有到期单词，不查询
+        nothing_due = due_queue_service.nothing_due(g.current_user, now)
+        if nothing_due:
+            rows = []
+        else:
+            rows = query.limit(limit + 1).all() if paginated else query.all()
+            if not rows and not cursor:
+                due_queue_service.refresh(g.current_user)
+
+        next_cursor = None
+        if paginated and len(rows) > limit:
+            rows = rows[:limit]
+            last_plan = rows[-1][0]
+            next_cursor = encode_cursor('due', last_plan.next_review, last_plan.id)
+
         words = []
-        for plan in learning_plans:
-            word = Word.query.get(plan.word_id)
-            if word:
-                word_dict = word.to_dict()
-                word_dict['learning_plan'] = plan.to_dict()
-                words.append(word_dict)
-        
+        for plan, word, query_count in rows:
+            word_dict = word.to_dict(query_count=query_count or 0)
+            word_dict['learning_plan'] = plan.to_dict()
+            words.append(word_dict)
+
+        data = {
+            'count': len(words),
+            'words': words
+        }
+        if paginated:
+            data['total'] = 0 if nothing_due else LearningPlan.query.filter(due).count()
+            data['next_cursor'] = next_cursor
+
+        return jsonify({'code': 200, 'data': data})
+
+    except ValueError as e:
+        return jsonify({'code': 400, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'code': 500, 'message': f'服务器错误: {str(e)}'}), 500
+
+
+@bp.route('/session', methods=['GET'])
+@login_required
+def get_review_session():
+    """
+    离线复习包：逾期最久的 size 个待复习单词、学习计划，以及答对/答错两种结果的下一状态
+    客户端在本地完成整轮复习后，用包中的 session_id 一次提交到 POST /review/batch
+    """
+    try:
+        size = request.args.get('size', 20, type=int)
+        size = min(max(size, 1), review_service.max_batch_size)
+        now = datetime.utcnow()
+
+        # 同一条查询用窗口函数带出待复习总数；水位在未来时不查询
+        rows = []
+        if not due_queue_service.nothing_due(g.current_user, now):
+            query, _ = _due_query(g.current_user.id, now)
+            rows = query.add_columns(func.count().over()).order_by(
+                LearningPlan.next_review, LearningPlan.id
+            ).limit(size).all()
+            if not rows:
+                due_queue_service.refresh(g.current_user)
+
+        params = scheduler_service.params_for(g.current_user)
+        cards = []
+        for plan, word, query_count, _ in rows:
+            cards.append({
+                'word': {
+                    'id': word.id,
+                    'word': word.word,
+                    'phonetic': word.phonetic,
+                    'translation': word.translation,
+                    'definition': word.definition,
+                    'examples': json.loads(word.examples) if word.examples else [],
+                    'query_count': query_count or 0
+                },
+                'learning_plan': plan.to_dict(),
+                'outcomes': scheduler_service.preview(plan, params, now)
+            })
+
         return jsonify({
             'code': 200,
             'data': {
-                'count': len(words),
-                'words': words
+                'session_id': uuid.uuid4().hex,
+                'generated_at': now.isoformat(),
+                'algorithm': params['algorithm'],
+                'total': rows[0][3] if rows else 0,
+                'count': len(cards),
+                'cards': cards
             }
         })
-    
+
     except Exception as e:
         return jsonify({'code': 500, 'message': f'服务器错误: {str(e)}'}), 500
 
 
 @bp.route('/plan', methods=['GET'])
 @login_required
+@conditional_get(time_bucket=True)
 def get_learning_plan():
     """获取学习计划概览"""
     try:
@@ -65,14 +177,18 @@ def get_learning_plan():
             is_mastered=False
         ).count()
 
-        # 待复习
-        to_review = LearningPlan.query.filter(
-            and_(
-                LearningPlan.user_id == g.current_user.id,
-                LearningPlan.next_review <= datetime.utcnow(),
-                LearningPlan.is_mastered == False
-            )
-        ).count()
+        # 待复习（水位在未来时不查询）
+        to_review = 0
+        if not due_queue_service.nothing_due(g.current_user):
+            to_review = LearningPlan.query.filter(
+                and_(
+                    LearningPlan.user_id == g.current_user.id,
+                    LearningPlan.next_review <= datetime.utcnow(),
+                    LearningPlan.is_mastered == False
+                )
+            ).count()
+            if to_review == 0:
+                due_queue_service.refresh(g.current_user)
         
         return jsonify({
             'code': 200,
@@ -88,6 +204,21 @@ def get_learning_plan():
         return jsonify({'code': 500, 'message': f'服务器错误: {str(e)}'}), 500
 
 
+@bp.route('/forecast', methods=['GET'])
+@login_required
+@conditional_get(time_bucket=True)
+def get_forecast():
+    """未来 days 天每天的复习量：已排定的数量和包含再次复习的预计数量"""
+    try:
+        days = request.args.get('days', 30, type=int)
+        return jsonify({'code': 200, 'data': forecast_service.get_forecast(g.current_user, days)})
+
+    except ValueError as e:
+        return jsonify({'code': 400, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'code': 500, 'message': f'服务器错误: {str(e)}'}), 500
+
+
 @bp.route('/review', methods=['POST'])
 @login_required
 def submit_review():
@@ -110,8 +241,9 @@ def submit_review():
         if not learning_plan:
             return jsonify({'code': 404, 'message': '学习计划不存在'}), 404
 
-        # 更新学习计划
-        learning_plan.calculate_next_review(is_correct)
+        # 更新学习计划，并同步用户单词本中的掌握度
+        learning_plan.calculate_next_review(is_correct, scheduler_service.params_for(g.current_user))
+        vocabulary_service.sync_mastery(g.current_user.id, word_id, learning_plan.mastery_level)
 
         # 创建复习记录
         review_log = ReviewLog(
@@ -133,3 +265,87 @@ def submit_review():
         db.session.rollback()
         return jsonify({'code': 500, 'message': f'服务器错误: {str(e)}'}), 500
 
+
+
+@bp.route('/review/batch', methods=['POST'])
+@login_required
+def submit_review_batch():
+    """
+    批量提交一轮复习结果（按顺序应用，一个事务）
+    同一 session_id 重复提交只应用一次
+    """
+    try:
+        data = request.get_json() or {}
+        result = review_service.submit_batch(g.current_user, data.get('session_id'), data.get('reviews'))
+
+        return jsonify({
+            'code': 200,
+            'message': '复习结果已提交' if not result['duplicate'] else '该轮复习已提交过',
+            'data': result
+        })
+
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'code': 400, 'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'code': 500, 'message': f'服务器错误: {str(e)}'}), 500
+
+
+@bp.route('/scheduler', methods=['GET'])
+@login_required
+def get_scheduler_params():
+    """获取当前用户的复习调度参数"""
+    try:
+        return jsonify({'code': 200, 'data': scheduler_service.params_for(g.current_user)})
+
+    except Exception as e:
+        return jsonify({'code': 500, 'message': f'服务器错误: {str(e)}'}), 500
+
+
+@bp.route('/scheduler', methods=['PUT'])
+@login_required
+def update_scheduler_params():
+    """
+    修改复习调度参数
+    请求体为要修改的参数；带 reschedule: true 时按新参数和全部复习记录重排学习计划
+    """
+    try:
+        data = request.get_json() or {}
+        reschedule = bool(data.pop('reschedule', False))
+
+        params = scheduler_service.update_params(g.current_user, data)
+        rescheduled = scheduler_service.reschedule_user(g.current_user, params) if reschedule else 0
+        db.session.commit()
+
+        return jsonify({
+            'code': 200,
+            'message': '调度参数已更新',
+            'data': {'params': params, 'rescheduled': rescheduled}
+        })
+
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'code': 400, 'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'code': 500, 'message': f'服务器错误: {str(e)}'}), 500
+
+
+@bp.route('/scheduler/reschedule', methods=['POST'])
+@login_required
+def reschedule_plans():
+    """按当前调度参数和全部复习记录重新计算所有学习计划"""
+    try:
+        rescheduled = scheduler_service.reschedule_user(g.current_user)
+        db.session.commit()
+
+        return jsonify({
+            'code': 200,
+            'message': f'已重新安排 {rescheduled} 个学习计划',
+            'data': {'rescheduled': rescheduled}
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'code': 500, 'message': f'服务器错误: {str(e)}'}), 500
@@ -4,7 +4,9 @@ from app import db
 from app.models.word import Word
 from app.models.query_log import QueryLog
 from app.models.learning_plan import LearningPlan
+from app.services.due_queue_service import due_queue_service
 from app.utils.auth import login_required
+from app.utils.conditional import conditional_get
 from datetime import datetime, timedelta
 from sqlalchemy import func, and_
 
@@ -13,6 +15,7 @@ bp = Blueprint('statistics', __name__, url_prefix='/api/statistics')
 
 @bp.route('/overview', methods=['GET'])
 @login_required
+@conditional_get(time_bucket=True)
 def get_overview():
     """获取学习统计概览"""
     try:
@@ -38,14 +41,18 @@ def get_overview():
             is_mastered=False
         ).count()
 
-        # 待复习
-        to_review = LearningPlan.query.filter(
-            and_(
-                LearningPlan.user_id == g.current_user.id,
-                LearningPlan.next_review <= datetime.utcnow(),
-                LearningPlan.is_mastered == False
-            )
-        ).count()
+        # 待复习（水位在未来时不查询）
+        to_review = 0
+        if not due_queue_service.nothing_due(g.current_user):
+            to_review = LearningPlan.query.filter(
+                and_(
+                    LearningPlan.user_id == g.current_user.id,
+                    LearningPlan.next_review <= datetime.utcnow(),
+                    LearningPlan.is_mastered == False
+                )
+            ).count()
+            if to_review == 0:
+                due_queue_service.refresh(g.current_user)
 
         # 最近7天的查询趋势
         weekly_trend = []
@@ -111,3 +118,35 @@ def get_tv_show_stats():
     except Exception as e:
         return jsonify({'code': 500, 'message': f'服务器错误: {str(e)}'}), 500
 
+
+
+@bp.route('/cache', methods=['GET'])
+@login_required
+def get_cache_stats():
+    """获取词典缓存命中统计"""
+    try:
+        from app.services.dictionary_cache import dictionary_cache
+
+        return jsonify({
+            'code': 200,
+            'data': dictionary_cache.stats()
+        })
+
+    except Exception as e:
+        return jsonify({'code': 500, 'message': f'服务器错误: {str(e)}'}), 500
+
+
+@bp.route('/http', methods=['GET'])
+@login_required
+def get_http_stats():
+    """获取出站 HTTP 连接复用和延迟统计"""
+    try:
+        from app.services.http_client import http_client
+
+        return jsonify({
+            'code': 200,
+            'data': http_client.stats()
+        })
+
+    except Exception as e:
+        return jsonify({'code': 500, 'message': f'服务器错误: {str(e)}'}), 500
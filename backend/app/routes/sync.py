@@ -0,0 +1,43 @@
+"""增量同步API"""
+from flask import Blueprint, request, jsonify, g, Response
+from app.services.sync_service import sync_service
+from app.services.snapshot_service import snapshot_service, SNAPSHOT_MIMETYPE
+from app.utils.auth import login_required
+from app.utils.conditional import conditional_get
+
+bp = Blueprint('sync', __name__, url_prefix='/api/sync')
+
+
+@bp.route('', methods=['GET'])
+@login_required
+def get_changes():
+    """获取上次同步之后的变更（单词、学习计划、查询记录、复习记录）"""
+    try:
+        since = request.args.get('since', 0, type=int)
+        limit = min(max(request.args.get('limit', 500, type=int), 1), 2000)
+
+        if since < 0:
+            return jsonify({'code': 400, 'message': '无效的同步序号'}), 400
+
+        return jsonify({
+            'code': 200,
+            'data': sync_service.changes_since(g.current_user.id, since, limit)
+        })
+
+    except Exception as e:
+        return jsonify({'code': 500, 'message': f'服务器错误: {str(e)}'}), 500
+
+
+@bp.route('/snapshot', methods=['GET'])
+@login_required
+@conditional_get()
+def get_snapshot():
+    """下载整个单词本的二进制快照（MessagePack），之后用 cursor 增量同步"""
+    try:
+        payload = snapshot_service.get_snapshot(g.current_user)
+        return Response(payload, mimetype=SNAPSHOT_MIMETYPE)
+
+    except ImportError as e:
+        return jsonify({'code': 500, 'message': f'快照功能未配置: {str(e)}'}), 500
+    except Exception as e:
+        return jsonify({'code': 500, 'message': f'服务器错误: {str(e)}'}), 500
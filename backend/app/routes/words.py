@@ -1,20 +1,71 @@
 """单词相关API"""
-from flask import Blueprint, request, jsonify, g, send_file
+from flask import Blueprint, request, jsonify, g, send_file, current_app, url_for
 from app import db
 from app.models.word import Word
 from app.models.query_log import QueryLog
 from app.models.learning_plan import LearningPlan
+from app.models.user_word import UserWord
 from app.services.translation_service import TranslationService
+from app.services.dictionary_cache import dictionary_cache
 from app.services.export_service import ExportService
+from app.services.export_job_service import export_job_service, EXPORT_FORMATS
+from app.services.enrichment_service import enrichment_service
+from app.services.vocabulary_service import vocabulary_service
+from app.services.subtitle_service import subtitle_service
+from app.services.subtitle_job_service import subtitle_job_service
+from app.services.lemmatizer import lemmatizer
+from app.services.search_index import search_index
+from app.services.autocomplete_service import autocomplete_service
 from app.utils.auth import login_required
-from sqlalchemy import desc, func
+from app.utils.conditional import conditional_get, bump_word_holders
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_after
+from sqlalchemy import desc
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 import json
+import os
+import tempfile
 
 bp = Blueprint('words', __name__, url_prefix='/api/words')
 translation_service = TranslationService()
 export_service = ExportService()
 
+# 单词列表排序方式 -> 用户单词本中的排序字段（均按降序，word_id 作为次序）
+LIST_ORDERINGS = {
+    'time': 'last_query_time',
+    'frequency': 'query_count',
+    'mastery': 'mastery_level'
+}
+
+
+def _keyset_page(query, order_by, page_size, cursor):
+    """
+    游标分页：按 (排序字段, word_id) 降序取 cursor 之后的一页
+
+    Args:
+        query: 查询 (UserWord, Word) 的 Query（尚未排序）
+        order_by: LIST_ORDERINGS 中的排序方式
+        cursor: 上一页返回的 next_cursor，为空表示第一页
+
+    Returns:
+        (rows, next_cursor)
+    """
+    sort_attr = LIST_ORDERINGS[order_by]
+    sort_column = getattr(UserWord, sort_attr)
+
+    if cursor:
+        sort_value, word_id = decode_cursor(cursor, order_by, is_datetime=(order_by == 'time'))
+        query = query.filter(keyset_after([sort_column, UserWord.word_id], [sort_value, word_id]))
+
+    rows = query.order_by(desc(sort_column), desc(UserWord.word_id)).limit(page_size + 1).all()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1][0]
+        next_cursor = encode_cursor(order_by, getattr(last, sort_attr), last.word_id)
+    return rows, next_cursor
+
 
 @bp.route('/query', methods=['POST'])
 @login_required
@@ -22,14 +73,18 @@ def query_word():
     """查询单词并自动记录"""
     try:
         data = request.get_json()
-        word_text = data.get('word', '').strip().lower()
-        
-        if not word_text:
+        surface_form = data.get('word', '').strip().lower()
+
+        if not surface_form:
             return jsonify({'code': 400, 'message': '单词不能为空'}), 400
-        
+
+        # 还原为词典原形（running/ran/runs -> run），共用同一条单词记录和学习计划
+        word_text = lemmatizer.lemmatize(surface_form)
+
         # 查询数据库中是否已存在该单词
         word = Word.query.filter_by(word=word_text).first()
-        
+        is_new_word = word is None
+
         if not word:
             # 如果不存在，调用翻译API获取释义
             translation_result = translation_service.translate(word_text)
@@ -43,11 +98,20 @@ def query_word():
                 phonetic=translation_result.get('phonetic', ''),
                 translation=translation_result.get('translation', ''),
                 definition=translation_result.get('definition', ''),
-                examples=json.dumps(translation_result.get('examples', []), ensure_ascii=False)
+                examples=json.dumps(translation_result.get('examples', []), ensure_ascii=False),
+                enrichment_status=translation_result.get('enrichment')
             )
             db.session.add(word)
-            db.session.flush()  # 获取word.id
-            
+            try:
+                db.session.flush()  # 获取word.id
+            except IntegrityError:
+                # 其他请求（或其他 worker）已抢先插入该单词，直接使用已有记录
+                db.session.rollback()
+                word = Word.query.filter_by(word=word_text).first()
+                if not word:
+                    raise
+                is_new_word = False
+
         # 检查当前用户是否已有该单词的学习计划
         learning_plan = LearningPlan.query.filter_by(
             user_id=g.current_user.id,
@@ -68,15 +132,28 @@ def query_word():
             word_id=word.id,
             tv_show=data.get('tv_show', ''),
             season_episode=data.get('season_episode', ''),
-            context_note=data.get('context_note', '')
+            context_note=data.get('context_note', ''),
+            surface_form=surface_form
         )
         db.session.add(query_log)
+        user_word = vocabulary_service.record_user_words(
+            g.current_user.id, [word.id], data.get('tv_show', '')
+        )[word.id]
         db.session.commit()
-        
+        autocomplete_service.record_query(word.word)
+
+        # 释义不完整的新单词交给后台 AI 增强，前端可轮询 /<word_id>/enrichment
+        if word.enrichment_status == 'pending':
+            if is_new_word:
+                enrichment_service.submit(word.id)
+            else:
+                enrichment_service.resume_if_stale(word)
+
         # 返回结果
-        result = word.to_dict()
+        result = word.to_dict(query_count=user_word.query_count)
         result['last_query'] = query_log.query_time.isoformat()
-        
+        result['surface_form'] = surface_form
+
         return jsonify({'code': 200, 'data': result})
     
     except Exception as e:
@@ -84,33 +161,198 @@ def query_word():
         return jsonify({'code': 500, 'message': f'服务器错误: {str(e)}'}), 500
 
 
+@bp.route('/query/batch', methods=['POST'])
+@login_required
+def query_words_batch():
+    """批量查询单词并自动记录（如一整个场景的生词）"""
+    try:
+        data = request.get_json() or {}
+        words = data.get('words')
+
+        if not isinstance(words, list) or not words:
+            return jsonify({'code': 400, 'message': 'words 必须是非空数组'}), 400
+
+        if len(words) > vocabulary_service.max_batch_size:
+            return jsonify({
+                'code': 400,
+                'message': f'单次最多查询 {vocabulary_service.max_batch_size} 个单词'
+            }), 400
+
+        items = vocabulary_service.lookup_words(
+            g.current_user.id,
+            words,
+            tv_show=data.get('tv_show', ''),
+            season_episode=data.get('season_episode', ''),
+            context_note=data.get('context_note', '')
+        )
+
+        succeeded = sum(1 for item in items if item['status'] == 'ok')
+
+        return jsonify({
+            'code': 200,
+            'data': {
+                'total': len(items),
+                'succeeded': succeeded,
+                'failed': len(items) - succeeded,
+                'items': items
+            }
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'code': 500, 'message': f'服务器错误: {str(e)}'}), 500
+
+
+@bp.route('/subtitles', methods=['POST'])
+@login_required
+def import_subtitles():
+    """上传 SRT/VTT 字幕文件，批量导入其中的生词"""
+    try:
+        upload = request.files.get('file')
+
+        if not upload or not upload.filename:
+            return jsonify({'code': 400, 'message': '请上传字幕文件'}), 400
+
+        if not subtitle_service.is_supported(upload.filename):
+            return jsonify({'code': 400, 'message': '不支持的字幕格式，仅支持 .srt 或 .vtt'}), 400
+
+        words = list(subtitle_service.extract_words(upload.stream))
+        options = {
+            'tv_show': request.form.get('tv_show', ''),
+            'season_episode': request.form.get('season_episode', ''),
+            'context_note': request.form.get('context_note', ''),
+            'max_words': current_app.config.get('SUBTITLE_MAX_WORDS')
+        }
+
+        # 生词较多时冷缓存下要请求大量上游，转为后台任务，避免超过 worker 超时
+        sync_max_words = current_app.config.get('SUBTITLE_SYNC_MAX_WORDS', 50)
+        if len(words) > sync_max_words and subtitle_job_service.enabled:
+            job = subtitle_job_service.submit(g.current_user.id, words, **options)
+            return jsonify({'code': 202, 'data': _subtitle_job_dict(job)}), 202
+
+        options['max_words'] = min(options['max_words'] or sync_max_words, sync_max_words)
+        summary = vocabulary_service.ingest_words(g.current_user.id, words, **options)
+
+        return jsonify({'code': 200, 'data': summary})
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'code': 500, 'message': f'导入失败: {str(e)}'}), 500
+
+
+def _subtitle_job_dict(job):
+    """字幕导入任务的对外字段"""
+    return {
+        'job_id': job['job_id'],
+        'status': job['status'],
+        'words': job['words'],
+        'summary': job['summary'],
+        'error': job['error'],
+        'status_url': url_for('words.get_subtitle_job', job_id=job['job_id'])
+    }
+
+
+@bp.route('/subtitles/jobs/<job_id>', methods=['GET'])
+@login_required
+def get_subtitle_job(job_id):
+    """查询后台字幕导入任务状态"""
+    try:
+        job = subtitle_job_service.get_job(job_id, g.current_user.id)
+        if not job:
+            return jsonify({'code': 404, 'message': '导入任务不存在'}), 404
+
+        return jsonify({'code': 200, 'data': _subtitle_job_dict(job)})
+
+    except Exception as e:
+        return jsonify({'code': 500, 'message': f'服务器错误: {str(e)}'}), 500
+
+
 @bp.route('/search', methods=['GET'])
 @login_required
 def search_words():
     """搜索历史查询过的单词"""
     try:
-        keyword = request.args.get('keyword', '').strip()
+        keyword = search_index.normalize_keyword(request.args.get('keyword', ''))
+        cursor = request.args.get('cursor')
+        page_size = min(max(request.args.get('page_size', 20, type=int), 1), 100)
 
         if not keyword:
             return jsonify({'code': 400, 'message': '关键词不能为空'}), 400
 
-        # 只搜索当前用户查询过的单词
-        words = Word.query.join(QueryLog).filter(
-            QueryLog.user_id == g.current_user.id,
-            Word.word.like(f'%{keyword}%')
-        ).distinct().limit(20).all()
-        
+        # 只搜索当前用户单词本中的单词，子串匹配走搜索索引
+        query = db.session.query(UserWord, Word).join(
+            Word, Word.id == UserWord.word_id
+        ).filter(
+            UserWord.user_id == g.current_user.id,
+            search_index.match(Word, keyword)
+        )
+
+        # 排序：前缀匹配优先，其次按当前用户的查询次数
+        rank = search_index.prefix_rank(Word, keyword)
+        if cursor:
+            (prefix, query_count), word_id = decode_cursor(cursor, 'search', fields=2)
+            query = query.filter(keyset_after(
+                [rank, UserWord.query_count, UserWord.word_id],
+                [prefix, query_count, word_id]
+            ))
+
+        rows = query.add_columns(rank).order_by(
+            desc(rank), desc(UserWord.query_count), desc(UserWord.word_id)
+        ).limit(page_size + 1).all()
+
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last_user_word, _, last_rank = rows[-1]
+            next_cursor = encode_cursor('search', [last_rank, last_user_word.query_count], last_user_word.word_id)
+
+        rows = [(user_word, word) for user_word, word, _ in rows]
+        items = [user_word.to_dict(word) for user_word, word in rows]
+
+        # 不带 cursor 参数时保持原有返回格式（单词数组）
+        if cursor is None:
+            return jsonify({'code': 200, 'data': items})
+
         return jsonify({
             'code': 200,
-            'data': [word.to_dict() for word in words]
+            'data': {
+                'items': items,
+                'page_size': page_size,
+                'next_cursor': next_cursor
+            }
         })
-    
+
+    except ValueError as e:
+        return jsonify({'code': 400, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'code': 500, 'message': f'服务器错误: {str(e)}'}), 500
 
 
+@bp.route('/suggest', methods=['GET'])
+@login_required
+def suggest_words():
+    """输入联想：返回以 prefix 开头的热门单词（内存基数树，不访问数据库）"""
+    try:
+        prefix = request.args.get('prefix', '').strip().lower()
+        limit = min(max(request.args.get('limit', 10, type=int), 1), autocomplete_service.top_k)
+
+        if not prefix:
+            return jsonify({'code': 200, 'data': []})
+
+        return jsonify({'code': 200, 'data': autocomplete_service.suggest(prefix, limit)})
+
+    except Exception as e:
+        return jsonify({'code': 500, 'message': f'服务器错误: {str(e)}'}), 500
+
+
+def _word_version(word_id):
+    """单词详情 ETag 中的单词版本：释义、例句等全局字段的修改时间（主键查询）"""
+    return db.session.query(Word.updated_at).filter(Word.id == word_id).scalar()
+
+
 @bp.route('/<int:word_id>', methods=['GET'])
 @login_required
+@conditional_get(version_of=_word_version)
 def get_word_detail(word_id):
     """获取单词详情（含查询历史）"""
     try:
@@ -131,7 +373,8 @@ def get_word_detail(word_id):
             word_id=word_id
         ).first()
         
-        result = word.to_dict()
+        # 查询次数只统计当前用户（全局次数会随其他用户的查询变化，与 ETag 不一致）
+        result = word.to_dict(query_count=len(query_logs))
         result['query_logs'] = [log.to_dict() for log in query_logs]
         result['learning_plan'] = learning_plan.to_dict() if learning_plan else None
         
@@ -141,80 +384,88 @@ def get_word_detail(word_id):
         return jsonify({'code': 500, 'message': f'服务器错误: {str(e)}'}), 500
 
 
+@bp.route('/<int:word_id>/enrichment', methods=['GET'])
+@login_required
+def get_word_enrichment(word_id):
+    """轮询单词的 AI 增强状态"""
+    try:
+        word = Word.query.get(word_id)
+
+        if not word:
+            return jsonify({'code': 404, 'message': '单词不存在'}), 404
+
+        # 原任务丢失（如 worker 重启）时重新提交
+        enrichment_service.resume_if_stale(word)
+
+        return jsonify({
+            'code': 200,
+            'data': {
+                'word_id': word.id,
+                'word': word.word,
+                'enrichment': word.enrichment_status,
+                'definition': word.definition
+            }
+        })
+
+    except Exception as e:
+        return jsonify({'code': 500, 'message': f'服务器错误: {str(e)}'}), 500
+
+
 @bp.route('/list', methods=['GET'])
 @login_required
+@conditional_get()
 def get_words_list():
     """获取所有查询过的单词列表"""
     try:
         # 获取查询参数
-        page = request.args.get('page', 1, type=int)
-        page_size = request.args.get('page_size', 20, type=int)
+        page = max(request.args.get('page', 1, type=int), 1)
+        page_size = min(max(request.args.get('page_size', 20, type=int), 1), 100)
         order_by = request.args.get('order_by', 'time')  # time/frequency/mastery
         filter_show = request.args.get('filter_show', '')
         mastery_level = request.args.get('mastery_level', type=int)
         
-        # 构建查询 - 只查询当前用户的单词
-        query = Word.query.join(QueryLog).filter(QueryLog.user_id == g.current_user.id)
+        # 构建查询 - 直接读取当前用户的单词本汇总表，无需关联查询记录去重
+        query = db.session.query(UserWord, Word).join(
+            Word, Word.id == UserWord.word_id
+        ).filter(UserWord.user_id == g.current_user.id)
 
         # 按剧集筛选
         if filter_show:
-            query = query.filter(QueryLog.tv_show.like(f'%{filter_show}%'))
+            query = query.filter(UserWord.tv_shows.like(f'%{filter_show}%'))
 
         # 按掌握程度筛选
         if mastery_level is not None:
-            query = query.join(LearningPlan).filter(
-                LearningPlan.user_id == g.current_user.id,
-                LearningPlan.mastery_level == mastery_level
-            )
-        
-        # 去重（因为一个单词可能有多条查询记录）
-        query = query.distinct()
-
-        # 排序
-        if order_by == 'frequency':
-            # 按查询频率排序 - 统计当前用户的查询次数
-            query = query.group_by(Word.id).order_by(desc(func.count(QueryLog.id)))
-        elif order_by == 'mastery':
-            # 按掌握程度排序
-            query = query.outerjoin(LearningPlan,
-                (LearningPlan.word_id == Word.id) & (LearningPlan.user_id == g.current_user.id)
-            ).order_by(desc(LearningPlan.mastery_level))
-        else:
-            # 默认按最后查询时间排序
-            query = query.order_by(desc(QueryLog.query_time))
-        
-        # 分页
-        pagination = query.paginate(page=page, per_page=page_size, error_out=False)
-        
+            query = query.filter(UserWord.mastery_level == mastery_level)
+
+        if order_by not in LIST_ORDERINGS:
+            order_by = 'time'
+
+        # 游标分页：第 N 页与第 1 页代价相同（传 cursor= 获取第一页）
+        cursor = request.args.get('cursor')
+        if cursor is not None:
+            include_total = request.args.get('include_total', '0') == '1'
+            total = query.count() if include_total else None
+            rows, next_cursor = _keyset_page(query, order_by, page_size, cursor)
+
+            return jsonify({
+                'code': 200,
+                'data': {
+                    'total': total,
+                    'page_size': page_size,
+                    'next_cursor': next_cursor,
+                    'items': [user_word.to_dict(word) for user_word, word in rows]
+                }
+            })
+
+        # 页码分页（兼容旧版前端）
+        sort_column = getattr(UserWord, LIST_ORDERINGS[order_by])
+        query = query.order_by(desc(sort_column), desc(UserWord.word_id))
+        include_total = request.args.get('include_total', '1') == '1'
+        pagination = query.paginate(page=page, per_page=page_size, error_out=False, count=include_total)
+
         # 构建返回数据
-        items = []
-        for word in pagination.items:
-            word_dict = word.to_dict()
-            
-            # 添加当前用户的剧集信息
-            tv_shows = db.session.query(QueryLog.tv_show).filter(
-                QueryLog.user_id == g.current_user.id,
-                QueryLog.word_id == word.id,
-                QueryLog.tv_show != ''
-            ).distinct().all()
-            word_dict['tv_shows'] = [show[0] for show in tv_shows]
-
-            # 添加当前用户的掌握程度
-            learning_plan = LearningPlan.query.filter_by(
-                user_id=g.current_user.id,
-                word_id=word.id
-            ).first()
-            word_dict['mastery_level'] = learning_plan.mastery_level if learning_plan else 0
+        items = [user_word.to_dict(word) for user_word, word in pagination.items]
 
-            # 当前用户的最后查询时间
-            last_query = QueryLog.query.filter_by(
-                user_id=g.current_user.id,
-                word_id=word.id
-            ).order_by(desc(QueryLog.query_time)).first()
-            word_dict['last_query'] = last_query.query_time.isoformat() if last_query else None
-            
-            items.append(word_dict)
-        
         return jsonify({
             'code': 200,
             'data': {
@@ -225,10 +476,26 @@ def get_words_list():
             }
         })
 
+    except ValueError as e:
+        return jsonify({'code': 400, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'code': 500, 'message': f'服务器错误: {str(e)}'}), 500
 
 
+def _export_job_dict(job):
+    """导出任务的对外字段"""
+    return {
+        'job_id': job['job_id'],
+        'status': job['status'],
+        'format': job['format'],
+        'filename': job['filename'],
+        'size': job['size'],
+        'error': job['error'],
+        'status_url': url_for('words.get_export_job', job_id=job['job_id']),
+        'download_url': url_for('words.download_export_job', job_id=job['job_id']) if job['status'] == 'done' else None
+    }
+
+
 @bp.route('/export', methods=['GET'])
 @login_required
 def export_words():
@@ -255,63 +522,32 @@ def export_words():
                 'message': 'PDF 导出功能未配置，请安装 reportlab 库'
             }), 500
 
-        # 获取当前用户的所有单词
-        words_query = Word.query.join(QueryLog).filter(
-            QueryLog.user_id == g.current_user.id
-        ).distinct()
-
-        # 按最后查询时间排序
-        words_query = words_query.order_by(desc(QueryLog.query_time))
-
-        words = words_query.all()
-
-        if not words:
+        total = UserWord.query.filter_by(user_id=g.current_user.id).count()
+        if not total:
             return jsonify({'code': 400, 'message': '您还没有查询过任何单词'}), 400
 
-        # 构建导出数据
-        export_data = []
-        for word in words:
-            word_dict = word.to_dict()
-
-            # 添加用户相关数据
-            # 掌握度
-            learning_plan = LearningPlan.query.filter_by(
-                user_id=g.current_user.id,
-                word_id=word.id
-            ).first()
-            word_dict['mastery_level'] = learning_plan.mastery_level if learning_plan else 0
-
-            # 查询次数（当前用户）
-            query_count = QueryLog.query.filter_by(
-                user_id=g.current_user.id,
-                word_id=word.id
-            ).count()
-            word_dict['query_count'] = query_count
-
-            # 最后查询时间
-            last_query = QueryLog.query.filter_by(
-                user_id=g.current_user.id,
-                word_id=word.id
-            ).order_by(desc(QueryLog.query_time)).first()
-            word_dict['last_query'] = last_query.query_time.isoformat() if last_query else None
-
-            export_data.append(word_dict)
-
-        # 用户信息
-        user_info = {
-            'username': g.current_user.username,
-            'email': g.current_user.email
-        }
+        # 后台导出：返回任务信息，前端轮询状态后下载
+        if request.args.get('async', '').lower() in ('1', 'true') and export_job_service.enabled:
+            job = export_job_service.submit(g.current_user, export_format)
+            status_code = 200 if job['status'] == 'done' else 202
+            return jsonify({'code': status_code, 'data': _export_job_dict(job)}), status_code
+
+        extension, mimetype = EXPORT_FORMATS[export_format]
+        if export_job_service.enabled:
+            # 同步导出同样使用磁盘缓存，单词本未变化时直接返回已生成的文件
+            job = export_job_service.export_now(g.current_user, export_format)
+            return send_file(
+                export_job_service.result_path(job),
+                mimetype=mimetype,
+                as_attachment=True,
+                download_name=job['filename']
+            )
 
-        # 导出文件
-        if export_format == 'excel':
-            output = export_service.export_to_excel(export_data, user_info)
-            filename = f"单词本_{g.current_user.username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-            mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        else:  # pdf
-            output = export_service.export_to_pdf(export_data, user_info)
-            filename = f"单词本_{g.current_user.username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-            mimetype = 'application/pdf'
+        # 未配置缓存目录：文件较小时留在内存中，超过阈值自动落盘，按块发送
+        output = tempfile.SpooledTemporaryFile(max_size=current_app.config.get('EXPORT_SPOOL_MAX_SIZE', 8 * 1024 * 1024))
+        export_job_service.write_export(g.current_user.id, g.current_user.username, export_format, output)
+        output.seek(0)
+        filename = f"单词本_{g.current_user.username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
 
         return send_file(
             output,
@@ -329,6 +565,48 @@ def export_words():
         return jsonify({'code': 500, 'message': f'导出失败: {str(e)}'}), 500
 
 
+@bp.route('/export/jobs/<job_id>', methods=['GET'])
+@login_required
+def get_export_job(job_id):
+    """查询后台导出任务状态"""
+    try:
+        job = export_job_service.get_job(job_id, g.current_user.id)
+        if not job:
+            return jsonify({'code': 404, 'message': '导出任务不存在'}), 404
+
+        return jsonify({'code': 200, 'data': _export_job_dict(job)})
+
+    except Exception as e:
+        return jsonify({'code': 500, 'message': f'服务器错误: {str(e)}'}), 500
+
+
+@bp.route('/export/jobs/<job_id>/download', methods=['GET'])
+@login_required
+def download_export_job(job_id):
+    """下载后台导出任务的结果文件"""
+    try:
+        job = export_job_service.get_job(job_id, g.current_user.id)
+        if not job:
+            return jsonify({'code': 404, 'message': '导出任务不存在'}), 404
+
+        if job['status'] != 'done':
+            return jsonify({'code': 409, 'message': '导出尚未完成', 'data': _export_job_dict(job)}), 409
+
+        path = export_job_service.result_path(job)
+        if not os.path.exists(path):
+            return jsonify({'code': 410, 'message': '导出文件已过期，请重新导出'}), 410
+
+        return send_file(
+            path,
+            mimetype=EXPORT_FORMATS[job['format']][1],
+            as_attachment=True,
+            download_name=job['filename']
+        )
+
+    except Exception as e:
+        return jsonify({'code': 500, 'message': f'下载失败: {str(e)}'}), 500
+
+
 @bp.route('/<int:word_id>', methods=['PUT'])
 @login_required
 def update_word(word_id):
@@ -353,12 +631,21 @@ def update_word(word_id):
         if 'definition' in data:
             word.definition = data['definition']
 
+        bump_word_holders(word.id)
         db.session.commit()
 
+        # 修改后的释义写回词典缓存：两级缓存不再返回旧结果，数据库清空后重建时也保留修改
+        payload = word.to_dict(query_count=0)
+        dictionary_cache.set(word.word, {
+            key: payload[key] for key in ('word', 'phonetic', 'translation', 'definition', 'examples')
+        })
+
         return jsonify({
             'code': 200,
             'message': '更新成功',
-            'data': word.to_dict()
+            'data': word.to_dict(query_count=QueryLog.query.filter_by(
+                user_id=g.current_user.id, word_id=word.id
+            ).count())
         })
 
     except Exception as e:
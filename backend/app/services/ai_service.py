@@ -3,12 +3,8 @@ AI 服务模块
 使用 iFlow API 提供智能助手功能
 """
 import json
-import requests
 import os
-import urllib3
-
-# 禁用 SSL 警告
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from app.services.http_client import http_client
 
 
 class AIService:
@@ -150,17 +146,12 @@ class AIService:
                 "Content-Type": "application/json"
             }
 
-            # 使用 requests 发送请求，禁用代理
-            session = requests.Session()
-            session.trust_env = False
-
-            response = session.post(
+            # 通过共享连接池发送请求（禁用代理，复用 keep-alive 连接）
+            response = http_client.post(
                 api_config['endpoint'],
                 headers=headers,
                 json=payload,
-                timeout=self.timeout,
-                verify=False,
-                proxies={}
+                timeout=self.timeout
             )
 
             # 检查响应状态
@@ -0,0 +1,197 @@
+"""
+单词自动补全服务 - 内存中的基数树（radix trie）
+
+启动时从数据库一次流式读取全部单词及其跨用户查询次数（QueryLog），按热度从高到低建树；
+每个节点缓存子树中最热门的 top_k 个单词，因此每次按键的补全只是沿前缀走几步，不访问数据库。
+查词时增量更新（新单词插入、已有单词热度 +1）。
+
+内存预算：最多收录 AUTOCOMPLETE_MAX_WORDS 个单词（建树时优先收录热门单词），
+超出后不再插入新单词，只更新已收录单词的热度。
+每个 worker 进程各有一棵树，只能看到本进程处理的查词带来的增量更新，重启后与数据库一致。
+"""
+import threading
+import time
+
+
+class _Node:
+    """基数树节点"""
+    __slots__ = ('children', 'top')
+
+    def __init__(self, children=None, top=()):
+        self.children = children  # 首字符 -> (边标签, 子节点)；叶子节点为 None
+        self.top = top  # 子树中最热门的单词（按热度降序的 tuple）
+
+
+def _common_prefix_length(a, b):
+    length = min(len(a), len(b))
+    i = 0
+    while i < length and a[i] == b[i]:
+        i += 1
+    return i
+
+
+class AutocompleteService:
+    """单词自动补全服务类"""
+
+    def __init__(self, max_words=200000, top_k=10):
+        """
+        Args:
+            max_words: 最多收录的单词数（内存预算）
+            top_k: 每个节点缓存的热门单词数（单次补全最多返回的数量）
+        """
+        self.max_words = max_words
+        self.top_k = top_k
+        self._root = _Node()
+        self._scores = {}  # 单词 -> 跨用户查询次数
+        self._nodes = 1
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """从应用配置初始化并建树，需在应用上下文中调用"""
+        self.max_words = app.config.get('AUTOCOMPLETE_MAX_WORDS', self.max_words)
+        self.top_k = app.config.get('AUTOCOMPLETE_TOP_K', self.top_k)
+
+        try:
+            start = time.perf_counter()
+            count = self.build()
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"[自动补全] 已加载 {count} 个单词，{self._nodes} 个节点，耗时 {elapsed:.0f}ms")
+        except Exception as e:
+            print(f"[自动补全] 建树失败: {str(e)}")
+
+    def build(self):
+        """
+        从数据库流式读取单词和热度，重新建树
+
+        Returns:
+            int: 收录的单词数
+        """
+        from sqlalchemy import desc, func, select
+        from app import db
+        from app.models import Word, QueryLog
+
+        popularity = select(
+            QueryLog.word_id, func.count().label('query_count')
+        ).group_by(QueryLog.word_id).subquery()
+        query_count = func.coalesce(popularity.c.query_count, 0)
+
+        # 按热度降序读取，超出内存预算的冷门单词直接丢弃
+        stmt = select(Word.word, query_count).outerjoin(
+            popularity, popularity.c.word_id == Word.id
+        ).order_by(desc(query_count), Word.word).limit(self.max_words)
+
+        root, scores = _Node(), {}
+        nodes = 1
+        for word, count in db.session.execute(stmt.execution_options(yield_per=5000)):
+            scores[word] = count
+            nodes += self._insert(root, word, scores)
+
+        # 新树整体替换旧树，建树期间的补全请求仍使用旧树
+        with self._lock:
+            self._root, self._scores, self._nodes = root, scores, nodes
+        return len(scores)
+
+    def record_query(self, word):
+        """
+        记录一次查词：已收录的单词热度 +1，未收录的新单词在预算内插入
+
+        Returns:
+            bool: 单词是否在树中
+        """
+        if not word:
+            return False
+
+        with self._lock:
+            if word not in self._scores and len(self._scores) >= self.max_words:
+                return False
+            self._scores[word] = self._scores.get(word, 0) + 1
+            self._nodes += self._insert(self._root, word, self._scores)
+        return True
+
+    def suggest(self, prefix, limit=10):
+        """
+        返回以 prefix 开头的最热门单词
+
+        Args:
+            prefix: 已规范化（小写、去空白）的前缀
+            limit: 最多返回数量（不超过 top_k）
+
+        Returns:
+            [{'word', 'popularity'}]
+        """
+        node, scores = self._root, self._scores
+        rest = prefix
+        while rest:
+            entry = node.children.get(rest[0]) if node.children else None
+            if entry is None:
+                return []
+            label, child = entry
+            if rest.startswith(label):
+                rest = rest[len(label):]
+            elif label.startswith(rest):
+                rest = ''
+            else:
+                return []
+            node = child
+
+        return [{'word': word, 'popularity': scores.get(word, 0)} for word in node.top[:limit]]
+
+    def stats(self):
+        """树的规模"""
+        return {'words': len(self._scores), 'nodes': self._nodes, 'max_words': self.max_words}
+
+    def _insert(self, root, word, scores):
+        """
+        插入单词（或在热度变化后更新路径上各节点的热门单词）
+
+        Returns:
+            int: 新建的节点数
+        """
+        created = 0
+        node = root
+        path = [root]
+        rest = word
+        while rest:
+            if node.children is None:
+                node.children = {}
+            entry = node.children.get(rest[0])
+            if entry is None:
+                leaf = _Node()
+                node.children[rest[0]] = (rest, leaf)
+                path.append(leaf)
+                created += 1
+                break
+
+            label, child = entry
+            common = _common_prefix_length(label, rest)
+            if common < len(label):
+                # 拆分边：先建好中间节点再替换，并发读取的补全请求不会看到不完整的结构
+                middle = _Node({label[common]: (label[common:], child)}, child.top)
+                node.children[rest[0]] = (label[:common], middle)
+                child = middle
+                created += 1
+
+            path.append(child)
+            node = child
+            rest = rest[common:]
+
+        for node in path:
+            node.top = self._rank(node.top, word, scores)
+        return created
+
+    def _rank(self, top, word, scores):
+        """把 word 放入热门单词列表，返回新的 tuple（不原地修改，读取无需加锁）"""
+        if len(top) >= self.top_k and word not in top:
+            # 热度不高于列表中最后一个（同热度按字母序）则无需变动，建树时绝大多数节点走这里
+            last, score = top[-1], scores[word]
+            if scores[last] > score or (scores[last] == score and last < word):
+                return top
+
+        candidates = [w for w in top if w != word]
+        candidates.append(word)
+        candidates.sort(key=lambda w: (-scores[w], w))
+        return tuple(candidates[:self.top_k])
+
+
+# 创建全局自动补全实例
+autocomplete_service = AutocompleteService()
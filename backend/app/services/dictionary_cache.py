@@ -0,0 +1,260 @@
+"""
+词典缓存服务 - 位于 TranslationService.translate 之前的两级缓存
+
+一级：进程内 LRU（按容量和 TTL 淘汰）
+二级：磁盘 SQLite 文件（所有 gunicorn worker 共享，数据库清空后依然保留）
+
+两级的命中次数都先在内存中累计，每隔 hits_flush_interval 秒批量写回磁盘层的 hits 列，
+启动预热按 hits 从高到低加载，热门单词（主要命中内存层）因此排在前面。
+"""
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+
+
+class DictionaryCache:
+    """两级词典缓存"""
+
+    def __init__(self, max_size=5000, ttl=3600, path=None, disk_ttl=0, hits_flush_interval=60):
+        """
+        Args:
+            max_size: 内存层最多缓存的单词数
+            ttl: 内存层条目存活时间（秒）
+            path: 磁盘层 SQLite 文件路径，为空时只使用内存层
+            disk_ttl: 磁盘层条目存活时间（秒），0 表示永不过期
+            hits_flush_interval: 命中次数写回磁盘层的间隔（秒）
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = path
+        self.disk_ttl = disk_ttl
+        self.hits_flush_interval = hits_flush_interval
+
+        self._pending_hits = Counter()  # word -> 尚未写回磁盘层的命中次数
+        self._hits_flushed_at = time.monotonic()
+
+        self._entries = OrderedDict()  # word -> (expires_at, result)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        self._stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'sets': 0,
+            'evictions': 0,
+            'warmed': 0
+        }
+
+    def init_app(self, app):
+        """从应用配置初始化缓存，并从磁盘预热热门单词"""
+        self.max_size = app.config.get('DICT_CACHE_SIZE', self.max_size)
+        self.ttl = app.config.get('DICT_CACHE_TTL', self.ttl)
+        self.disk_ttl = app.config.get('DICT_CACHE_DISK_TTL', self.disk_ttl)
+        self.path = app.config.get('DICT_CACHE_PATH', self.path)
+        self.hits_flush_interval = app.config.get('DICT_CACHE_HITS_FLUSH_INTERVAL', self.hits_flush_interval)
+
+        if self.path:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = self._connect()
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS dictionary_cache ('
+                ' word TEXT PRIMARY KEY,'
+                ' payload TEXT NOT NULL,'
+                ' created_at REAL NOT NULL,'
+                ' hits INTEGER NOT NULL DEFAULT 0)'
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS ix_dictionary_cache_hits '
+                'ON dictionary_cache (hits)'
+            )
+            conn.commit()
+
+            self.warm(app.config.get('DICT_CACHE_WARM_SIZE', self.max_size))
+            # 进程正常退出时写回剩余的命中次数
+            atexit.register(self.flush_hits)
+
+    # ---------- 对外接口 ----------
+
+    def get(self, word):
+        """
+        读取缓存
+
+        Returns:
+            翻译结果字典，未命中返回 None
+        """
+        now = time.time()
+        if time.monotonic() - self._hits_flushed_at >= self.hits_flush_interval:
+            self.flush_hits()
+
+        with self._lock:
+            entry = self._entries.get(word)
+            if entry is not None:
+                expires_at, result = entry
+                if expires_at > now:
+                    self._entries.move_to_end(word)
+                    self._stats['memory_hits'] += 1
+                    self._pending_hits[word] += 1
+                    return dict(result)
+                del self._entries[word]
+
+        result = self._disk_get(word, now)
+        with self._lock:
+            if result is None:
+                self._stats['misses'] += 1
+                return None
+            self._stats['disk_hits'] += 1
+            self._pending_hits[word] += 1
+            self._memory_set(word, result, now)
+        return dict(result)
+
+    def set(self, word, result):
+        """写入两级缓存"""
+        now = time.time()
+        with self._lock:
+            self._memory_set(word, result, now)
+            self._stats['sets'] += 1
+        self._disk_set(word, result, now)
+
+    def invalidate(self, word):
+        """删除单词的缓存（例如单词释义被手动修改后）"""
+        with self._lock:
+            self._entries.pop(word, None)
+
+        conn = self._connect()
+        if conn is not None:
+            try:
+                conn.execute('DELETE FROM dictionary_cache WHERE word = ?', (word,))
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"[词典缓存] 删除失败: {str(e)}")
+
+    def flush_hits(self):
+        """把累计的命中次数批量写回磁盘层（一条 executemany）"""
+        with self._lock:
+            pending, self._pending_hits = self._pending_hits, Counter()
+            self._hits_flushed_at = time.monotonic()
+
+        conn = self._connect()
+        if conn is None or not pending:
+            return 0
+
+        try:
+            conn.executemany(
+                'UPDATE dictionary_cache SET hits = hits + ? WHERE word = ?',
+                [(count, word) for word, count in pending.items()]
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"[词典缓存] 命中次数写回失败: {str(e)}")
+            return 0
+        return len(pending)
+
+    def warm(self, limit):
+        """从磁盘层加载最热门的单词到内存层"""
+        conn = self._connect()
+        if conn is None or limit <= 0:
+            return 0
+
+        now = time.time()
+        try:
+            rows = conn.execute(
+                'SELECT word, payload, created_at FROM dictionary_cache '
+                'ORDER BY hits DESC LIMIT ?',
+                (min(limit, self.max_size),)
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"[词典缓存] 预热失败: {str(e)}")
+            return 0
+
+        # 倒序写入，使最热门的单词处于 LRU 的最新端
+        count = 0
+        with self._lock:
+            for word, payload, created_at in reversed(rows):
+                if self._disk_expired(created_at, now):
+                    continue
+                self._memory_set(word, json.loads(payload), now)
+                count += 1
+            self._stats['warmed'] += count
+
+        print(f"[词典缓存] 预热完成，加载 {count} 个单词")
+        return count
+
+    def stats(self):
+        """返回命中统计"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_size'] = len(self._entries)
+
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 4) if lookups else 0.0
+        return stats
+
+    # ---------- 内存层 ----------
+
+    def _memory_set(self, word, result, now):
+        """写入内存层（调用方需持有锁）"""
+        self._entries[word] = (now + self.ttl, dict(result))
+        self._entries.move_to_end(word)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    # ---------- 磁盘层 ----------
+
+    def _connect(self):
+        """每个线程复用一个 SQLite 连接"""
+        if not self.path:
+            return None
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _disk_expired(self, created_at, now):
+        return bool(self.disk_ttl) and created_at + self.disk_ttl < now
+
+    def _disk_get(self, word, now):
+        conn = self._connect()
+        if conn is None:
+            return None
+
+        try:
+            row = conn.execute(
+                'SELECT payload, created_at FROM dictionary_cache WHERE word = ?',
+                (word,)
+            ).fetchone()
+            if row is None or self._disk_expired(row[1], now):
+                return None
+            return json.loads(row[0])
+        except sqlite3.Error as e:
+            print(f"[词典缓存] 读取失败: {str(e)}")
+            return None
+
+    def _disk_set(self, word, result, now):
+        conn = self._connect()
+        if conn is None:
+            return
+
+        try:
+            conn.execute(
+                'INSERT INTO dictionary_cache (word, payload, created_at, hits) VALUES (?, ?, ?, 0) '
+                'ON CONFLICT(word) DO UPDATE SET payload = excluded.payload, created_at = excluded.created_at',
+                (word, json.dumps(result, ensure_ascii=False), now)
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"[词典缓存] 写入失败: {str(e)}")
+
+
+# 创建全局词典缓存实例
+dictionary_cache = DictionaryCache()
@@ -0,0 +1,95 @@
+"""
+待复习队列水位 - 每个用户最早的 next_review
+
+users.next_due_at 保存用户未掌握学习计划中最早的下次复习时间（下界）。
+水位在未来时没有任何单词到期，待复习数量和今日复习队列直接返回空，不查询 learning_plans；
+login_required 已经加载了当前用户，判断水位不需要额外查询。
+
+维护方式：
+- 降低：flush 时新增或修改的未掌握学习计划（查词新建、calculate_next_review 复习）如果早于水位，同一事务中降低水位；
+  不经过 flush 的批量写入由调用方调用 lower() 或 invalidate()。
+- 抬高：水位已到期但实际没有待复习单词时（复习完一轮后），用 (user_id, is_mastered, next_review) 索引取一次最小值重新设置。
+水位为 NULL 表示未知（升级后的旧数据），此时照常查询。
+"""
+from datetime import datetime
+from sqlalchemy import event, func, update
+from app import db
+from app.models import User, LearningPlan
+
+# 没有任何未掌握学习计划时的水位
+NO_DUE = datetime(9999, 12, 31)
+
+
+class DueQueueService:
+    """待复习队列水位服务类"""
+
+    def init_app(self, app):
+        """注册 flush 监听（对所有会话生效）"""
+        if not event.contains(db.session, 'after_flush', self._after_flush):
+            event.listen(db.session, 'after_flush', self._after_flush)
+
+    @staticmethod
+    def nothing_due(user, now=None):
+        """水位在未来：确定没有到期的单词（不查询数据库）"""
+        return user.next_due_at is not None and user.next_due_at > (now or datetime.utcnow())
+
+    @staticmethod
+    def lower(user_id, next_review, connection=None):
+        """把水位降到 next_review（水位未知或更早时不变），由调用方提交"""
+        statement = update(User.__table__).where(
+            User.__table__.c.id == user_id,
+            User.__table__.c.next_due_at > next_review
+        ).values(next_due_at=next_review)
+        (connection or db.session).execute(statement)
+
+    @staticmethod
+    def invalidate(user_id):
+        """水位置为未知（批量重排等可能提前到期的写操作之后），由调用方提交"""
+        db.session.execute(
+            update(User.__table__).where(User.__table__.c.id == user_id).values(next_due_at=None)
+        )
+
+    @staticmethod
+    def refresh(user):
+        """
+        重新计算水位并提交（在确认当前没有到期单词后调用）
+
+        读取期间如果有其他请求写入了学习计划（数据版本变化），放弃本次更新，水位保持原值。
+        """
+        earliest = db.session.query(func.min(LearningPlan.next_review)).filter(
+            LearningPlan.user_id == user.id,
+            LearningPlan.is_mastered == False
+        ).scalar()
+        watermark = earliest or NO_DUE
+
+        try:
+            db.session.execute(
+                update(User.__table__).where(
+                    User.__table__.c.id == user.id,
+                    func.coalesce(User.__table__.c.data_version, 0) == (user.data_version or 0)
+                ).values(next_due_at=watermark)
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"[待复习] 更新水位失败: {str(e)}")
+        return watermark
+
+    def _after_flush(self, session, flush_context):
+        """新增或修改的未掌握学习计划早于水位时降低水位（与业务写操作在同一事务中）"""
+        earliest = {}  # user_id -> 最早的 next_review
+        for obj in list(session.new) + list(session.dirty):
+            if not isinstance(obj, LearningPlan) or obj.is_mastered or obj.user_id is None:
+                continue
+            # 新建计划的 next_review 默认值在 INSERT 时生成，按当前时间处理
+            next_review = obj.next_review or datetime.utcnow()
+            if obj.user_id not in earliest or next_review < earliest[obj.user_id]:
+                earliest[obj.user_id] = next_review
+
+        connection = session.connection() if earliest else None
+        for user_id, next_review in earliest.items():
+            self.lower(user_id, next_review, connection)
+
+
+# 创建全局待复习水位实例
+due_queue_service = DueQueueService()
@@ -0,0 +1,147 @@
+"""
+AI 增强后台服务
+
+有道释义不完整时，查词接口先返回有道结果并标记 enrichment=pending，
+由这里的线程池在后台调用 AI 生成详细释义并写回 Word 表。
+
+提交任务前用一条条件 UPDATE 写入 words.enrichment_submitted_at 作为租约：
+租约未过期（retry_after 秒内）时其他请求、其他 worker 都不会重复提交，
+原任务所在的进程退出后租约过期，下一次查词或轮询再重新提交。
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+
+class EnrichmentService:
+    """后台 AI 增强服务类"""
+
+    def __init__(self):
+        self.app = None
+        self.retry_after = 120
+        self._executor = None
+        self._in_flight = set()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """从应用配置初始化线程池"""
+        self.app = app
+        self.retry_after = app.config.get('AI_ENRICHMENT_RETRY_AFTER', self.retry_after)
+        self._executor = ThreadPoolExecutor(
+            max_workers=app.config.get('AI_ENRICHMENT_WORKERS', 2),
+            thread_name_prefix='ai-enrichment'
+        )
+
+    def submit(self, word_id):
+        """
+        提交后台增强任务（所有进程中同一单词同一时刻只会有一个任务）
+
+        Returns:
+            bool: 是否提交了新任务
+        """
+        if self._executor is None:
+            return False
+
+        with self._lock:
+            if word_id in self._in_flight:
+                return False
+            self._in_flight.add(word_id)
+
+        try:
+            claimed = self._claim(word_id)
+        except Exception as e:
+            print(f"[AI增强] 获取任务租约失败: {str(e)}")
+            claimed = False
+
+        if not claimed:
+            with self._lock:
+                self._in_flight.discard(word_id)
+            return False
+
+        self._executor.submit(self._run, word_id)
+        return True
+
+    def resume_if_stale(self, word):
+        """
+        上次提交超过 retry_after 仍未完成，说明原任务所在的进程可能已退出，重新提交
+
+        Args:
+            word: Word 模型实例
+        """
+        if word.enrichment_status != 'pending':
+            return False
+
+        # 升级前创建的单词没有提交时间，按创建时间判断
+        submitted_at = word.enrichment_submitted_at or word.created_at
+        if submitted_at is not None and datetime.utcnow() - submitted_at < timedelta(seconds=self.retry_after):
+            return False
+
+        return self.submit(word.id)
+
+    def _claim(self, word_id):
+        """
+        条件 UPDATE 获取租约（在独立连接中立即提交，不影响请求的会话）
+
+        Returns:
+            bool: 是否获得租约（单词仍为 pending 且没有未过期的租约）
+        """
+        from sqlalchemy import or_, update
+        from app import db
+        from app.models.word import Word
+
+        now = datetime.utcnow()
+        with db.engine.begin() as conn:
+            result = conn.execute(
+                update(Word.__table__).where(
+                    Word.__table__.c.id == word_id,
+                    Word.__table__.c.enrichment_status == 'pending',
+                    or_(
+                        Word.__table__.c.enrichment_submitted_at.is_(None),
+                        Word.__table__.c.enrichment_submitted_at < now - timedelta(seconds=self.retry_after)
+                    )
+                ).values(enrichment_submitted_at=now)
+            )
+        return result.rowcount == 1
+
+    def _run(self, word_id):
+        """后台任务：调用 AI 并把结果写回 Word 表"""
+        from app import db
+        from app.models.word import Word
+        from app.services.translation_service import TranslationService
+        from app.utils.conditional import bump_word_holders
+        import json
+
+        try:
+            with self.app.app_context():
+                word = Word.query.get(word_id)
+                if not word or word.enrichment_status != 'pending':
+                    return
+
+                result = TranslationService().enrich(word.word, {
+                    'phonetic': word.phonetic or '',
+                    'translation': word.translation or '',
+                    'definition': word.definition or '',
+                    'examples': json.loads(word.examples) if word.examples else []
+                })
+
+                if result.get('ai_enhanced'):
+                    word.definition = result['definition']
+                    word.enrichment_status = 'done'
+                else:
+                    word.enrichment_status = 'failed'
+
+                bump_word_holders(word_id)
+                db.session.commit()
+                print(f"[AI增强] 单词 {word.word} 增强完成，状态: {word.enrichment_status}")
+
+        except Exception as e:
+            print(f"[AI增强] 后台任务异常: {str(e)}")
+            import traceback
+            traceback.print_exc()
+        finally:
+            with self._lock:
+                self._in_flight.discard(word_id)
+
+
+# 创建全局 AI 增强服务实例
+enrichment_service = EnrichmentService()
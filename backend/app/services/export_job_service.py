@@ -0,0 +1,331 @@
+"""
+导出任务服务 - 在后台线程中生成导出文件，结果按内容寻址缓存在本地磁盘
+
+缓存键由 (用户, 导出格式, 用户数据版本) 计算：单词本没有变化时重复导出直接返回已生成的文件，
+查词、复习等写操作会递增数据版本（见 app/utils/conditional.py），之后的导出自然对应新的键。
+任务状态保存在缓存目录的 <job_id>.json 中，所有 gunicorn worker 都能查询和下载；
+缓存文件总大小超过 EXPORT_CACHE_MAX_BYTES 时按最近使用时间淘汰。
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# 导出格式 -> (扩展名, MIME 类型)
+EXPORT_FORMATS = {
+    'excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'pdf': ('pdf', 'application/pdf')
+}
+
+
+class ExportJobService:
+    """导出任务与结果缓存服务类"""
+
+    def __init__(self):
+        self.app = None
+        self.cache_dir = None
+        self.max_bytes = 200 * 1024 * 1024
+        self.job_timeout = 600
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """从应用配置初始化缓存目录和线程池"""
+        self.app = app
+        self.cache_dir = app.config.get('EXPORT_CACHE_DIR', self.cache_dir)
+        self.max_bytes = app.config.get('EXPORT_CACHE_MAX_BYTES', self.max_bytes)
+        self.job_timeout = app.config.get('EXPORT_JOB_TIMEOUT', self.job_timeout)
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._executor = ThreadPoolExecutor(
+                max_workers=app.config.get('EXPORT_WORKERS', 2),
+                thread_name_prefix='export'
+            )
+
+    @property
+    def enabled(self):
+        """是否启用了磁盘缓存（后台任务依赖磁盘缓存）"""
+        return bool(self.cache_dir)
+
+    # ---------- 对外接口 ----------
+
+    def submit(self, user, export_format):
+        """
+        提交后台导出任务；已有缓存结果或同一任务正在进行时直接返回
+
+        Args:
+            user: User 模型实例
+            export_format: 'excel' 或 'pdf'
+
+        Returns:
+            dict: 任务信息（见 get_job）
+        """
+        job_id = self.job_id(user, export_format)
+        job = self._cached_or_running(job_id)
+        if job:
+            return job
+
+        if not self._claim(job_id):
+            # 其他请求（或其他 worker）刚刚开始同一任务
+            return self._read_job(job_id) or self._new_job(job_id, user, export_format)
+
+        job = self._new_job(job_id, user, export_format)
+        self._write_job(job)
+        self._executor.submit(self._run, job_id)
+        return job
+
+    def export_now(self, user, export_format):
+        """
+        在当前线程中导出（命中缓存时直接返回）
+
+        Returns:
+            dict: 已完成的任务信息
+        """
+        job_id = self.job_id(user, export_format)
+        job = self._read_job(job_id)
+        if job and job['status'] == 'done' and self._touch(job):
+            return job
+
+        job = self._new_job(job_id, user, export_format)
+        self._render(job)
+        return job
+
+    def get_job(self, job_id, user_id):
+        """
+        读取任务信息（只能读取自己的任务）
+
+        Returns:
+            dict 或 None
+        """
+        job = self._read_job(job_id)
+        if not job or job['user_id'] != user_id:
+            return None
+
+        # 任务所在的进程已退出，标记为失败，重新导出会提交新任务
+        if job['status'] == 'pending' and time.time() - job['created_at'] > self.job_timeout:
+            job['status'] = 'failed'
+            job['error'] = '导出超时'
+        return job
+
+    def result_path(self, job):
+        """任务结果文件路径"""
+        extension = EXPORT_FORMATS[job['format']][0]
+        return os.path.join(self.cache_dir, f"{job['job_id']}.{extension}")
+
+    def stats(self):
+        """缓存目录中结果文件的数量和总大小"""
+        files = self._result_files()
+        return {
+            'files': len(files),
+            'bytes': sum(size for _, size, _ in files),
+            'max_bytes': self.max_bytes
+        }
+
+    @staticmethod
+    def job_id(user, export_format):
+        """内容寻址的任务ID：同一用户、同一格式、同一数据版本的导出结果相同"""
+        key = f'{user.id}:{export_format}:{user.data_version or 0}'
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+    @staticmethod
+    def iter_export_rows(user_id, batch_size=1000):
+        """
+        逐行读取导出数据（单条查询，只取需要的列，按批从数据库游标读取，不构造 ORM 对象）
+
+        Yields:
+            dict: 单词导出字段
+        """
+        from sqlalchemy import desc
+        from app import db
+        from app.models import Word, UserWord
+
+        query = db.session.query(
+            Word.word,
+            Word.phonetic,
+            Word.translation,
+            Word.definition,
+            UserWord.mastery_level,
+            UserWord.query_count,
+            UserWord.last_query_time
+        ).join(
+            Word, Word.id == UserWord.word_id
+        ).filter(
+            UserWord.user_id == user_id
+        ).order_by(desc(UserWord.last_query_time), desc(UserWord.word_id))
+
+        for row in query.yield_per(batch_size):
+            yield {
+                'word': row.word,
+                'phonetic': row.phonetic or '',
+                'translation': row.translation or '',
+                'definition': row.definition or '',
+                'mastery_level': row.mastery_level or 0,
+                'query_count': row.query_count or 0,
+                'last_query': row.last_query_time
+            }
+
+    @classmethod
+    def write_export(cls, user_id, username, export_format, output):
+        """
+        把用户单词本按指定格式写入文件对象
+
+        Args:
+            output: 可写的二进制文件对象
+        """
+        from app.models import UserWord
+        from app.services.export_service import ExportService
+
+        user_info = {'username': username}
+        rows = cls.iter_export_rows(user_id)
+        if export_format == 'excel':
+            total = UserWord.query.filter_by(user_id=user_id).count()
+            ExportService.export_to_excel(rows, user_info, total=total, output=output)
+        else:
+            # reportlab 需要完整的表格数据
+            pdf = ExportService.export_to_pdf(list(rows), user_info)
+            output.write(pdf.getvalue())
+
+    # ---------- 内部实现 ----------
+
+    def _new_job(self, job_id, user, export_format):
+        extension = EXPORT_FORMATS[export_format][0]
+        return {
+            'job_id': job_id,
+            'user_id': user.id,
+            'username': user.username,
+            'format': export_format,
+            'status': 'pending',
+            'filename': f"单词本_{user.username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}",
+            'size': None,
+            'error': None,
+            'created_at': time.time(),
+            'finished_at': None
+        }
+
+    def _cached_or_running(self, job_id):
+        job = self._read_job(job_id)
+        if not job:
+            return None
+        if job['status'] == 'done' and self._touch(job):
+            return job
+        if job['status'] == 'pending' and time.time() - job['created_at'] <= self.job_timeout:
+            return job
+        return None
+
+    def _claim(self, job_id):
+        """通过独占创建锁文件认领任务，防止多个 worker 重复生成同一文件"""
+        lock_path = os.path.join(self.cache_dir, f'{job_id}.lock')
+        for _ in range(2):
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock_path) <= self.job_timeout:
+                        return False
+                    # 锁已过期（持有者可能已退出），删除后重试
+                    os.remove(lock_path)
+                except FileNotFoundError:
+                    pass
+        return False
+
+    def _run(self, job_id):
+        """后台任务：生成导出文件"""
+        try:
+            with self.app.app_context():
+                job = self._read_job(job_id)
+                if job:
+                    self._render(job)
+                    print(f"[导出] 任务 {job_id} 完成，{job['size']} 字节")
+        except Exception as e:
+            print(f"[导出] 后台任务异常: {str(e)}")
+            import traceback
+            traceback.print_exc()
+        finally:
+            try:
+                os.remove(os.path.join(self.cache_dir, f'{job_id}.lock'))
+            except FileNotFoundError:
+                pass
+
+    def _render(self, job):
+        """生成结果文件并写入任务状态（先写临时文件再原子替换，下载方不会读到一半的文件）"""
+        path = self.result_path(job)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as output:
+                self.write_export(job['user_id'], job['username'], job['format'], output)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            job.update(status='failed', error=str(e), finished_at=time.time())
+            self._write_job(job)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        job.update(status='done', size=os.path.getsize(path), finished_at=time.time())
+        self._write_job(job)
+        self._evict(keep=path)
+
+    def _touch(self, job):
+        """更新结果文件的使用时间（用于淘汰），结果文件已被淘汰时返回 False"""
+        try:
+            os.utime(self.result_path(job))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _read_job(self, job_id):
+        if not self.cache_dir or not all(c in '0123456789abcdef' for c in job_id):
+            return None
+        try:
+            with open(os.path.join(self.cache_dir, f'{job_id}.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_job(self, job):
+        path = os.path.join(self.cache_dir, f"{job['job_id']}.json")
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _result_files(self):
+        """[(路径, 大小, 修改时间)]"""
+        extensions = tuple(f'.{extension}' for extension, _ in EXPORT_FORMATS.values())
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(extensions):
+                stat = entry.stat()
+                files.append((entry.path, stat.st_size, stat.st_mtime))
+        return files
+
+    def _evict(self, keep=None):
+        """总大小超过上限时，从最久未使用的结果文件开始删除"""
+        with self._lock:
+            files = sorted(self._result_files(), key=lambda item: item[2])
+            total = sum(size for _, size, _ in files)
+            evicted = 0
+            for path, size, _ in files:
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    os.remove(os.path.splitext(path)[0] + '.json')
+                except FileNotFoundError:
+                    pass
+                total -= size
+                evicted += 1
+
+        if evicted:
+            print(f"[导出] 缓存超过上限，已淘汰 {evicted} 个文件")
+
+
+# 创建全局导出任务实例
+export_job_service = ExportJobService()
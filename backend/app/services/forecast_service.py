@@ -0,0 +1,176 @@
+"""
+复习量预测服务 - 未来每天需要复习的单词数
+
+两部分：
+- scheduled: 按 next_review 日期一次 GROUP BY 统计已排定的复习（逾期的计入今天）；
+- projected: 从每个学习计划当前的调度状态出发，用 NumPy 模拟之后的复习：
+  每一轮把预测期内到期的计划整体推进一次（按用户历史正确率随机答对/答错，调用调度算法的向量 step），
+  多次模拟取平均，得到包含"复习后再次到期"在内的预计复习量。
+
+结果按 (用户, 数据版本, 日期, 天数) 缓存在进程内：提交复习、查词新建计划都会递增数据版本，下次请求自然重新计算。
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# 没有复习记录时假设的正确率
+DEFAULT_ACCURACY = 0.8
+
+
+class ForecastService:
+    """复习量预测服务类"""
+
+    def __init__(self, max_days=365, trials=8, cache_size=1024):
+        """
+        Args:
+            max_days: 最多预测的天数
+            trials: 模拟次数（取平均）
+            cache_size: 进程内缓存的预测结果数
+        """
+        self.max_days = max_days
+        self.trials = trials
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # (user_id, data_version, date, days) -> dict
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """从应用配置初始化"""
+        self.max_days = app.config.get('FORECAST_MAX_DAYS', self.max_days)
+        self.trials = app.config.get('FORECAST_TRIALS', self.trials)
+        self.cache_size = app.config.get('FORECAST_CACHE_SIZE', self.cache_size)
+
+    def get_forecast(self, user, days=30):
+        """
+        返回未来 days 天（含今天）的复习量预测（命中缓存时不查询数据库）
+
+        Returns:
+            dict: {start, days, overdue, accuracy, scheduled:[int], projected:[float]}
+
+        Raises:
+            ValueError: days 超出范围
+        """
+        if not 1 <= days <= self.max_days:
+            raise ValueError(f'days 的取值范围为 1-{self.max_days}')
+
+        now = datetime.utcnow()
+        start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        key = (user.id, user.data_version or 0, start.date(), days)
+        with self._lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+                return result
+
+        result = self.build(user, start, days, now)
+        with self._lock:
+            for old_key in [k for k in self._cache if k[0] == user.id and k[1] != key[1]]:
+                del self._cache[old_key]
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def build(self, user, start, days, now):
+        """查询并模拟"""
+        from sqlalchemy import Integer, cast, func
+        from app import db
+        from app.models import LearningPlan, ReviewLog
+        from app.services.scheduler_service import scheduler_service
+
+        end = start + timedelta(days=days)
+        pending = (
+            LearningPlan.user_id == user.id,
+            LearningPlan.is_mastered == False,
+            LearningPlan.next_review < end
+        )
+
+        # 已排定的复习：一次 GROUP BY
+        due_date = func.date(LearningPlan.next_review)
+        scheduled = [0] * days
+        overdue = 0
+        for day, count in db.session.query(due_date, func.count()).filter(*pending).group_by(due_date):
+            offset = (datetime.strptime(str(day), '%Y-%m-%d') - start).days
+            if offset < 0:
+                overdue += count
+            scheduled[max(offset, 0)] += count
+        if not any(scheduled):
+            return self._result(start, days, overdue, None, scheduled, [0.0] * days)
+
+        correct, total = db.session.query(
+            func.sum(cast(ReviewLog.is_correct, Integer)), func.count(ReviewLog.id)
+        ).filter(ReviewLog.user_id == user.id).one()
+        # 以 5 次默认正确率作为先验平滑，复习记录很少时接近默认值
+        accuracy = ((correct or 0) + DEFAULT_ACCURACY * 5) / ((total or 0) + 5)
+
+        if not NUMPY_AVAILABLE:
+            return self._result(start, days, overdue, accuracy, scheduled, [float(c) for c in scheduled])
+
+        plans = db.session.query(
+            LearningPlan.next_review, LearningPlan.mastery_level,
+            LearningPlan.ease_factor, LearningPlan.interval_days, LearningPlan.repetitions
+        ).filter(*pending).all()
+        projected = self.simulate(
+            plans, scheduler_service.params_for(user), accuracy,
+            start, now, days, seed=user.id
+        )
+        return self._result(start, days, overdue, accuracy, scheduled, projected)
+
+    def simulate(self, plans, params, accuracy, start, now, days, seed=0):
+        """
+        向量化模拟预测期内的全部复习
+
+        Args:
+            plans: [(next_review, mastery_level, ease_factor, interval_days, repetitions)]
+            accuracy: 每次复习答对的概率
+
+        Returns:
+            list[float]: 每天的预计复习量
+        """
+        from app.services.scheduler_service import SCHEDULERS
+
+        scheduler = SCHEDULERS[params['algorithm']]
+        trials = self.trials
+        columns = {}
+        for index, name in enumerate(('mastery_level', 'ease_factor', 'interval_days', 'repetitions'), start=1):
+            # None -> NaN（旧版学习计划没有 SM-2 状态）
+            columns[name] = np.tile(np.array([plan[index] for plan in plans], dtype=np.float64), trials)
+        columns['mastery_level'] = np.nan_to_num(columns['mastery_level'])
+        state = scheduler.load_state(columns, params)
+
+        # 到期时间：距今天零点的天数，逾期的按当前时刻复习
+        today = (now - start).total_seconds() / 86400
+        due = np.array([(plan[0] - start).total_seconds() / 86400 for plan in plans], dtype=np.float64)
+        due = np.tile(np.maximum(due, today), trials)
+
+        rng = np.random.default_rng(seed)
+        counts = np.zeros(days, dtype=np.float64)
+        while True:
+            rows = np.flatnonzero(due < days)  # NaN（已掌握）不会再到期
+            if not len(rows):
+                break
+            counts += np.bincount(due[rows].astype(np.int64), minlength=days)[:days]
+            interval = scheduler.step(state, rows, rng.random(len(rows)) < accuracy, params)
+            due[rows] = due[rows] + interval
+
+        return (counts / trials).round(1).tolist()
+
+    @staticmethod
+    def _result(start, days, overdue, accuracy, scheduled, projected):
+        return {
+            'start': start.date().isoformat(),
+            'days': days,
+            'overdue': overdue,
+            'accuracy': round(accuracy, 3) if accuracy is not None else None,
+            'scheduled': scheduled,
+            'projected': projected
+        }
+
+
+# 创建全局复习量预测实例
+forecast_service = ForecastService()
@@ -0,0 +1,150 @@
+"""
+出站 HTTP 客户端 - 有道翻译和 AI 服务共用的连接池
+
+每个进程一个 requests.Session，按主机保持 keep-alive 连接池，
+避免每次查词/每次 AI 调用都重新进行 TCP + TLS 握手。
+"""
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+import urllib3
+
+# 禁用 SSL 警告（与原有调用保持一致：不校验证书）
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+
+class HttpClient:
+    """进程级共享的出站 HTTP 客户端"""
+
+    def __init__(self, pool_connections=10, pool_maxsize=20, timeout=10, max_retries=0):
+        """
+        Args:
+            pool_connections: 缓存的主机连接池数量
+            pool_maxsize: 每个主机连接池保持的最大连接数
+            timeout: 默认超时（秒）
+            max_retries: 连接失败时的重试次数
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._latency = {}  # host -> {'requests', 'errors', 'total_ms', 'max_ms'}
+
+    def init_app(self, app):
+        """从应用配置初始化连接池参数"""
+        self.pool_connections = app.config.get('HTTP_POOL_CONNECTIONS', self.pool_connections)
+        self.pool_maxsize = app.config.get('HTTP_POOL_MAXSIZE', self.pool_maxsize)
+        self.timeout = app.config.get('HTTP_TIMEOUT', self.timeout)
+        self.max_retries = app.config.get('HTTP_MAX_RETRIES', self.max_retries)
+        self.reset()
+
+    @property
+    def session(self):
+        """当前进程的共享 Session（fork 出的 worker 会重新创建，不共享父进程的连接）"""
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    self._session = self._create_session()
+                    self._pid = os.getpid()
+        return self._session
+
+    def _create_session(self):
+        session = requests.Session()
+        session.trust_env = False  # 不使用环境变量中的代理设置
+        session.verify = False  # 禁用 SSL 验证以避免代理问题
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=self.max_retries
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def reset(self):
+        """关闭所有连接并清空统计"""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+            self._pid = None
+            self._latency = {}
+
+    def request(self, method, url, **kwargs):
+        """
+        发送请求（参数与 requests.Session.request 相同）
+
+        Returns:
+            requests.Response
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        kwargs.setdefault('proxies', {})
+        host = urlsplit(url).netloc
+
+        start = time.perf_counter()
+        error = False
+        try:
+            return self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            error = True
+            raise
+        finally:
+            self._record(host, (time.perf_counter() - start) * 1000, error)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def _record(self, host, elapsed_ms, error):
+        with self._lock:
+            stats = self._latency.setdefault(host, {'requests': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            stats['requests'] += 1
+            stats['errors'] += int(error)
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+
+    def stats(self):
+        """
+        返回每个主机的连接复用和延迟统计
+
+        new_connections 为实际建立的 TCP 连接数，requests 为发出的请求数，
+        两者之差即复用已有连接省下的握手次数。
+        """
+        connections = {}
+        session = self._session
+        if session is not None:
+            for adapter in set(session.adapters.values()):
+                for key in list(adapter.poolmanager.pools.keys()):
+                    pool = adapter.poolmanager.pools.get(key)
+                    if pool is None:
+                        continue
+                    host = pool.host if pool.port in (None, 80, 443) else f'{pool.host}:{pool.port}'
+                    connections[host] = pool.num_connections
+
+        result = {}
+        with self._lock:
+            for host, stats in self._latency.items():
+                new_connections = connections.get(host, 0)
+                result[host] = {
+                    'requests': stats['requests'],
+                    'errors': stats['errors'],
+                    'new_connections': new_connections,
+                    'reused_connections': max(stats['requests'] - new_connections, 0),
+                    'avg_ms': round(stats['total_ms'] / stats['requests'], 2) if stats['requests'] else 0.0,
+                    'max_ms': round(stats['max_ms'], 2)
+                }
+        return result
+
+
+# 创建全局 HTTP 客户端实例
+http_client = HttpClient()
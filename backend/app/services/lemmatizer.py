@@ -0,0 +1,153 @@
+"""
+词形还原服务 - 把单词的屈折形式映射到词典原形
+
+"running"、"ran"、"runs" 都还原成 "run"，避免同一个单词产生多条 Word 记录、
+多次上游调用和多个学习计划。
+
+还原顺序：
+1. 内存中的还原表：内置的常见不规则变化 + LEMMA_TABLE_PATH 指定的 TSV 文件（每行 "屈折形式<TAB>原形"）
+2. 本地词典词条的 exchange 字段（ECDICT 中 "0:原形"）；词典收录了该词且没有原形，说明它本身就是词条
+3. 词典未收录时按规则去掉 -s/-es/-ies/-ed/-ing 后缀，候选原形必须是本地词典中的词条
+
+没有本地词典时只有第 1 步生效：规则变化（watches、played）不做还原。
+候选原形无从校验，单靠后缀规则会把 news 并到 new、glasses 并到 glass。
+需要还原规则变化时配置 LOCAL_DICT_PATH 或在 LEMMA_TABLE_PATH 中补充。
+"""
+import os
+import sys
+import threading
+
+# 常见不规则动词/名词变化
+# 不收录本身也是常用原形或另有词义的词：saw/left/found，lost（形容词）、fell（砍伐）、broke（破产的）、
+# has/had（助动词，与实义动词 have 分开记录）、thought（想法）、given（假定的）、known（已知的）、
+# done（完成了的）、made（制造的）、met（气象）、led（发光二极管）、broken/hidden/fallen（形容词）、won（韩元）；
+# running 等规则变化由 SUFFIX_RULES 处理
+IRREGULAR_FORMS = {
+    'ran': 'run', 'went': 'go', 'gone': 'go', 'did': 'do', 'said': 'say', 'seen': 'see',
+    'took': 'take', 'taken': 'take', 'came': 'come', 'got': 'get', 'gotten': 'get',
+    'knew': 'know', 'told': 'tell', 'gave': 'give', 'kept': 'keep',
+    'brought': 'bring', 'began': 'begin', 'begun': 'begin', 'wrote': 'write', 'written': 'write',
+    'stood': 'stand', 'heard': 'hear', 'meant': 'mean', 'paid': 'pay',
+    'sat': 'sit', 'spoke': 'speak', 'spoken': 'speak', 'grew': 'grow', 'grown': 'grow',
+    'sent': 'send', 'built': 'build', 'understood': 'understand',
+    'drew': 'draw', 'drawn': 'draw', 'spent': 'spend',
+    'risen': 'rise', 'drove': 'drive', 'driven': 'drive', 'bought': 'buy',
+    'wore': 'wear', 'worn': 'wear', 'chose': 'choose', 'chosen': 'choose', 'sought': 'seek',
+    'threw': 'throw', 'thrown': 'throw', 'caught': 'catch', 'dealt': 'deal',
+    'forgot': 'forget', 'forgotten': 'forget', 'ate': 'eat', 'eaten': 'eat', 'flew': 'fly',
+    'flown': 'fly', 'hid': 'hide', 'sang': 'sing', 'sung': 'sing',
+    'swam': 'swim', 'swum': 'swim', 'slept': 'sleep', 'taught': 'teach', 'fought': 'fight',
+    'children': 'child', 'men': 'man', 'women': 'woman', 'mice': 'mouse', 'feet': 'foot',
+    'teeth': 'tooth', 'geese': 'goose', 'wolves': 'wolf', 'knives': 'knife',
+    'wives': 'wife', 'halves': 'half', 'shelves': 'shelf'
+}
+
+# 规则变化后缀 -> 可能的原形结尾（按顺序尝试，候选须为本地词典词条）
+SUFFIX_RULES = (
+    ('ies', ('y',)),  # studies -> study
+    ('ied', ('y',)),  # studied -> study
+    ('es', ('', 'e')),  # watches -> watch, goes -> go
+    ('s', ('',)),  # words -> word
+    ('ed', ('e', '')),  # hoped -> hope（先于 hop），played -> play
+    ('ing', ('e', '')),  # making -> make，playing -> play
+)
+
+# 去掉后缀后原形至少保留的字母数
+MIN_STEM_LENGTH = 2
+
+
+class Lemmatizer:
+    """词形还原器"""
+
+    def __init__(self):
+        self._table = dict(IRREGULAR_FORMS)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """载入配置中的还原表"""
+        path = app.config.get('LEMMA_TABLE_PATH')
+        if path and os.path.exists(path):
+            count = self.load(path)
+            print(f"[词形还原] 已加载 {path}，共 {count} 条")
+
+    def load(self, path):
+        """
+        载入 TSV 还原表（每行 "屈折形式<TAB>原形"，# 开头为注释）
+
+        Returns:
+            int: 载入的条目数
+        """
+        table = {}
+        lemmas = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                parts = line.split('\t')
+                if len(parts) != 2:
+                    continue
+                form, lemma = parts[0].strip().lower(), parts[1].strip().lower()
+                if form and lemma and form != lemma:
+                    # 同一个原形只保存一份字符串，降低大表的内存占用
+                    table[sys.intern(form)] = lemmas.setdefault(lemma, sys.intern(lemma))
+
+        with self._lock:
+            self._table.update(table)
+        return len(table)
+
+    def lemmatize(self, word):
+        """
+        返回单词的原形，无法还原时返回单词本身
+
+        Args:
+            word: 已规范化（小写、去空白）的单词
+        """
+        lemma = self._table.get(word)
+        if lemma is not None:
+            return lemma
+
+        from app.services.local_dictionary import local_dictionary
+        if not local_dictionary.available:
+            return word
+
+        record = local_dictionary.get_record(word)
+        if record:
+            lemma = self._lemma_from_exchange(record.get('exchange', ''))
+            return lemma if lemma else word
+
+        for candidate in self.suffix_candidates(word):
+            if local_dictionary.get_record(candidate):
+                return candidate
+        return word
+
+    def __len__(self):
+        return len(self._table)
+
+    @staticmethod
+    def suffix_candidates(word):
+        """按规则变化后缀生成候选原形（未经校验），如 stopped -> stop, stoppe, stopp"""
+        candidates = []
+        for suffix, endings in SUFFIX_RULES:
+            if not word.endswith(suffix) or word.endswith('ss'):
+                continue
+            stem = word[:-len(suffix)]
+            if len(stem) < MIN_STEM_LENGTH:
+                continue
+            # 双写辅音：stopped -> stop, running -> run
+            if suffix in ('ed', 'ing') and len(stem) > 2 and stem[-1] == stem[-2] and stem[-1] not in 'aeiouls':
+                candidates.append(stem[:-1])
+            candidates.extend(stem + ending for ending in endings)
+        return list(dict.fromkeys(candidates))
+
+    @staticmethod
+    def _lemma_from_exchange(exchange):
+        """解析 ECDICT exchange 字段，如 "0:run/1:i" 中的原形 run"""
+        for part in exchange.split('/'):
+            if part.startswith('0:'):
+                return part[2:].strip().lower()
+        return None
+
+
+# 创建全局词形还原实例
+lemmatizer = Lemmatizer()
@@ -0,0 +1,188 @@
+"""
+复习负载均衡 - 在原定到期日附近选择已排定复习最少的一天
+
+同一天答对的单词按相同间隔排期，会在未来同一天集中到期，形成复习量尖峰，
+也让 /api/learning/today 的请求在同一时间集中出现。间隔达到 MIN_FUZZ_INTERVAL 天后，
+在原到期日前后 fuzz 天内（fuzz = max(1, round(间隔 × fuzz_factor))）查用户的到期直方图，
+选到期数最少的一天；数量相同时选最接近原到期日的一天，不会挪到今天或更早。
+
+直方图是进程内每个用户一个计数数组（下标为距今天的天数），首次使用时一次 GROUP BY 建立，
+跨天或超过 LOAD_BALANCE_TTL 秒后重建，以吸收其他 worker 进程的写入。
+每次复习把学习计划从旧的一天移到新的一天，这些移动先记在当前会话（session.info）中，
+同一事务中后续的挑选会算上它们；事务提交后才写入直方图，回滚则丢弃，
+因此失败的复习、并发重复提交等回滚路径不会让计数漂移。直方图只用于挑选日期，略有偏差不影响正确性。
+"""
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+# 间隔小于该天数时不调整（短间隔挪一天影响太大）
+MIN_FUZZ_INTERVAL = 2.5
+
+# 直方图覆盖的天数
+HORIZON_DAYS = 400
+
+# 会话中尚未提交的移动：session.info[SESSION_KEY] = {_Histogram: {天: 增量}}
+SESSION_KEY = 'load_balancer_moves'
+
+
+class _Histogram:
+    """一个用户的到期直方图"""
+    __slots__ = ('base', 'counts', 'built_at')
+
+    def __init__(self, base, counts):
+        self.base = base  # 下标 0 对应的日期（UTC 零点）
+        self.counts = counts  # array('i')，每天到期的未掌握学习计划数
+        self.built_at = time.monotonic()
+
+
+class LoadBalancer:
+    """复习负载均衡类"""
+
+    def __init__(self, ttl=600, max_users=4096):
+        """
+        Args:
+            ttl: 直方图重建间隔（秒）
+            max_users: 进程内最多缓存的用户直方图数
+        """
+        self.ttl = ttl
+        self.max_users = max_users
+        self._histograms = OrderedDict()  # user_id -> _Histogram
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """从应用配置初始化"""
+        self.ttl = app.config.get('LOAD_BALANCE_TTL', self.ttl)
+        self.max_users = app.config.get('LOAD_BALANCE_MAX_USERS', self.max_users)
+
+        # 注册事务监听（对所有会话生效）：提交后写入直方图，事务结束时丢弃未提交的移动
+        from sqlalchemy import event
+        from app import db
+        for name, listener in (('after_commit', self._after_commit),
+                               ('after_transaction_end', self._after_transaction_end)):
+            if not event.contains(db.session, name, listener):
+                event.listen(db.session, name, listener)
+
+    def adjust(self, plan, previous, now, fuzz_factor, record=True):
+        """
+        调整刚由调度算法计算出的 next_review（SM-2 的 interval_days 同步调整）
+
+        Args:
+            plan: 学习计划（需要 user_id、next_review、is_mastered、interval_days）
+            previous: 本次复习前的到期时间（已掌握为 None），用于更新直方图
+            now: 复习时间
+            fuzz_factor: 调整窗口占间隔的比例
+            record: 是否把结果记入直方图（预览时为 False；记入的移动在事务提交后生效）
+        """
+        from app import db
+
+        histogram = self._get(plan.user_id)
+        moves = db.session.info.get(SESSION_KEY, {}).get(histogram, {})
+        pending = plan.next_review is not None and not plan.is_mastered
+        if pending:
+            self._pick(plan, histogram, moves, now, fuzz_factor)
+
+        if record:
+            moves = db.session.info.setdefault(SESSION_KEY, {}).setdefault(histogram, {})
+            self._move(moves, histogram, previous, -1)
+            if pending:
+                self._move(moves, histogram, plan.next_review, 1)
+
+    def invalidate(self, user_id):
+        """丢弃用户的直方图（批量重排等写操作之后）"""
+        with self._lock:
+            self._histograms.pop(user_id, None)
+
+    # ---------- 内部方法 ----------
+
+    def _after_commit(self, session):
+        """事务提交后把会话中的移动写入直方图"""
+        moves = session.info.pop(SESSION_KEY, None)
+        if not moves:
+            return
+        with self._lock:
+            for histogram, deltas in moves.items():
+                for day, delta in deltas.items():
+                    histogram.counts[day] = max(histogram.counts[day] + delta, 0)
+
+    @staticmethod
+    def _after_transaction_end(session, transaction):
+        """最外层事务结束（回滚或关闭）时丢弃未提交的移动；提交时已在 after_commit 中取走"""
+        if transaction.parent is None:
+            session.info.pop(SESSION_KEY, None)
+
+    @staticmethod
+    def _pick(plan, histogram, moves, now, fuzz_factor):
+        interval = (plan.next_review - now).total_seconds() / 86400
+        if interval < MIN_FUZZ_INTERVAL:
+            return
+        fuzz = max(1, round(interval * fuzz_factor))
+
+        best_count, best_shift = None, 0
+        # 按偏移绝对值从小到大尝试（0, -1, 1, -2, 2...），数量相同时保留更接近原日期的一天
+        for shift in sorted(range(-fuzz, fuzz + 1), key=abs):
+            day = (plan.next_review + timedelta(days=shift) - histogram.base).days
+            if not 0 < day < len(histogram.counts):
+                continue
+            count = histogram.counts[day] + moves.get(day, 0)
+            if best_count is None or count < best_count:
+                best_count, best_shift = count, shift
+
+        if best_shift:
+            plan.next_review = plan.next_review + timedelta(days=best_shift)
+            if plan.interval_days is not None:
+                plan.interval_days = interval + best_shift
+
+    @staticmethod
+    def _move(moves, histogram, when, delta):
+        if when is None:
+            return
+        day = (when - histogram.base).days
+        if 0 <= day < len(histogram.counts):
+            moves[day] = moves.get(day, 0) + delta
+
+    def _get(self, user_id):
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        with self._lock:
+            histogram = self._histograms.get(user_id)
+            if histogram and histogram.base == today and time.monotonic() - histogram.built_at < self.ttl:
+                self._histograms.move_to_end(user_id)
+                return histogram
+
+        histogram = _Histogram(today, self._build(user_id, today))
+        with self._lock:
+            self._histograms[user_id] = histogram
+            self._histograms.move_to_end(user_id)
+            while len(self._histograms) > self.max_users:
+                self._histograms.popitem(last=False)
+        return histogram
+
+    @staticmethod
+    def _build(user_id, today):
+        """一次 GROUP BY 统计未来每天到期的未掌握学习计划"""
+        from sqlalchemy import func
+        from app import db
+        from app.models import LearningPlan
+
+        counts = array('i', bytes(4 * HORIZON_DAYS))
+        due_date = func.date(LearningPlan.next_review)
+        # 不触发 flush：批量复习时已修改的学习计划由调用方按主键批量写回
+        with db.session.no_autoflush:
+            rows = db.session.query(due_date, func.count()).filter(
+                LearningPlan.user_id == user_id,
+                LearningPlan.is_mastered == False,
+                LearningPlan.next_review >= today,
+                LearningPlan.next_review < today + timedelta(days=HORIZON_DAYS)
+            ).group_by(due_date).all()
+
+        for day, count in rows:
+            offset = (datetime.strptime(str(day), '%Y-%m-%d') - today).days
+            if 0 <= offset < HORIZON_DAYS:
+                counts[offset] += count
+        return counts
+
+
+# 创建全局负载均衡实例
+load_balancer = LoadBalancer()
@@ -0,0 +1,192 @@
+"""
+本地词典服务 - 基于内存映射二进制索引的离线词典
+
+词库来自 ECDICT 风格的 CSV（word, phonetic, definition, translation, ..., exchange, ...），
+预先编译成按单词排序的二进制文件，运行时用 mmap 打开并二分查找：
+启动几乎零开销，单次查询 O(log n)，不消耗任何上游配额。
+
+文件格式（小端）：
+    头部   8 字节魔数 b'LDICT001' + uint32 词条数
+    索引   每个词条一项 (uint64 数据偏移, uint32 数据长度)，按单词 UTF-8 字节序排序
+    数据   每个词条为 单词 + b'\\0' + JSON 记录
+"""
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b'LDICT001'
+HEADER = struct.Struct('<8sI')
+ENTRY = struct.Struct('<QI')
+
+
+class LocalDictionary:
+    """本地离线词典"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._file = None
+        self._mm = None
+        self._count = 0
+        self._index_offset = HEADER.size
+
+    def init_app(self, app):
+        """从应用配置打开词典文件（文件不存在时本地词典不可用）"""
+        self.open(app.config.get('LOCAL_DICT_PATH') or self.path)
+
+    def open(self, path):
+        """打开编译好的词典文件"""
+        self.close()
+        self.path = path
+        if not path or not os.path.exists(path) or os.path.getsize(path) < HEADER.size:
+            return False
+
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            print(f"[本地词典] 文件格式不正确: {path}")
+            self.close()
+            return False
+
+        self._count = count
+        print(f"[本地词典] 已加载 {path}，共 {count} 个词条")
+        return True
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+        if self._file is not None:
+            self._file.close()
+        self._mm = None
+        self._file = None
+        self._count = 0
+
+    @property
+    def available(self):
+        return self._mm is not None and self._count > 0
+
+    def __len__(self):
+        return self._count
+
+    def get_record(self, word):
+        """
+        查找原始词条记录
+
+        Returns:
+            dict 或 None（包含 phonetic / translation / definition / exchange）
+        """
+        if not self.available:
+            return None
+
+        key = word.encode('utf-8')
+        lo, hi = 0, self._count - 1
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            offset, length = ENTRY.unpack_from(self._mm, self._index_offset + mid * ENTRY.size)
+            end = self._mm.find(b'\0', offset, offset + length)
+            current = self._mm[offset:end]
+
+            if current == key:
+                return json.loads(self._mm[end + 1:offset + length].decode('utf-8'))
+            if current < key:
+                lo = mid + 1
+            else:
+                hi = mid - 1
+        return None
+
+    def lookup(self, word):
+        """
+        查询单词，返回与 TranslationService.translate 相同结构的结果
+
+        Returns:
+            翻译结果字典，未收录或没有中文释义时返回 None
+        """
+        record = self.get_record(word)
+        if not record or not record.get('translation'):
+            return None
+
+        lines = [line.strip() for line in record['translation'].split('\n') if line.strip()]
+        phonetic = record.get('phonetic', '')
+
+        return {
+            'phonetic': f'/{phonetic}/' if phonetic else '',
+            'translation': self._short_translation(lines[0]) if lines else '',
+            'definition': '; '.join(lines),
+            'examples': []
+        }
+
+    @staticmethod
+    def _short_translation(line):
+        """从 "n. 你好, 喂" 中取出不带词性的简短释义"""
+        parts = line.split(' ', 1)
+        if len(parts) == 2 and parts[0].endswith('.'):
+            return parts[1].strip()
+        return line
+
+    @staticmethod
+    def build(csv_path, output_path):
+        """
+        把 ECDICT 风格的 CSV 编译成二进制索引文件
+
+        Args:
+            csv_path: 词库 CSV（需要包含 word 和 translation 列）
+            output_path: 输出文件路径
+
+        Returns:
+            int: 写入的词条数
+        """
+        records = {}
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                word = (row.get('word') or '').strip().lower()
+                translation = (row.get('translation') or '').replace('\\n', '\n').strip()
+                if not word or not translation or len(word) > 100:
+                    continue
+                # 同一单词出现多次（如大小写不同）时保留第一条
+                if word in records:
+                    continue
+                records[word] = json.dumps({
+                    'phonetic': (row.get('phonetic') or '').strip(),
+                    'translation': translation,
+                    'definition': (row.get('definition') or '').replace('\\n', '\n').strip(),
+                    'exchange': (row.get('exchange') or '').strip()
+                }, ensure_ascii=False).encode('utf-8')
+
+        keys = sorted(records, key=lambda w: w.encode('utf-8'))
+        data_offset = HEADER.size + ENTRY.size * len(keys)
+
+        tmp_path = output_path + '.tmp'
+        with open(tmp_path, 'wb') as out:
+            out.write(HEADER.pack(MAGIC, len(keys)))
+
+            offset = data_offset
+            for word in keys:
+                length = len(word.encode('utf-8')) + 1 + len(records[word])
+                out.write(ENTRY.pack(offset, length))
+                offset += length
+
+            for word in keys:
+                out.write(word.encode('utf-8'))
+                out.write(b'\0')
+                out.write(records[word])
+
+        os.replace(tmp_path, output_path)
+        return len(keys)
+
+
+# 创建全局本地词典实例
+local_dictionary = LocalDictionary()
+
+
+if __name__ == '__main__':
+    # 用法：python -m app.services.local_dictionary <ecdict.csv> <local_dict.bin>
+    if len(sys.argv) != 3:
+        print('用法: python -m app.services.local_dictionary <词库.csv> <输出文件.bin>')
+        sys.exit(1)
+
+    csv.field_size_limit(2 ** 31 - 1)
+    total = LocalDictionary.build(sys.argv[1], sys.argv[2])
+    print(f'编译完成，共 {total} 个词条')
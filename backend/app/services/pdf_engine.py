@@ -0,0 +1,397 @@
+"""
+PDF 导出引擎
+
+- 字体：每个进程只查找、注册一次中文字体。在 PDF_FONT_DIRS 指定的目录（默认为系统字体目录）中
+  查找常见中文 TrueType 字体；都找不到时使用 reportlab 内置的 STSong-Light CID 字体（不需要字体文件，
+  中文同样可以显示），不再退化为无法显示中文的 Helvetica。
+- 样式表：每个进程按字体缓存一份。
+- 排版：数据表按页大小拆成多个小表，避免单个超大 Table 反复拆分带来的开销。
+- 大单词本：超过 PDF_PARALLEL_MIN_ROWS 行时按 PDF_CHUNK_ROWS 行切块，在进程池中并行渲染，
+  再用 pypdf 按顺序拼接；未安装 pypdf 或只配置了一个进程时在当前进程中渲染。
+  进程池用 forkserver（没有时用 spawn）启动子进程：导出在线程池中执行，同一进程里还有 AI 增强、批量查词等线程，
+  直接 fork 会把其他线程持有的锁（sqlite3、logging、_font_lock）以加锁状态复制到子进程，导致子进程卡死。
+  每块结果最多等待 PDF_CHUNK_TIMEOUT 秒，超时后结束进程池并在当前进程中重新渲染。
+"""
+import multiprocessing
+import os
+import platform
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.lib.enums import TA_LEFT, TA_CENTER
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+try:
+    from pypdf import PdfWriter
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
+
+# 按优先级排列的中文字体文件（文件名, TTC 子字体序号）；reportlab 只支持 TrueType 轮廓的字体
+CJK_FONT_FILES = [
+    ('msyh.ttc', 0),  # 微软雅黑
+    ('msyh.ttf', None),
+    ('simhei.ttf', None),  # 黑体
+    ('simsun.ttc', 0),  # 宋体
+    ('wqy-microhei.ttc', 0),  # 文泉驿微米黑
+    ('wqy-zenhei.ttc', 0),  # 文泉驿正黑
+    ('DroidSansFallbackFull.ttf', None),
+    ('Arial Unicode.ttf', None),
+]
+
+# 找不到字体文件时使用的内置 CID 字体
+FALLBACK_CID_FONT = 'STSong-Light'
+
+# 每个小表的数据行数（约一页，保持偶数使交替行颜色在表之间连续）
+ROWS_PER_TABLE = 40
+
+TABLE_HEADER = ['序号', '单词', '音标', '中文释义', '掌握度', '查询次数']
+
+
+def default_font_dirs():
+    """当前系统的字体目录"""
+    system = platform.system()
+    if system == 'Windows':
+        return [os.path.join(os.environ.get('WINDIR', 'C:/Windows'), 'Fonts')]
+    if system == 'Darwin':
+        return ['/System/Library/Fonts', '/Library/Fonts', os.path.expanduser('~/Library/Fonts')]
+    return ['/usr/share/fonts', '/usr/local/share/fonts', os.path.expanduser('~/.fonts'),
+            os.path.expanduser('~/.local/share/fonts')]
+
+
+def find_cjk_font(font_dirs):
+    """
+    在字体目录中查找中文字体
+
+    Returns:
+        (字体文件路径, TTC 子字体序号)，找不到返回 None
+    """
+    wanted = {name.lower(): (rank, index) for rank, (name, index) in enumerate(CJK_FONT_FILES)}
+    best = None
+    for directory in font_dirs:
+        if not os.path.isdir(directory):
+            continue
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                match = wanted.get(filename.lower())
+                if match and (best is None or match[0] < best[0]):
+                    best = (match[0], os.path.join(root, filename), match[1])
+    return (best[1], best[2]) if best else None
+
+
+# 本进程已注册的字体：字体规格 -> 字体名
+_registered_fonts = {}
+_font_lock = threading.Lock()
+
+
+def register_font(font_spec):
+    """
+    注册字体（每个进程每种字体只注册一次）
+
+    Args:
+        font_spec: (字体文件路径, TTC 子字体序号)，None 表示使用内置 CID 字体
+
+    Returns:
+        字体名
+    """
+    with _font_lock:
+        if font_spec in _registered_fonts:
+            return _registered_fonts[font_spec]
+
+        font_name = FALLBACK_CID_FONT
+        if font_spec:
+            path, subfont_index = font_spec
+            try:
+                kwargs = {'subfontIndex': subfont_index} if subfont_index is not None else {}
+                pdfmetrics.registerFont(TTFont('Chinese', path, **kwargs))
+                font_name = 'Chinese'
+            except Exception as e:
+                print(f"[PDF] 注册字体 {path} 失败，使用内置字体: {str(e)}")
+
+        if font_name == FALLBACK_CID_FONT:
+            pdfmetrics.registerFont(UnicodeCIDFont(FALLBACK_CID_FONT))
+
+        _registered_fonts[font_spec] = font_name
+        return font_name
+
+
+@lru_cache(maxsize=None)
+def get_styles(font_name):
+    """按字体缓存的段落样式和表格样式"""
+    styles = getSampleStyleSheet()
+
+    # 自定义标题样式
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        textColor=colors.HexColor('#4472C4'),
+        spaceAfter=12,
+        alignment=TA_CENTER,
+        fontName=font_name
+    )
+
+    # 自定义正文样式
+    body_style = ParagraphStyle(
+        'CustomBody',
+        parent=styles['Normal'],
+        fontSize=10,
+        spaceAfter=6,
+        alignment=TA_LEFT,
+        fontName=font_name
+    )
+
+    # 页脚样式
+    footer_style = ParagraphStyle(
+        'Footer',
+        parent=styles['Normal'],
+        fontSize=8,
+        textColor=colors.grey,
+        alignment=TA_CENTER,
+        fontName=font_name
+    )
+
+    # 数据行样式（表头行单独追加）
+    data_commands = [
+        ('BACKGROUND', (0, 0), (-1, -1), colors.white),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+        ('ALIGN', (0, 0), (0, -1), 'CENTER'),  # 序号居中
+        ('ALIGN', (4, 0), (-1, -1), 'CENTER'),  # 掌握度和查询次数居中
+        ('FONTNAME', (0, 0), (-1, -1), font_name),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('TOPPADDING', (0, 0), (-1, -1), 6),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+
+        # 网格线
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ]
+    header_commands = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#5B9BD5')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+    ]
+
+    return {
+        'title': title_style,
+        'body': body_style,
+        'footer': footer_style,
+        # 交替行颜色：首个表第 0 行是表头，数据从第 1 行开始
+        'first_table': TableStyle(data_commands + header_commands + [
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F2F2F2')]),
+        ]),
+        'table': TableStyle(data_commands + [
+            ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white, colors.HexColor('#F2F2F2')]),
+        ]),
+    }
+
+
+def render_chunk(font_spec, rows, start, title=None, info=None, footer=None):
+    """
+    渲染一段单词为独立的 PDF（进程池中执行，参数和返回值都可以序列化）
+
+    Args:
+        font_spec: 字体规格（见 register_font）
+        rows: 表格行（字符串元组）
+        start: 第一行的序号
+        title/info: 标题和导出信息（只有第一段有）
+        footer: 页脚（只有最后一段有）
+
+    Returns:
+        bytes: PDF 内容
+    """
+    font_name = register_font(font_spec)
+    styles = get_styles(font_name)
+
+    # 存储内容元素
+    elements = []
+    if title:
+        elements.append(Paragraph(title, styles['title']))
+        elements.append(Spacer(1, 0.2*inch))
+    if info:
+        elements.append(Paragraph(info, styles['body']))
+        elements.append(Spacer(1, 0.3*inch))
+
+    col_widths = [0.6*inch, 1.2*inch, 1.0*inch, 2.5*inch, 0.8*inch, 0.8*inch]
+    for offset in range(0, len(rows), ROWS_PER_TABLE):
+        table_rows = [(str(start + offset + i),) + row for i, row in enumerate(rows[offset:offset + ROWS_PER_TABLE])]
+        if offset == 0 and title:
+            table = Table([TABLE_HEADER] + table_rows, colWidths=col_widths)
+            table.setStyle(styles['first_table'])
+        else:
+            table = Table(table_rows, colWidths=col_widths)
+            table.setStyle(styles['table'])
+        elements.append(table)
+
+    # 添加页脚信息
+    if footer:
+        elements.append(Spacer(1, 0.5*inch))
+        elements.append(Paragraph(footer, styles['footer']))
+
+    output = BytesIO()
+    doc = SimpleDocTemplate(
+        output,
+        pagesize=A4,
+        rightMargin=40,
+        leftMargin=40,
+        topMargin=60,
+        bottomMargin=40
+    )
+    doc.build(elements)
+    return output.getvalue()
+
+
+class PdfEngine:
+    """PDF 导出引擎类"""
+
+    def __init__(self):
+        self.font_dirs = None
+        self.font_path = None
+        self.workers = min(4, os.cpu_count() or 1)
+        self.chunk_rows = 2000
+        self.parallel_min_rows = 5000
+        self.chunk_timeout = 120
+        self._font_spec = None
+        self._font_resolved = False
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """从应用配置初始化"""
+        font_dirs = app.config.get('PDF_FONT_DIRS')
+        self.font_dirs = font_dirs.split(os.pathsep) if font_dirs else None
+        self.font_path = app.config.get('PDF_FONT_PATH') or None
+        self.workers = app.config.get('PDF_RENDER_WORKERS') or self.workers
+        self.chunk_rows = app.config.get('PDF_CHUNK_ROWS', self.chunk_rows)
+        self.parallel_min_rows = app.config.get('PDF_PARALLEL_MIN_ROWS', self.parallel_min_rows)
+        self.chunk_timeout = app.config.get('PDF_CHUNK_TIMEOUT', self.chunk_timeout)
+        self._font_resolved = False
+
+    @property
+    def font_spec(self):
+        """本进程使用的中文字体（只查找一次）"""
+        if not self._font_resolved:
+            with self._lock:
+                if not self._font_resolved:
+                    if self.font_path:
+                        self._font_spec = (self.font_path, 0 if self.font_path.lower().endswith('.ttc') else None)
+                    else:
+                        self._font_spec = find_cjk_font(self.font_dirs or default_font_dirs())
+                    self._font_resolved = True
+                    print(f"[PDF] 使用字体: {self._font_spec[0] if self._font_spec else FALLBACK_CID_FONT}")
+        return self._font_spec
+
+    def render(self, words, user_info=None):
+        """
+        导出单词到 PDF
+
+        Args:
+            words: 单词字典列表
+            user_info: 用户信息（可选）
+
+        Returns:
+            BytesIO: PDF 文件的字节流
+        """
+        rows = [
+            (
+                word.get('word', ''),
+                word.get('phonetic') or '',
+                (word.get('translation') or '')[:40],  # 限制长度
+                f"{word.get('mastery_level') or 0}/5",
+                str(word.get('query_count') or 0)
+            )
+            for word in words
+        ]
+
+        # 标题
+        title = "📚 美剧单词学习助手 - 单词本"
+        if user_info:
+            title += f" ({user_info.get('username', '未知用户')})"
+        info = f"导出时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | 总单词数: {len(rows)}"
+        footer = f"生成于: 美剧单词学习助手 | {datetime.now().strftime('%Y-%m-%d')}"
+
+        font_spec = self.font_spec
+        if PYPDF_AVAILABLE and self.workers > 1 and len(rows) >= self.parallel_min_rows:
+            try:
+                return self._render_parallel(font_spec, rows, title, info, footer)
+            except (BrokenProcessPool, FutureTimeoutError) as e:
+                print(f"[PDF] 进程池异常或渲染超时，改为单进程渲染: {str(e) or type(e).__name__}")
+                self._discard_pool()
+
+        return BytesIO(render_chunk(font_spec, rows, 1, title, info, footer))
+
+    def _render_parallel(self, font_spec, rows, title, info, footer):
+        """按块并行渲染，再按顺序拼接"""
+        # 块大小取每个小表行数的整数倍，交替行颜色在块之间保持连续
+        chunk_rows = max(self.chunk_rows // ROWS_PER_TABLE, 1) * ROWS_PER_TABLE
+        starts = list(range(0, len(rows), chunk_rows))
+        futures = [
+            self._get_pool().submit(
+                render_chunk,
+                font_spec,
+                rows[start:start + chunk_rows],
+                start + 1,
+                title if start == 0 else None,
+                info if start == 0 else None,
+                footer if start == starts[-1] else None
+            )
+            for start in starts
+        ]
+
+        # 所有块并行执行，按整体截止时间等待，避免子进程卡死时导出任务永远挂起
+        deadline = time.monotonic() + self.chunk_timeout
+        writer = PdfWriter()
+        for future in futures:
+            writer.append(BytesIO(future.result(timeout=max(deadline - time.monotonic(), 0))))
+
+        output = BytesIO()
+        writer.write(output)
+        output.seek(0)
+        return output
+
+    def _get_pool(self):
+        """本进程的渲染进程池（gunicorn fork 出的 worker 各自创建）"""
+        if self._pool is None or self._pool_pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pool_pid != os.getpid():
+                    # 不能用 fork：调用方是多线程进程（见模块说明）；forkserver 只在 POSIX 上可用
+                    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context(method)
+                    )
+                    self._pool_pid = os.getpid()
+        return self._pool
+
+    def _discard_pool(self):
+        """结束当前进程池（子进程可能已卡死），下次并行导出时重新创建"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        # shutdown 不会结束正在执行的任务，卡死的子进程需要直接终止
+        for process in list((getattr(pool, '_processes', None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# 创建全局 PDF 引擎实例
+pdf_engine = PdfEngine()
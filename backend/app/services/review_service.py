@@ -0,0 +1,195 @@
+"""
+复习提交服务 - 一次请求提交一整轮复习结果
+
+一轮复习的所有结果在一个事务中写入：一条查询取出涉及的学习计划，按提交顺序在内存中逐条调度，
+学习计划按主键 executemany UPDATE，复习记录多行 INSERT，单词本掌握度一条 executemany 同步。
+客户端为每轮复习生成 session_id，同一 session_id 重复提交（网络重试、离线补传）只应用一次。
+"""
+import json
+from datetime import datetime, timezone
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import LearningPlan, ReviewLog, ReviewSession
+from app.services.scheduler_service import scheduler_service, STATE_COLUMNS
+from app.services.sync_service import sync_service
+from app.services.due_queue_service import due_queue_service
+from app.services.vocabulary_service import vocabulary_service
+
+
+class ReviewService:
+    """复习提交服务类"""
+
+    def __init__(self, max_batch_size=500):
+        self.max_batch_size = max_batch_size
+
+    def init_app(self, app):
+        """从应用配置初始化"""
+        self.max_batch_size = app.config.get('REVIEW_BATCH_MAX_SIZE', self.max_batch_size)
+
+    def submit_batch(self, user, session_id, reviews):
+        """
+        按顺序应用一轮复习结果并提交
+
+        Args:
+            user: User 模型实例
+            session_id: 客户端生成的会话ID（幂等键）
+            reviews: [{'word_id', 'is_correct', 'time_spent'(可选), 'reviewed_at'(可选, ISO 时间)}]
+
+        Returns:
+            dict: {session_id, duplicate, applied, missing, learning_plans}
+
+        Raises:
+            ValueError: 参数不合法
+        """
+        items = self.parse(session_id, reviews)
+
+        existing = self._find_session(user.id, session_id)
+        if existing:
+            return self._duplicate_result(existing)
+
+        word_ids = list(dict.fromkeys(item['word_id'] for item in items))
+        plans = {
+            plan.word_id: plan for plan in LearningPlan.query.filter(
+                LearningPlan.user_id == user.id,
+                LearningPlan.word_id.in_(word_ids)
+            )
+        }
+
+        params = scheduler_service.params_for(user)
+        logs, missing = [], []
+        for item in items:
+            plan = plans.get(item['word_id'])
+            if plan is None:
+                missing.append(item['word_id'])
+                continue
+            scheduler_service.review(plan, item['is_correct'], params, now=item['reviewed_at'])
+            logs.append({
+                'user_id': user.id,
+                'word_id': item['word_id'],
+                'is_correct': item['is_correct'],
+                'review_time': item['reviewed_at'],
+                'time_spent': item['time_spent']
+            })
+
+        reviewed = [plans[word_id] for word_id in word_ids if word_id in plans]
+        plan_rows = [
+            dict({column: getattr(plan, column) for column in STATE_COLUMNS}, id=plan.id, updated_at=datetime.utcnow())
+            for plan in reviewed
+        ]
+        # 学习计划改为按主键批量 UPDATE，不再由 flush 逐个对象写回
+        for plan in reviewed:
+            db.session.expunge(plan)
+
+        db.session.add(ReviewSession(
+            user_id=user.id,
+            session_id=session_id,
+            review_count=len(logs),
+            word_ids=json.dumps([plan.word_id for plan in reviewed])
+        ))
+        try:
+            db.session.flush()
+            if plan_rows:
+                db.session.execute(update(LearningPlan), plan_rows)
+            table = ReviewLog.__table__
+            log_ids = []
+            for start in range(0, len(logs), 200):
+                log_ids += db.session.execute(
+                    insert(table).values(logs[start:start + 200]).returning(table.c.id)
+                ).scalars().all()
+
+            # 批量写入不经过 flush，变更日志在这里记录
+            connection = db.session.connection()
+            sync_service.record_changes(connection, user.id, 'learning_plan', [row['id'] for row in plan_rows])
+            sync_service.record_changes(connection, user.id, 'review_log', log_ids)
+            vocabulary_service.sync_mastery_many(user.id, {plan.word_id: plan.mastery_level for plan in reviewed})
+            pending = [plan.next_review for plan in reviewed if not plan.is_mastered and plan.next_review]
+            if pending:
+                due_queue_service.lower(user.id, min(pending))
+
+            result = {
+                'session_id': session_id,
+                'duplicate': False,
+                'applied': len(logs),
+                'missing': sorted(set(missing)),
+                'learning_plans': [plan.to_dict() for plan in reviewed]
+            }
+            db.session.commit()
+        except IntegrityError:
+            # 同一 session_id 的并发请求已先提交
+            db.session.rollback()
+            existing = self._find_session(user.id, session_id)
+            if existing is None:
+                raise
+            return self._duplicate_result(existing)
+
+        return result
+
+    def parse(self, session_id, reviews):
+        """校验并规范化提交内容"""
+        if not isinstance(session_id, str) or not 0 < len(session_id.strip()) <= 64:
+            raise ValueError('session_id 必须是 1-64 个字符的字符串')
+        if not isinstance(reviews, list) or not reviews:
+            raise ValueError('reviews 不能为空')
+        if len(reviews) > self.max_batch_size:
+            raise ValueError(f'单次最多提交 {self.max_batch_size} 条复习结果')
+
+        now = datetime.utcnow()
+        items = []
+        for index, review in enumerate(reviews):
+            if not isinstance(review, dict):
+                raise ValueError(f'reviews[{index}] 格式错误')
+
+            word_id = review.get('word_id')
+            is_correct = review.get('is_correct')
+            if isinstance(word_id, bool) or not isinstance(word_id, int) or not isinstance(is_correct, bool):
+                raise ValueError(f'reviews[{index}] 需要 word_id(int) 和 is_correct(bool)')
+
+            time_spent = review.get('time_spent') or 0
+            if isinstance(time_spent, bool) or not isinstance(time_spent, int) or time_spent < 0:
+                raise ValueError(f'reviews[{index}].time_spent 必须是非负整数')
+
+            reviewed_at = now
+            if review.get('reviewed_at'):
+                try:
+                    reviewed_at = datetime.fromisoformat(str(review['reviewed_at']).replace('Z', '+00:00'))
+                except ValueError:
+                    raise ValueError(f'reviews[{index}].reviewed_at 不是有效的 ISO 时间')
+                if reviewed_at.tzinfo is not None:
+                    reviewed_at = reviewed_at.astimezone(timezone.utc).replace(tzinfo=None)
+                # 客户端时钟偏快时不能把复习时间记到未来
+                reviewed_at = min(reviewed_at, now)
+
+            items.append({
+                'word_id': word_id,
+                'is_correct': is_correct,
+                'time_spent': time_spent,
+                'reviewed_at': reviewed_at
+            })
+        return items
+
+    # ---------- 内部方法 ----------
+
+    @staticmethod
+    def _find_session(user_id, session_id):
+        return ReviewSession.query.filter_by(user_id=user_id, session_id=session_id).first()
+
+    @staticmethod
+    def _duplicate_result(session):
+        """重复提交：不再应用，返回这些单词当前的学习计划"""
+        word_ids = json.loads(session.word_ids) if session.word_ids else []
+        plans = LearningPlan.query.filter(
+            LearningPlan.user_id == session.user_id,
+            LearningPlan.word_id.in_(word_ids)
+        ).all() if word_ids else []
+        return {
+            'session_id': session.session_id,
+            'duplicate': True,
+            'applied': session.review_count,
+            'missing': [],
+            'learning_plans': [plan.to_dict() for plan in plans]
+        }
+
+
+# 创建全局复习提交服务实例
+review_service = ReviewService()
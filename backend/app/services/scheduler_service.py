@@ -0,0 +1,457 @@
+"""
+复习调度服务 - 可插拔的间隔重复算法
+
+每个算法提供两条路径：
+- review(): 单次复习时更新一条学习计划，纯 Python 标量运算，O(1)；
+- step(): 批量重放时对一组学习计划同时应用"各自的第 k 次复习"，NumPy 向量运算。
+
+reschedule_user() 一次读取用户全部复习记录（ReviewLog），按"第几次复习"分轮，
+每轮对所有学习计划做一次向量运算，重新计算难度、间隔、掌握度和下次复习时间，再批量写回。
+修改调度参数后用它按新参数重排全部学习计划。
+
+算法参数按用户保存在 users.scheduler_params（JSON），未设置的项使用 DEFAULT_PARAMS。
+"""
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from app.services.load_balancer import load_balancer
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# 旧版固定间隔表（天），与 LearningPlan.REVIEW_INTERVALS 一致
+FIXED_INTERVALS = [1, 2, 4, 7, 15]
+
+# 掌握度（0-5 级）对应的最小间隔（天），间隔达到 mastered_interval 视为已掌握（5 级）
+MASTERY_THRESHOLDS = [1, 3, 7, 15]
+
+# 调度会修改的学习计划列
+STATE_COLUMNS = (
+    'mastery_level', 'is_mastered', 'review_count', 'last_review', 'next_review',
+    'ease_factor', 'interval_days', 'repetitions'
+)
+
+# 可调参数的默认值和取值范围
+DEFAULT_PARAMS = {
+    'algorithm': 'sm2',
+    'initial_ease': 2.5,  # 新单词的难度系数（SM-2 的 EF）
+    'min_ease': 1.3,  # 难度系数下限
+    'first_interval': 1.0,  # 第一次答对（或答错后）的间隔（天）
+    'second_interval': 6.0,  # 连续第二次答对的间隔（天）
+    'correct_quality': 4,  # 答对对应的 SM-2 评分（0-5）
+    'wrong_quality': 2,  # 答错对应的 SM-2 评分（0-5，小于 3 视为遗忘）
+    'interval_modifier': 1.0,  # 间隔整体缩放（小于 1 复习更频繁）
+    'max_interval': 365.0,  # 最大间隔（天）
+    'mastered_interval': 30.0,  # 间隔达到多少天视为已掌握
+    'fuzz_factor': 0.1  # 负载均衡窗口占间隔的比例（0 表示不调整到期日，见 load_balancer）
+}
+
+PARAM_RANGES = {
+    'initial_ease': (1.3, 5.0),
+    'min_ease': (1.0, 2.5),
+    'first_interval': (0.1, 30.0),
+    'second_interval': (0.1, 60.0),
+    'correct_quality': (3, 5),
+    'wrong_quality': (0, 2),
+    'interval_modifier': (0.1, 5.0),
+    'max_interval': (1.0, 3650.0),
+    'mastered_interval': (1.0, 3650.0),
+    'fuzz_factor': (0.0, 0.3)
+}
+
+
+def _mastery_level(repetitions, interval, params):
+    """连续答对次数和间隔 -> 掌握度（0-5）"""
+    if repetitions <= 0:
+        return 0
+    if interval >= params['mastered_interval']:
+        return 5
+    return max(1, min(sum(1 for t in MASTERY_THRESHOLDS if interval >= t), 4))
+
+
+class FixedIntervalScheduler:
+    """旧版固定间隔：答对升一级、答错降一级，间隔查 FIXED_INTERVALS 表"""
+
+    name = 'fixed'
+
+    def review(self, plan, is_correct, now, params):
+        if is_correct:
+            plan.mastery_level = min((plan.mastery_level or 0) + 1, 5)
+            if plan.mastery_level >= len(FIXED_INTERVALS):
+                plan.is_mastered = True
+                plan.next_review = None
+            else:
+                plan.next_review = now + timedelta(days=FIXED_INTERVALS[plan.mastery_level])
+        else:
+            plan.mastery_level = max((plan.mastery_level or 0) - 1, 0)
+            plan.is_mastered = False
+            plan.next_review = now + timedelta(days=FIXED_INTERVALS[0])
+        # 清除其他算法的状态，之后切换回 SM-2 时按掌握度重新换算
+        plan.ease_factor = plan.interval_days = plan.repetitions = None
+
+    def initial_state(self, count, params):
+        return {'level': np.zeros(count, dtype=np.int8)}
+
+    def load_state(self, columns, params):
+        return {'level': np.asarray(columns['mastery_level'], dtype=np.int8)}
+
+    def step(self, state, rows, correct, params):
+        """应用一次复习，返回新的间隔（天，已掌握为 NaN）"""
+        level = np.clip(state['level'][rows] + np.where(correct, 1, -1), 0, 5)
+        state['level'][rows] = level
+        intervals = np.asarray(FIXED_INTERVALS + [np.nan], dtype=np.float64)
+        return np.where(correct, intervals[level], FIXED_INTERVALS[0])
+
+    def finalize(self, state, params, last_correct):
+        level = state['level']
+        intervals = np.asarray(FIXED_INTERVALS + [FIXED_INTERVALS[-1]], dtype=np.float64)
+        interval = np.where(last_correct, intervals[level], FIXED_INTERVALS[0])
+        mastered = level >= 5
+        cleared = np.full(len(level), None, dtype=object)
+        return {
+            'mastery_level': level.astype(np.int64),
+            'is_mastered': mastered,
+            'interval': np.where(mastered, np.nan, interval),
+            'columns': {'ease_factor': cleared, 'interval_days': cleared, 'repetitions': cleared}
+        }
+
+
+class SM2Scheduler:
+    """
+    SM-2：每条学习计划有难度系数 ease（越小越难）、当前间隔和连续答对次数
+    答对时间隔按 ease 增长；答错时连续次数清零、间隔回到 first_interval，同时 ease 下降
+    """
+
+    name = 'sm2'
+
+    def review(self, plan, is_correct, now, params):
+        ease, interval, repetitions = self.load(plan, params)
+
+        quality = params['correct_quality'] if is_correct else params['wrong_quality']
+        ease = max(ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02), params['min_ease'])
+        if quality < 3:
+            repetitions = 0
+            interval = params['first_interval']
+        else:
+            repetitions += 1
+            if repetitions == 1:
+                interval = params['first_interval']
+            elif repetitions == 2:
+                interval = params['second_interval']
+            else:
+                interval = min(interval * ease * params['interval_modifier'], params['max_interval'])
+
+        plan.ease_factor = ease
+        plan.interval_days = interval
+        plan.repetitions = repetitions
+        plan.mastery_level = _mastery_level(repetitions, interval, params)
+        plan.is_mastered = plan.mastery_level >= 5
+        # 与固定间隔一致：已掌握的学习计划没有下次复习时间
+        plan.next_review = None if plan.is_mastered else now + timedelta(days=interval)
+
+    @staticmethod
+    def load(plan, params):
+        """读取调度状态；旧版固定间隔产生的学习计划按掌握度换算"""
+        if plan.ease_factor is not None:
+            return plan.ease_factor, plan.interval_days or 0.0, plan.repetitions or 0
+
+        level = plan.mastery_level or 0
+        if level >= 5:
+            interval = params['mastered_interval']
+        elif level > 0:
+            interval = float(FIXED_INTERVALS[level])
+        else:
+            interval = 0.0
+        return params['initial_ease'], interval, level
+
+    def initial_state(self, count, params):
+        return {
+            'ease': np.full(count, params['initial_ease'], dtype=np.float64),
+            'interval': np.zeros(count, dtype=np.float64),
+            'repetitions': np.zeros(count, dtype=np.int64)
+        }
+
+    def load_state(self, columns, params):
+        """从数据库列批量读取调度状态（与 load 相同，旧版学习计划按掌握度换算）"""
+        level = np.asarray(columns['mastery_level'], dtype=np.int64)
+        legacy = np.isnan(columns['ease_factor'])
+        converted = np.asarray([0.0] + FIXED_INTERVALS[1:] + [params['mastered_interval']])[np.clip(level, 0, 5)]
+        return {
+            'ease': np.where(legacy, params['initial_ease'], columns['ease_factor']),
+            'interval': np.where(legacy, converted, np.nan_to_num(columns['interval_days'])),
+            'repetitions': np.where(legacy, level, np.nan_to_num(columns['repetitions'])).astype(np.int64)
+        }
+
+    def step(self, state, rows, correct, params):
+        """应用一次复习，返回新的间隔（天，已掌握为 NaN）"""
+        quality = np.where(correct, params['correct_quality'], params['wrong_quality'])
+        ease = np.maximum(
+            state['ease'][rows] + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02),
+            params['min_ease']
+        )
+        passed = quality >= 3
+        repetitions = np.where(passed, state['repetitions'][rows] + 1, 0)
+        grown = np.minimum(state['interval'][rows] * ease * params['interval_modifier'], params['max_interval'])
+        interval = np.where(
+            repetitions == 2, params['second_interval'],
+            np.where(repetitions >= 3, grown, params['first_interval'])
+        )
+
+        state['ease'][rows] = ease
+        state['repetitions'][rows] = repetitions
+        state['interval'][rows] = interval
+        return np.where(interval >= params['mastered_interval'], np.nan, interval)
+
+    def finalize(self, state, params, last_correct):
+        repetitions, interval = state['repetitions'], state['interval']
+        level = np.clip((interval[:, None] >= np.asarray(MASTERY_THRESHOLDS)).sum(axis=1), 1, 4)
+        level = np.where(interval >= params['mastered_interval'], 5, level)
+        level = np.where(repetitions <= 0, 0, level)
+        mastered = level >= 5
+        return {
+            'mastery_level': level,
+            'is_mastered': mastered,
+            'interval': np.where(mastered, np.nan, interval),
+            'columns': {'ease_factor': state['ease'], 'interval_days': interval, 'repetitions': repetitions}
+        }
+
+
+SCHEDULERS = {
+    scheduler.name: scheduler for scheduler in (SM2Scheduler(), FixedIntervalScheduler())
+}
+
+
+class SchedulerService:
+    """复习调度服务类"""
+
+    def __init__(self, default_algorithm='sm2'):
+        self.default_algorithm = default_algorithm
+
+    def init_app(self, app):
+        """从应用配置初始化"""
+        self.default_algorithm = app.config.get('SCHEDULER_ALGORITHM', self.default_algorithm)
+        if self.default_algorithm not in SCHEDULERS:
+            print(f"[调度] 未知的调度算法 {self.default_algorithm}，使用 sm2")
+            self.default_algorithm = 'sm2'
+
+    # ---------- 参数 ----------
+
+    def params_for(self, user):
+        """用户的调度参数（未设置的项使用默认值）"""
+        params = dict(DEFAULT_PARAMS, algorithm=self.default_algorithm)
+        if user is not None and user.scheduler_params:
+            try:
+                params.update(json.loads(user.scheduler_params))
+            except ValueError:
+                pass
+        if params['algorithm'] not in SCHEDULERS:
+            params['algorithm'] = self.default_algorithm
+        return params
+
+    def update_params(self, user, changes):
+        """
+        校验并保存用户的调度参数（由调用方提交）
+
+        Raises:
+            ValueError: 参数名或取值不合法
+        """
+        if not isinstance(changes, dict):
+            raise ValueError('参数格式错误')
+
+        saved = json.loads(user.scheduler_params) if user.scheduler_params else {}
+        for key, value in changes.items():
+            if key == 'algorithm':
+                if value not in SCHEDULERS:
+                    raise ValueError(f"algorithm 只能是 {'/'.join(SCHEDULERS)}")
+            elif key in PARAM_RANGES:
+                low, high = PARAM_RANGES[key]
+                if isinstance(value, bool) or not isinstance(value, (int, float)) or not low <= value <= high:
+                    raise ValueError(f'{key} 的取值范围为 {low}-{high}')
+            else:
+                raise ValueError(f'未知参数: {key}')
+            saved[key] = value
+
+        user.scheduler_params = json.dumps(saved)
+        return self.params_for(user)
+
+    # ---------- 单次复习 ----------
+
+    def review(self, plan, is_correct, params=None, now=None, record=True):
+        """
+        按参数指定的算法更新一条学习计划（O(1)）
+
+        fuzz_factor 不为 0 时在原到期日附近挑选到期较少的一天（负载均衡），
+        每个用户的到期直方图在进程内首次使用时查询一次。
+
+        Args:
+            record: 是否把新的到期日记入负载均衡直方图（预览时为 False）
+        """
+        params = params or self.params_for(None)
+        now = now or datetime.utcnow()
+        previous = None if plan.is_mastered else plan.next_review
+        SCHEDULERS[params['algorithm']].review(plan, is_correct, now, params)
+        if params.get('fuzz_factor') and getattr(plan, 'user_id', None) is not None:
+            load_balancer.adjust(plan, previous, now, params['fuzz_factor'], record=record)
+        plan.review_count = (plan.review_count or 0) + 1
+        plan.last_review = now
+
+    def preview(self, plan, params=None, now=None):
+        """
+        答对、答错两种结果下学习计划的下一状态（不修改 plan），供客户端离线复习
+
+        Returns:
+            dict: {'correct': {...}, 'incorrect': {...}}，interval_days 为距 now 的天数（已掌握为 None）
+        """
+        now = now or datetime.utcnow()
+        outcomes = {}
+        for key, is_correct in (('correct', True), ('incorrect', False)):
+            state = SimpleNamespace(user_id=plan.user_id, **{column: getattr(plan, column) for column in STATE_COLUMNS})
+            self.review(state, is_correct, params, now, record=False)
+            outcomes[key] = {
+                'mastery_level': state.mastery_level,
+                'is_mastered': state.is_mastered,
+                'review_count': state.review_count,
+                'interval_days': (state.next_review - now).total_seconds() / 86400 if state.next_review else None,
+                'next_review': state.next_review.isoformat() if state.next_review else None
+            }
+        return outcomes
+
+    # ---------- 批量重放 ----------
+
+    @staticmethod
+    def replay(plan_index, correct, count, params):
+        """
+        用复习记录从初始状态重放 count 条学习计划的调度状态
+
+        Args:
+            plan_index: 每条复习记录所属学习计划的下标（int 数组，同一计划的记录按时间先后排列）
+            correct: 每条复习记录是否答对（bool 数组）
+            count: 学习计划数
+            params: 调度参数
+
+        Returns:
+            dict: mastery_level, is_mastered, interval（天，NaN 表示不再安排复习）,
+                  review_count, columns（算法自己的状态列）
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("numpy 库未安装，请运行: pip install numpy")
+
+        scheduler = SCHEDULERS[params['algorithm']]
+        plan_index = np.asarray(plan_index, dtype=np.int64)
+        correct = np.asarray(correct, dtype=bool)
+
+        # 每条记录是所属计划的第几次复习
+        review_count = np.bincount(plan_index, minlength=count)
+        starts = np.concatenate(([0], np.cumsum(review_count)[:-1]))
+        ordinal = np.arange(len(plan_index)) - starts[plan_index]
+
+        # 按"第几次复习"分轮：同一轮中每个计划最多出现一次，可以整体向量更新
+        order = np.argsort(ordinal, kind='stable')
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(ordinal))))
+
+        state = scheduler.initial_state(count, params)
+        for k in range(len(bounds) - 1):
+            events = order[bounds[k]:bounds[k + 1]]
+            scheduler.step(state, plan_index[events], correct[events], params)
+
+        last_correct = np.zeros(count, dtype=bool)
+        if len(plan_index):
+            last_correct[plan_index] = correct  # 同一计划的最后一条记录最后写入
+        result = scheduler.finalize(state, params, last_correct)
+        result['review_count'] = review_count
+        return result
+
+    def reschedule_user(self, user, params=None):
+        """
+        按用户全部复习记录重新计算所有学习计划（修改调度参数后调用），由调用方提交
+
+        没有复习记录的学习计划保持不变。
+
+        Returns:
+            int: 重新计算的学习计划数
+        """
+        from sqlalchemy import select, update
+        from app import db
+        from app.models import LearningPlan, ReviewLog
+        from app.services.sync_service import sync_service
+        from app.services.due_queue_service import due_queue_service
+        from app.services.vocabulary_service import vocabulary_service
+
+        if not NUMPY_AVAILABLE:
+            raise ImportError("numpy 库未安装，请运行: pip install numpy")
+
+        params = params or self.params_for(user)
+
+        plans = db.session.execute(
+            select(LearningPlan.id, LearningPlan.word_id)
+            .where(LearningPlan.user_id == user.id)
+            .order_by(LearningPlan.word_id)
+        ).all()
+        if not plans:
+            return 0
+        plan_ids = np.fromiter((row[0] for row in plans), dtype=np.int64, count=len(plans))
+        plan_words = np.fromiter((row[1] for row in plans), dtype=np.int64, count=len(plans))
+
+        reviews = db.session.execute(
+            select(ReviewLog.word_id, ReviewLog.is_correct, ReviewLog.review_time)
+            .where(ReviewLog.user_id == user.id)
+            .order_by(ReviewLog.word_id, ReviewLog.review_time, ReviewLog.id)
+            .execution_options(yield_per=10000)
+        )
+        word_ids, correct, times = [], [], []
+        for word_id, is_correct, review_time in reviews:
+            word_ids.append(word_id)
+            correct.append(bool(is_correct))
+            times.append(review_time)
+        if not word_ids:
+            return 0
+
+        # 复习记录 -> 学习计划下标（两边都按 word_id 排序），丢弃没有学习计划的记录
+        word_ids = np.asarray(word_ids, dtype=np.int64)
+        plan_index = np.minimum(np.searchsorted(plan_words, word_ids), len(plan_words) - 1)
+        keep = plan_words[plan_index] == word_ids
+        plan_index = plan_index[keep]
+        correct = np.asarray(correct, dtype=bool)[keep]
+        times = np.asarray(times, dtype='datetime64[us]')[keep]
+
+        result = self.replay(plan_index, correct, len(plans), params)
+
+        last_review = np.full(len(plans), np.datetime64('NaT'), dtype='datetime64[us]')
+        last_review[plan_index] = times
+        interval_us = np.round(np.nan_to_num(result['interval']) * 86400e6).astype('timedelta64[us]')
+        next_review = np.where(np.isnan(result['interval']), np.datetime64('NaT'), last_review + interval_us)
+
+        reviewed = np.flatnonzero(result['review_count'] > 0)
+        columns = {name: values[reviewed].tolist() for name, values in result['columns'].items()}
+        values = {
+            'id': plan_ids[reviewed].tolist(),
+            'mastery_level': result['mastery_level'][reviewed].tolist(),
+            'is_mastered': result['is_mastered'][reviewed].tolist(),
+            'review_count': result['review_count'][reviewed].tolist(),
+            'last_review': last_review[reviewed].tolist(),
+            'next_review': next_review[reviewed].tolist(),
+            **columns
+        }
+        names = list(values)
+        rows = [dict(zip(names, row)) for row in zip(*values.values())]
+
+        # 按主键批量更新（不经过 flush，变更日志、单词本掌握度和数据版本在这里一并维护）
+        now = datetime.utcnow()
+        for row in rows:
+            row['updated_at'] = now
+        db.session.execute(update(LearningPlan), rows)
+
+        levels = dict(zip(plan_words[reviewed].tolist(), values['mastery_level']))
+        vocabulary_service.sync_mastery_many(user.id, levels)
+        sync_service.record_changes(db.session.connection(), user.id, 'learning_plan', values['id'])
+        # 重排后可能有计划提前到期，下次查询时重新计算水位和负载均衡直方图
+        due_queue_service.invalidate(user.id)
+        load_balancer.invalidate(user.id)
+        return len(rows)
+
+
+# 创建全局调度服务实例
+scheduler_service = SchedulerService()
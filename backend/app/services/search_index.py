@@ -0,0 +1,108 @@
+"""
+单词搜索索引
+
+words.word 上的普通 B-tree 索引无法加速 LIKE '%kw%' 子串搜索，这里按数据库建立专门的索引：
+- SQLite：FTS5 trigram 虚拟表 words_fts（外部内容表指向 words），由触发器在 Word 插入/更新/删除时自动维护
+- PostgreSQL：pg_trgm 扩展 + words.word 上的 GIN trigram 索引，LIKE '%kw%' 直接走索引
+其他数据库或创建失败时退化为普通 LIKE 扫描。
+"""
+from sqlalchemy import case, column, select, table, text
+from app import db
+
+# trigram 索引至少需要 3 个字符
+MIN_TRIGRAM_LENGTH = 3
+
+words_fts = table('words_fts', column('rowid'), column('word'))
+
+
+class SearchIndex:
+    """单词搜索索引类"""
+
+    def __init__(self):
+        self.backend = None  # 'fts5' / 'pg_trgm' / None
+
+    def init_app(self, app):
+        """创建（或补建）搜索索引，需在应用上下文中调用"""
+        dialect = db.engine.dialect.name
+        try:
+            if dialect == 'sqlite':
+                self._init_sqlite()
+                self.backend = 'fts5'
+            elif dialect == 'postgresql':
+                self._init_postgresql()
+                self.backend = 'pg_trgm'
+        except Exception as e:
+            print(f"[搜索索引] 创建失败，退化为 LIKE 扫描: {str(e)}")
+            self.backend = None
+
+        if self.backend:
+            print(f"[搜索索引] 已启用 {self.backend}")
+
+    def _init_sqlite(self):
+        with db.engine.begin() as conn:
+            exists = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'words_fts'"
+            )).first()
+
+            if not exists:
+                conn.execute(text(
+                    "CREATE VIRTUAL TABLE words_fts USING fts5("
+                    "word, content='words', content_rowid='id', tokenize='trigram')"
+                ))
+                # 为已有单词建立索引
+                conn.execute(text("INSERT INTO words_fts(words_fts) VALUES ('rebuild')"))
+
+            conn.execute(text(
+                "CREATE TRIGGER IF NOT EXISTS words_fts_ai AFTER INSERT ON words BEGIN "
+                "INSERT INTO words_fts(rowid, word) VALUES (new.id, new.word); END"
+            ))
+            conn.execute(text(
+                "CREATE TRIGGER IF NOT EXISTS words_fts_ad AFTER DELETE ON words BEGIN "
+                "INSERT INTO words_fts(words_fts, rowid, word) VALUES ('delete', old.id, old.word); END"
+            ))
+            conn.execute(text(
+                "CREATE TRIGGER IF NOT EXISTS words_fts_au AFTER UPDATE OF word ON words BEGIN "
+                "INSERT INTO words_fts(words_fts, rowid, word) VALUES ('delete', old.id, old.word); "
+                "INSERT INTO words_fts(rowid, word) VALUES (new.id, new.word); END"
+            ))
+
+    def _init_postgresql(self):
+        with db.engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_words_word_trgm ON words USING gin (word gin_trgm_ops)"
+            ))
+
+    @staticmethod
+    def normalize_keyword(keyword):
+        """规范化关键词（去空白、转小写；% 和 _ 按普通字符搜索，由 match/prefix_rank 转义）"""
+        return keyword.strip().lower()
+
+    def match(self, word_model, keyword):
+        """
+        单词包含关键词的过滤条件（关键词中的 % 和 _ 按字面匹配）
+
+        Args:
+            word_model: Word 模型
+            keyword: 已规范化的关键词
+        """
+        if self.backend == 'fts5' and len(keyword) >= MIN_TRIGRAM_LENGTH:
+            # trigram 表上带 ESCAPE 的 LIKE 不走索引，改用短语 MATCH（同样是子串匹配，没有通配符）
+            phrase = '"' + keyword.replace('"', '""') + '"'
+            return word_model.id.in_(
+                select(words_fts.c.rowid).where(words_fts.c.word.op('MATCH')(phrase))
+            )
+        return word_model.word.like(f'%{self._escape_like(keyword)}%', escape='\\')
+
+    def prefix_rank(self, word_model, keyword):
+        """排序表达式：以关键词开头的单词为 1，其余为 0"""
+        return case((word_model.word.like(f'{self._escape_like(keyword)}%', escape='\\'), 1), else_=0)
+
+    @staticmethod
+    def _escape_like(keyword):
+        """转义 LIKE 通配符"""
+        return keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+# 创建全局搜索索引实例
+search_index = SearchIndex()
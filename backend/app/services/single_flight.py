@@ -0,0 +1,215 @@
+"""
+单飞（single-flight）服务 - 合并对同一个键的并发调用
+
+同一进程内：后到的线程等待领头线程的结果
+跨进程：通过共享 SQLite 文件中的锁表选出领头进程，其余进程轮询共享结果（如词典缓存）
+"""
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class _Call:
+    """一次进行中的调用"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """单飞调用合并器"""
+
+    def __init__(self, path=None, lease=75, poll_interval=0.05):
+        """
+        Args:
+            path: 跨进程锁表所在的 SQLite 文件，为空时只在进程内合并
+            lease: 锁租约（秒），领头进程崩溃后租约过期即可被接管
+            poll_interval: 跨进程等待时的轮询间隔（秒）
+        """
+        self.path = path
+        self.lease = lease
+        self.poll_interval = poll_interval
+
+        self._owner = uuid.uuid4().hex
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        self._stats = {'leaders': 0, 'followers': 0, 'remote_waits': 0}
+
+    def init_app(self, app):
+        """从应用配置初始化"""
+        self.path = app.config.get('SINGLE_FLIGHT_PATH') or app.config.get('DICT_CACHE_PATH', self.path)
+        self.lease = app.config.get('SINGLE_FLIGHT_LEASE', self.lease)
+
+        if self.path:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = self._connect()
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS single_flight_locks ('
+                ' key TEXT PRIMARY KEY,'
+                ' owner TEXT NOT NULL,'
+                ' expires_at REAL NOT NULL)'
+            )
+            conn.commit()
+
+    def do(self, key, fn, lookup=None):
+        """
+        执行 fn，同一时刻每个 key 只有一个调用真正执行
+
+        Args:
+            key: 合并键（如规范化后的单词）
+            fn: 真正的调用，无参数
+            lookup: 跨进程等待时用于读取共享结果的函数，返回 None 表示尚无结果
+
+        Returns:
+            fn 的返回值（或领头调用的返回值）
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self._stats['followers'] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._stats['leaders'] += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run_exclusive(key, fn, lookup)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def stats(self):
+        """返回合并统计"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+        return stats
+
+    # ---------- 跨进程锁 ----------
+
+    def _run_exclusive(self, key, fn, lookup):
+        """持有跨进程锁执行 fn；锁被其他进程持有时等待其结果"""
+        deadline = time.time() + self.lease
+
+        while True:
+            if self._acquire(key):
+                try:
+                    # 拿到锁后再查一次，其他进程可能刚刚完成
+                    if lookup is not None:
+                        result = lookup()
+                        if result is not None:
+                            return result
+                    return fn()
+                finally:
+                    self._release(key)
+
+            with self._lock:
+                self._stats['remote_waits'] += 1
+
+            while self._is_locked(key) and time.time() < deadline:
+                if lookup is not None:
+                    result = lookup()
+                    if result is not None:
+                        return result
+                time.sleep(self.poll_interval)
+
+            if lookup is not None:
+                result = lookup()
+                if result is not None:
+                    return result
+
+            if time.time() >= deadline:
+                # 等待超时，直接执行，避免请求被无限阻塞
+                return fn()
+
+    def _owner_id(self):
+        # 包含 pid，避免 fork 出的 worker 共用同一个 owner
+        return f'{os.getpid()}:{self._owner}'
+
+    def _connect(self):
+        if not self.path:
+            return None
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def _acquire(self, key):
+        conn = self._connect()
+        if conn is None:
+            return True
+
+        now = time.time()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(
+                'DELETE FROM single_flight_locks WHERE key = ? AND expires_at < ?',
+                (key, now)
+            )
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO single_flight_locks (key, owner, expires_at) VALUES (?, ?, ?)',
+                (key, self._owner_id(), now + self.lease)
+            )
+            conn.execute('COMMIT')
+            return cursor.rowcount == 1
+        except sqlite3.Error as e:
+            print(f"[单飞] 获取锁失败，退化为进程内合并: {str(e)}")
+            try:
+                conn.execute('ROLLBACK')
+            except sqlite3.Error:
+                pass
+            return True
+
+    def _release(self, key):
+        conn = self._connect()
+        if conn is None:
+            return
+
+        try:
+            conn.execute(
+                'DELETE FROM single_flight_locks WHERE key = ? AND owner = ?',
+                (key, self._owner_id())
+            )
+        except sqlite3.Error as e:
+            print(f"[单飞] 释放锁失败: {str(e)}")
+
+    def _is_locked(self, key):
+        conn = self._connect()
+        if conn is None:
+            return False
+
+        try:
+            row = conn.execute(
+                'SELECT expires_at FROM single_flight_locks WHERE key = ?',
+                (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            return False
+        return row is not None and row[0] >= time.time()
+
+
+# 创建全局单飞实例
+single_flight = SingleFlight()
@@ -0,0 +1,179 @@
+"""
+单词本快照服务 - 新设备登录时一次下载整个单词本
+
+快照为 MessagePack 编码的列式结构（每个字段一个数组，剧集名放在字符串表中按下标引用），
+由一条流式查询生成，按 (用户, 数据版本) 缓存在进程内，单词本未变化时重复下载不再查询数据库。
+快照中带有变更日志序号 cursor，客户端之后用 GET /api/sync?since=<cursor> 增量同步。
+
+格式（version 1）：
+{
+    'version': 1,
+    'cursor': int,
+    'count': int,
+    'strings': [剧集名...],
+    'words': {
+        'id', 'word', 'phonetic', 'translation', 'definition',
+        'examples',  # 数据库中保存的 JSON 字符串，原样下发，客户端需要时再解析
+        'enrichment', 'query_count', 'mastery_level',
+        'first_query', 'last_query',  # UTC 秒级时间戳
+        'tv_shows'  # 每个单词一个 strings 下标数组
+    },
+    'plans': {
+        'review_count', 'last_review', 'next_review', 'is_mastered'  # 与 words 按下标对齐，无学习计划为 null
+    }
+}
+"""
+import json
+import threading
+from collections import OrderedDict
+from datetime import timezone
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+SNAPSHOT_VERSION = 1
+
+SNAPSHOT_MIMETYPE = 'application/x-msgpack'
+
+
+def _timestamp(value):
+    """datetime（UTC，无时区）-> 秒级时间戳"""
+    return int(value.replace(tzinfo=timezone.utc).timestamp()) if value else None
+
+
+class SnapshotService:
+    """单词本快照服务类"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            max_bytes: 进程内快照缓存的总大小上限
+        """
+        self.max_bytes = max_bytes
+        self._cache = OrderedDict()  # (user_id, data_version) -> bytes
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """从应用配置初始化"""
+        self.max_bytes = app.config.get('SNAPSHOT_CACHE_MAX_BYTES', self.max_bytes)
+
+    def get_snapshot(self, user):
+        """
+        返回用户单词本快照（命中缓存时不查询数据库）
+
+        Args:
+            user: User 模型实例
+
+        Returns:
+            bytes: MessagePack 编码的快照
+        """
+        if not MSGPACK_AVAILABLE:
+            raise ImportError("msgpack 库未安装，请运行: pip install msgpack")
+
+        key = (user.id, user.data_version or 0)
+        with self._lock:
+            payload = self._cache.get(key)
+            if payload is not None:
+                self._cache.move_to_end(key)
+                return payload
+
+        payload = msgpack.packb(self.build(user.id), use_bin_type=True)
+        self._store(key, payload)
+        return payload
+
+    @staticmethod
+    def build(user_id):
+        """
+        用一条流式查询生成快照结构
+
+        Returns:
+            dict: 快照（见模块说明）
+        """
+        from sqlalchemy import and_, desc, func
+        from app import db
+        from app.models import Word, UserWord, LearningPlan, ChangeLog
+
+        # 先取变更序号：之后发生的变化一定会在增量同步中再次下发
+        cursor = db.session.query(func.max(ChangeLog.seq)).filter(ChangeLog.user_id == user_id).scalar() or 0
+
+        query = db.session.query(
+            Word.id, Word.word, Word.phonetic, Word.translation, Word.definition,
+            Word.examples, Word.enrichment_status,
+            UserWord.query_count, UserWord.mastery_level, UserWord.first_query_time,
+            UserWord.last_query_time, UserWord.tv_shows,
+            LearningPlan.review_count, LearningPlan.last_review, LearningPlan.next_review,
+            LearningPlan.is_mastered
+        ).join(
+            Word, Word.id == UserWord.word_id
+        ).outerjoin(
+            LearningPlan, and_(LearningPlan.user_id == UserWord.user_id, LearningPlan.word_id == UserWord.word_id)
+        ).filter(
+            UserWord.user_id == user_id
+        ).order_by(desc(UserWord.last_query_time), desc(UserWord.word_id))
+
+        word_fields = ['id', 'word', 'phonetic', 'translation', 'definition', 'examples', 'enrichment',
+                       'query_count', 'mastery_level', 'first_query', 'last_query', 'tv_shows']
+        plan_fields = ['review_count', 'last_review', 'next_review', 'is_mastered']
+        words = {field: [] for field in word_fields}
+        plans = {field: [] for field in plan_fields}
+        strings, string_index = [], {}
+
+        for row in query.yield_per(1000):
+            words['id'].append(row.id)
+            words['word'].append(row.word)
+            words['phonetic'].append(row.phonetic)
+            words['translation'].append(row.translation)
+            words['definition'].append(row.definition)
+            words['examples'].append(row.examples)
+            words['enrichment'].append(row.enrichment_status)
+            words['query_count'].append(row.query_count)
+            words['mastery_level'].append(row.mastery_level)
+            words['first_query'].append(_timestamp(row.first_query_time))
+            words['last_query'].append(_timestamp(row.last_query_time))
+
+            shows = []
+            for show in (json.loads(row.tv_shows) if row.tv_shows else []):
+                if show not in string_index:
+                    string_index[show] = len(strings)
+                    strings.append(show)
+                shows.append(string_index[show])
+            words['tv_shows'].append(shows)
+
+            plans['review_count'].append(row.review_count)
+            plans['last_review'].append(_timestamp(row.last_review))
+            plans['next_review'].append(_timestamp(row.next_review))
+            plans['is_mastered'].append(row.is_mastered)
+
+        return {
+            'version': SNAPSHOT_VERSION,
+            'cursor': cursor,
+            'count': len(words['id']),
+            'strings': strings,
+            'words': words,
+            'plans': plans
+        }
+
+    def _store(self, key, payload):
+        """放入缓存，超出大小上限时淘汰最久未使用的快照（同一用户的旧版本快照直接删除）"""
+        if len(payload) > self.max_bytes:
+            return
+
+        with self._lock:
+            for old_key in [k for k in self._cache if k[0] == key[0] and k != key]:
+                self._cache_bytes -= len(self._cache.pop(old_key))
+            if key in self._cache:
+                return
+
+            self._cache[key] = payload
+            self._cache_bytes += len(payload)
+            while self._cache_bytes > self.max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+
+
+# 创建全局快照服务实例
+snapshot_service = SnapshotService()
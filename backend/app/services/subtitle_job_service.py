@@ -0,0 +1,141 @@
+"""
+字幕导入任务服务 - 在后台线程中导入字幕生词
+
+冷缓存时一个字幕文件的上千个生词都要请求上游，放在请求里会超过 gunicorn 的 worker 超时，
+因此生词较多的文件交给后台线程池导入，请求立即返回任务信息，前端轮询任务状态。
+任务状态保存在任务目录的 <job_id>.json 中，所有 gunicorn worker 都能查询。
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SubtitleJobService:
+    """字幕导入任务服务类"""
+
+    def __init__(self):
+        self.app = None
+        self.job_dir = None
+        self.job_timeout = 1800
+        self.retention = 86400
+        self._executor = None
+
+    def init_app(self, app):
+        """从应用配置初始化任务目录和线程池"""
+        self.app = app
+        self.job_dir = app.config.get('SUBTITLE_JOB_DIR', self.job_dir)
+        self.job_timeout = app.config.get('SUBTITLE_JOB_TIMEOUT', self.job_timeout)
+
+        if self.job_dir:
+            os.makedirs(self.job_dir, exist_ok=True)
+            self._executor = ThreadPoolExecutor(
+                max_workers=app.config.get('SUBTITLE_WORKERS', 1),
+                thread_name_prefix='subtitle'
+            )
+
+    @property
+    def enabled(self):
+        """是否配置了任务目录（后台导入依赖任务目录）"""
+        return bool(self.job_dir)
+
+    # ---------- 对外接口 ----------
+
+    def submit(self, user_id, words, **options):
+        """
+        提交后台导入任务
+
+        Args:
+            user_id: 用户ID
+            words: 已提取的生词列表
+            options: 传给 vocabulary_service.ingest_words 的其余参数
+
+        Returns:
+            dict: 任务信息（见 get_job）
+        """
+        self._purge()
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'user_id': user_id,
+            'status': 'pending',
+            'words': len(words),
+            'summary': None,
+            'error': None,
+            'created_at': time.time(),
+            'finished_at': None
+        }
+        self._write_job(job)
+        self._executor.submit(self._run, job['job_id'], list(words), options)
+        return job
+
+    def get_job(self, job_id, user_id):
+        """
+        读取任务信息（只能读取自己的任务）
+
+        Returns:
+            dict 或 None
+        """
+        job = self._read_job(job_id)
+        if not job or job['user_id'] != user_id:
+            return None
+
+        # 任务所在的进程已退出，标记为失败
+        if job['status'] == 'pending' and time.time() - job['created_at'] > self.job_timeout:
+            job['status'] = 'failed'
+            job['error'] = '导入超时'
+        return job
+
+    # ---------- 内部实现 ----------
+
+    def _run(self, job_id, words, options):
+        """后台任务：导入生词（分批提交，中途失败时已导入的批次保留）"""
+        from app import db
+        from app.services.vocabulary_service import vocabulary_service
+
+        with self.app.app_context():
+            job = self._read_job(job_id)
+            if not job:
+                return
+            try:
+                summary = vocabulary_service.ingest_words(job['user_id'], words, **options)
+                job.update(status='done', summary=summary, finished_at=time.time())
+                print(f"[字幕导入] 任务 {job_id} 完成，导入 {summary['succeeded']} 个单词")
+            except Exception as e:
+                db.session.rollback()
+                job.update(status='failed', error=str(e), finished_at=time.time())
+                print(f"[字幕导入] 后台任务异常: {str(e)}")
+            finally:
+                db.session.remove()
+            self._write_job(job)
+
+    def _read_job(self, job_id):
+        if not self.job_dir or not all(c in '0123456789abcdef' for c in job_id):
+            return None
+        try:
+            with open(os.path.join(self.job_dir, f'{job_id}.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_job(self, job):
+        path = os.path.join(self.job_dir, f"{job['job_id']}.json")
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _purge(self):
+        """删除超过保留时间的任务文件"""
+        cutoff = time.time() - self.retention
+        for entry in os.scandir(self.job_dir):
+            try:
+                if entry.is_file() and entry.name.endswith('.json') and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+# 创建全局字幕导入任务实例
+subtitle_job_service = SubtitleJobService()
@@ -0,0 +1,104 @@
+"""
+字幕服务 - 流式解析 SRT/VTT 字幕文件并提取生词
+
+所有解析步骤都是生成器，逐行读取上传的文件流，不会把整个字幕文件读入内存。
+"""
+import io
+import re
+
+# 时间轴行：00:01:02,500 --> 00:01:04,000 或 00:01.000 --> 00:04.000
+TIMING_PATTERN = re.compile(r'-->')
+# HTML 标签（<i>、<b>、<c.color>、<00:01:02.000>）和 ASS 样式（{\an8}）
+TAG_PATTERN = re.compile(r'<[^>]*>|\{[^}]*\}')
+WORD_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+# 过于常见、不值得查询的单词
+STOP_WORDS = frozenset("""
+a an the and or but if so of to in on at by for with from up out off over into onto as is am are was were be been
+being do does did done have has had having i me my mine you your yours he him his she her hers it its we us our ours
+they them their theirs this that these those there here what which who whom whose when where why how not no yes
+all any some can could will would shall should may might must just than then too very also only own same such
+oh uh um hmm yeah okay ok hey hi gonna wanna gotta let let's i'm i'll i've i'd you're you'll you've you'd he's
+she's it's we're we'll we've they're they'll they've that's there's what's don't doesn't didn't can't won't
+isn't aren't wasn't weren't haven't hasn't wouldn't couldn't shouldn't
+""".split())
+
+SUPPORTED_EXTENSIONS = ('.srt', '.vtt')
+
+
+class SubtitleService:
+    """字幕解析服务类"""
+
+    def __init__(self, min_length=3):
+        """
+        Args:
+            min_length: 提取单词的最小长度
+        """
+        self.min_length = min_length
+
+    @staticmethod
+    def is_supported(filename):
+        """是否为支持的字幕格式"""
+        return bool(filename) and filename.lower().endswith(SUPPORTED_EXTENSIONS)
+
+    def iter_lines(self, stream):
+        """
+        逐行读取上传的字幕文件（自动处理 BOM 和非法编码）
+
+        Args:
+            stream: 二进制文件流（如 werkzeug FileStorage.stream）
+        """
+        text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace', newline=None)
+        try:
+            for line in text_stream:
+                yield line.rstrip('\n')
+        finally:
+            # 防止 TextIOWrapper 被回收时关闭底层上传流
+            text_stream.detach()
+
+    def iter_cue_text(self, lines):
+        """
+        从 SRT/VTT 行中只保留字幕文本行
+
+        字幕文本总是位于时间轴行之后、空行之前；序号行、WEBVTT 头以及
+        NOTE/STYLE/REGION 块都没有时间轴，因此会被自然跳过
+        """
+        in_cue = False
+        for line in lines:
+            stripped = line.strip()
+
+            if not stripped:
+                in_cue = False
+                continue
+            if TIMING_PATTERN.search(stripped):
+                in_cue = True
+                continue
+            if in_cue:
+                yield TAG_PATTERN.sub(' ', stripped)
+
+    def iter_words(self, text_lines):
+        """
+        分词、规范化并去重
+
+        Yields:
+            首次出现的单词（小写）
+        """
+        seen = set()
+        for text in text_lines:
+            for token in WORD_PATTERN.findall(text.lower().replace('’', "'")):
+                if token.endswith("'s"):
+                    token = token[:-2]
+                if len(token) < self.min_length or token in STOP_WORDS or "'" in token:
+                    continue
+                if token in seen:
+                    continue
+                seen.add(token)
+                yield token
+
+    def extract_words(self, stream):
+        """从字幕文件流中提取去重后的单词（生成器）"""
+        return self.iter_words(self.iter_cue_text(self.iter_lines(stream)))
+
+
+# 创建全局字幕服务实例
+subtitle_service = SubtitleService()
@@ -0,0 +1,243 @@
+"""
+增量同步服务
+
+在每次 flush 之后，把当前用户的 LearningPlan / QueryLog / ReviewLog 变化写入变更日志 change_log；
+Word 是全局共享的，被修改时为单词本中有该单词的每个用户各记一条。
+写入前先删除同一实体的旧记录（压缩），客户端按序号拉取时拿到的总是实体的最新状态。
+序号按用户分配（users.change_seq，见 ChangeLog），与提交顺序一致。
+"""
+from datetime import datetime
+from sqlalchemy import event, func, insert, literal, select, update
+from app import db
+from app.models import User, Word, LearningPlan, QueryLog, ReviewLog, UserWord, ChangeLog
+
+# 需要同步的模型 -> 实体名（均带 user_id）
+USER_ENTITIES = {
+    LearningPlan: 'learning_plan',
+    QueryLog: 'query_log',
+    ReviewLog: 'review_log'
+}
+
+ENTITY_MODELS = {
+    'word': Word,
+    'learning_plan': LearningPlan,
+    'query_log': QueryLog,
+    'review_log': ReviewLog
+}
+
+
+class SyncService:
+    """增量同步服务类"""
+
+    def init_app(self, app):
+        """注册 flush 监听（对所有会话生效）"""
+        if not event.contains(db.session, 'after_flush', self._after_flush):
+            event.listen(db.session, 'after_flush', self._after_flush)
+
+    # ---------- 记录变更 ----------
+
+    def _after_flush(self, session, flush_context):
+        """收集本次 flush 中新增、修改、删除的对象并写入变更日志（与业务写操作在同一事务中）"""
+        changes = {}  # (user_id, entity, op) -> [entity_id]
+        words = {}  # word_id -> op
+
+        def collect(objects, op):
+            for obj in objects:
+                if isinstance(obj, Word):
+                    if obj.id is not None and (op != 'upsert' or obj not in session.new):
+                        words[obj.id] = op
+                    continue
+                entity = USER_ENTITIES.get(type(obj))
+                if entity and obj.id is not None and obj.user_id is not None:
+                    changes.setdefault((obj.user_id, entity, op), []).append(obj.id)
+
+        collect(session.new, 'upsert')
+        collect([obj for obj in session.dirty if session.is_modified(obj, include_collections=False)], 'upsert')
+        collect(session.deleted, 'delete')
+
+        if not changes and not words:
+            return
+
+        connection = session.connection()
+        now = datetime.utcnow()
+        table = ChangeLog.__table__
+
+        for (user_id, entity, op), entity_ids in changes.items():
+            self.record_changes(connection, user_id, entity, entity_ids, op, now)
+
+        # 新单词不需要单独记录：客户端通过学习计划/查询记录里的 word_id 一并拿到单词
+        for word_id, op in words.items():
+            holders = select(UserWord.user_id).where(UserWord.word_id == word_id)
+            connection.execute(table.delete().where(
+                table.c.entity == 'word',
+                table.c.entity_id == word_id,
+                table.c.user_id.in_(holders)
+            ))
+            # 每个持有者各分配一个序号
+            users = User.__table__
+            allocated = connection.execute(
+                update(users).where(users.c.id.in_(holders))
+                .values(change_seq=users.c.change_seq + 1)
+                .returning(users.c.id, users.c.change_seq)
+            ).all()
+            if allocated:
+                connection.execute(insert(table), [
+                    {'user_id': user_id, 'seq': seq, 'entity': 'word', 'entity_id': word_id, 'op': op, 'created_at': now}
+                    for user_id, seq in allocated
+                ])
+
+    @staticmethod
+    def record_changes(connection, user_id, entity, entity_ids, op='upsert', now=None):
+        """
+        记录一批实体变更（先删除同一实体的旧记录）
+
+        不经过 flush 的批量写操作（如按主键批量 UPDATE）需要调用方显式记录。
+        """
+        table = ChangeLog.__table__
+        users = User.__table__
+        now = now or datetime.utcnow()
+        for start in range(0, len(entity_ids), 500):
+            chunk = entity_ids[start:start + 500]
+            connection.execute(table.delete().where(
+                table.c.user_id == user_id,
+                table.c.entity == entity,
+                table.c.entity_id.in_(chunk)
+            ))
+            # 分配序号并锁住用户行到事务提交，之后的事务只能拿到更大的序号且在本事务之后提交
+            last = connection.execute(
+                update(users).where(users.c.id == user_id)
+                .values(change_seq=users.c.change_seq + len(chunk))
+                .returning(users.c.change_seq)
+            ).scalar()
+            first = last - len(chunk) + 1
+            connection.execute(insert(table), [
+                {'user_id': user_id, 'seq': first + index, 'entity': entity, 'entity_id': entity_id,
+                 'op': op, 'created_at': now}
+                for index, entity_id in enumerate(chunk)
+            ])
+
+    # ---------- 读取变更 ----------
+
+    @staticmethod
+    def changes_since(user_id, since=0, limit=500):
+        """
+        读取序号 since 之后的变更
+
+        Args:
+            user_id: 用户ID
+            since: 客户端上次同步到的序号（首次同步传 0）
+            limit: 最多返回的变更条数
+
+        Returns:
+            dict: {cursor, has_more, words, learning_plans, query_logs, review_logs, deleted}
+        """
+        rows = ChangeLog.query.filter(
+            ChangeLog.user_id == user_id,
+            ChangeLog.seq > since
+        ).order_by(ChangeLog.seq).limit(limit + 1).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        upserts = {entity: set() for entity in ENTITY_MODELS}
+        deleted = {entity: set() for entity in ENTITY_MODELS}
+        for row in rows:
+            (deleted if row.op == 'delete' else upserts)[row.entity].add(row.entity_id)
+
+        # 每种实体一次 IN 查询；不属于当前用户或已不存在的按删除处理
+        loaded = {}
+        for entity, model in ENTITY_MODELS.items():
+            if entity == 'word' or not upserts[entity]:
+                loaded[entity] = []
+                continue
+            loaded[entity] = model.query.filter(
+                model.id.in_(upserts[entity]),
+                model.user_id == user_id
+            ).all()
+            deleted[entity] |= upserts[entity] - {obj.id for obj in loaded[entity]}
+
+        # 单词：显式变化的单词 + 学习计划和记录引用到的单词
+        word_ids = set(upserts['word'])
+        for entity in USER_ENTITIES.values():
+            word_ids.update(obj.word_id for obj in loaded[entity])
+
+        words, query_counts = [], {}
+        if word_ids:
+            words = Word.query.filter(Word.id.in_(word_ids)).all()
+            query_counts = {
+                user_word.word_id: user_word.query_count for user_word in UserWord.query.filter(
+                    UserWord.user_id == user_id,
+                    UserWord.word_id.in_(word_ids)
+                )
+            }
+            deleted['word'] |= upserts['word'] - {word.id for word in words}
+
+        return {
+            'cursor': rows[-1].seq if rows else since,
+            'has_more': has_more,
+            'words': [word.to_dict(query_count=query_counts.get(word.id, 0)) for word in words],
+            'learning_plans': [plan.to_dict() for plan in loaded['learning_plan']],
+            'query_logs': [log.to_dict() for log in loaded['query_log']],
+            'review_logs': [log.to_dict() for log in loaded['review_log']],
+            'deleted': {entity: sorted(ids) for entity, ids in deleted.items() if ids}
+        }
+
+    # ---------- 回填 ----------
+
+    def backfill_if_needed(self):
+        """
+        升级后首次启动时：变更日志为空但已有学习数据时，把已有数据记为变更；
+        为没有用户内序号的旧记录回填序号
+        """
+        count = self._backfill_changes()
+        self._backfill_sequences()
+        return count
+
+    @staticmethod
+    def _backfill_changes():
+        if ChangeLog.query.first() is not None or LearningPlan.query.first() is None:
+            return 0
+
+        table = ChangeLog.__table__
+        now = datetime.utcnow()
+        count = 0
+        try:
+            for model, entity in USER_ENTITIES.items():
+                result = db.session.execute(insert(table).from_select(
+                    ['user_id', 'entity', 'entity_id', 'op', 'created_at'],
+                    select(model.user_id, literal(entity), model.id, literal('upsert'), literal(now))
+                    .order_by(model.id)
+                ))
+                count += result.rowcount or 0
+            db.session.commit()
+            print(f"[同步] 已为已有数据回填 {count} 条变更记录")
+        except Exception as e:
+            db.session.rollback()
+            print(f"[同步] 回填变更记录失败: {str(e)}")
+        return count
+
+    @staticmethod
+    def _backfill_sequences():
+        """
+        旧记录的序号取全局 id（按用户看同样递增，客户端已保存的 cursor 仍然有效），
+        用户的 change_seq 设为其中的最大值，之后分配的序号接在后面
+        """
+        if ChangeLog.query.filter(ChangeLog.seq.is_(None)).first() is None:
+            return
+        table = ChangeLog.__table__
+        users = User.__table__
+        try:
+            db.session.execute(update(table).where(table.c.seq.is_(None)).values(seq=table.c.id))
+            latest = select(func.max(table.c.seq)).where(table.c.user_id == users.c.id).scalar_subquery()
+            db.session.execute(
+                update(users).where(users.c.change_seq < func.coalesce(latest, 0)).values(change_seq=latest)
+            )
+            db.session.commit()
+            print("[同步] 已为旧变更记录回填用户内序号")
+        except Exception as e:
+            db.session.rollback()
+            print(f"[同步] 回填变更序号失败: {str(e)}")
+
+
+# 创建全局同步服务实例
+sync_service = SyncService()
@@ -1,13 +1,12 @@
 """翻译服务"""
-import requests
 import hashlib
 import time
 import uuid
-import urllib3
 from flask import current_app
-
-# 禁用 SSL 警告
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from app.services.http_client import http_client
+from app.services.dictionary_cache import dictionary_cache
+from app.services.single_flight import single_flight
+from app.services.local_dictionary import local_dictionary
 
 
 class TranslationService:
@@ -22,6 +21,27 @@ class TranslationService:
         :param word: 要翻译的单词
         :return: 翻译结果字典
         """
+        # 先查本地离线词典（内存映射，微秒级），命中则不消耗上游配额
+        local_result = local_dictionary.lookup(word)
+        if local_result is not None:
+            print(f"[翻译服务] 本地词典命中: {word}")
+            return local_result
+
+        # 再查词典缓存，命中则不再请求有道/AI
+        cached = dictionary_cache.get(word)
+        if cached is not None:
+            print(f"[翻译服务] 缓存命中: {word}")
+            return cached
+
+        # 同一个单词的并发查询只请求一次上游，其余请求等待领头请求的结果
+        return single_flight.do(
+            word,
+            lambda: self._translate_uncached(word),
+            lookup=lambda: dictionary_cache.get(word)
+        )
+
+    def _translate_uncached(self, word):
+        """缓存未命中时请求上游翻译"""
         # 尝试使用有道翻译API
         app_key = current_app.config.get('YOUDAO_APP_KEY')
         app_secret = current_app.config.get('YOUDAO_APP_SECRET')
@@ -40,16 +60,25 @@ class TranslationService:
 
                 # 检查翻译结果是否完整
                 if self._is_incomplete_translation(result):
-                    print(f"[翻译服务] 检测到翻译不完整，使用AI增强...")
-                    result = self._enhance_with_ai(word, result)
-
+                    if current_app.config.get('AI_ENRICHMENT_DEFERRED'):
+                        # 先返回有道结果，AI 增强交给后台线程池
+                        print(f"[翻译服务] 检测到翻译不完整，AI增强已转入后台")
+                        result['enrichment'] = 'pending'
+                    else:
+                        print(f"[翻译服务] 检测到翻译不完整，使用AI增强...")
+                        result = self._enhance_with_ai(word, result)
+
+                dictionary_cache.set(word, result)
                 return result
             else:
                 print(f"[翻译服务] API调用失败，使用模拟数据")
         else:
             print(f"[翻译服务] API未配置，使用模拟数据")
 
-        # 如果API不可用，返回模拟数据（用于开发测试）
+        # 如果API不可用，返回模拟数据（仅用于开发测试，不写入缓存）
+        if not current_app.config.get('ALLOW_MOCK_TRANSLATION', True):
+            print(f"[翻译服务] 已禁用模拟数据，翻译失败")
+            return None
         return self._get_mock_translation(word)
 
     def _is_incomplete_translation(self, result):
@@ -70,6 +99,18 @@ class TranslationService:
 
         return False
 
+    def enrich(self, word, result):
+        """
+        对不完整的翻译结果进行 AI 增强（供后台任务调用）
+        :return: 增强后的结果字典，失败时不包含 ai_enhanced 标记
+        """
+        result = dict(result)
+        result.pop('enrichment', None)
+        result = self._enhance_with_ai(word, result)
+        if result.get('ai_enhanced'):
+            dictionary_cache.set(word, result)
+        return result
+
     def _enhance_with_ai(self, word, original_result):
         """使用AI增强翻译结果"""
         try:
@@ -143,17 +184,11 @@ class TranslationService:
             print(f"[有道API] 请求URL: {self.youdao_url}")
             print(f"[有道API] 请求参数: q={word}, from=en, to=zh-CHS")
 
-            # 创建 session 并禁用代理
-            session = requests.Session()
-            session.trust_env = False  # 不使用环境变量中的代理设置
-
-            # 发送请求（禁用代理和SSL验证）
-            response = session.get(
+            # 通过共享连接池发送请求（禁用代理和SSL验证，复用 keep-alive 连接）
+            response = http_client.get(
                 self.youdao_url,
                 params=params,
-                timeout=10,
-                verify=False,  # 禁用 SSL 验证以避免代理问题
-                proxies={}  # 显式禁用代理
+                timeout=10
             )
             data = response.json()
 
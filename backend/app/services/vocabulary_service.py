@@ -0,0 +1,540 @@
+"""
+单词本服务 - 批量查词并写入 Word / LearningPlan / QueryLog
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import bindparam, func
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.word import Word
+from app.models.query_log import QueryLog
+from app.models.learning_plan import LearningPlan
+from app.models.user_word import UserWord
+from app.services.translation_service import TranslationService
+from app.services.enrichment_service import enrichment_service
+from app.services.lemmatizer import lemmatizer
+from app.services.autocomplete_service import autocomplete_service
+from app.utils.conditional import bump_data_version
+
+
+class VocabularyService:
+    """单词本服务类"""
+
+    def __init__(self):
+        self.translation_service = TranslationService()
+        self.max_batch_size = 300
+        self._executor = None
+
+    def init_app(self, app):
+        """从应用配置初始化查词线程池（所有批量请求共享，限制上游并发）"""
+        self.max_batch_size = app.config.get('BATCH_QUERY_MAX', self.max_batch_size)
+        self._executor = ThreadPoolExecutor(
+            max_workers=app.config.get('BATCH_QUERY_WORKERS', 8),
+            thread_name_prefix='batch-lookup'
+        )
+
+    @staticmethod
+    def normalize(word_text):
+        """规范化单词（与 /api/words/query 保持一致）"""
+        return (word_text or '').strip().lower()
+
+    def lookup_words(self, user_id, words, tv_show='', season_episode='', context_note=''):
+        """
+        批量查词并记录到用户单词本
+
+        已有单词用一次 IN 查询解析，未知单词通过线程池并发调用翻译服务，
+        新的 Word / LearningPlan / QueryLog 在同一个事务中批量写入。
+
+        Args:
+            user_id: 当前用户ID
+            words: 单词列表（会还原为原形并去重，保持原有顺序）
+            tv_show / season_episode / context_note: 写入查询记录的上下文
+
+        Returns:
+            list: 每个单词一项，成功为 {'word', 'status': 'ok', 'data'}，
+                  失败为 {'word', 'status': 'error', 'message'}
+        """
+        results = {}
+        ordered = []
+        lemmas = {}  # 输入词形 -> 原形
+        surfaces = {}  # 原形 -> 第一次出现的输入词形（写入查询记录）
+        for raw in words:
+            surface_form = self.normalize(raw) if isinstance(raw, str) else ''
+            if not surface_form or surface_form in lemmas:
+                continue
+            ordered.append(surface_form)
+            if len(surface_form) > 100:
+                lemmas[surface_form] = surface_form
+                results[surface_form] = {'word': surface_form, 'status': 'error', 'message': '单词过长'}
+                continue
+            lemma = lemmatizer.lemmatize(surface_form)
+            lemmas[surface_form] = lemma
+            surfaces.setdefault(lemma, surface_form)
+
+        pending = list(surfaces)
+
+        # 一次 IN 查询解析已有单词
+        known = self._load_words(pending)
+        misses = [w for w in pending if w not in known]
+
+        # 并发请求上游翻译
+        translations = self._translate_many(misses)
+        new_words = []
+        for word_text in misses:
+            translation_result = translations.get(word_text)
+            if isinstance(translation_result, Exception) or not translation_result:
+                message = f'翻译失败: {str(translation_result)}' if translation_result else '翻译服务暂时不可用'
+                results[surfaces[word_text]] = {'word': surfaces[word_text], 'status': 'error', 'message': message}
+                continue
+            new_words.append(Word(
+                word=word_text,
+                phonetic=translation_result.get('phonetic', ''),
+                translation=translation_result.get('translation', ''),
+                definition=translation_result.get('definition', ''),
+                examples=json.dumps(translation_result.get('examples', []), ensure_ascii=False),
+                enrichment_status=translation_result.get('enrichment')
+            ))
+
+        try:
+            created = self._insert_words(new_words, known)
+            resolved = [known[w] for w in pending if w in known]
+
+            self._record_queries(user_id, resolved, surfaces, tv_show, season_episode, context_note)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        for word in resolved:
+            autocomplete_service.record_query(word.word)
+
+        # 新单词的 AI 增强交给后台
+        for word in created:
+            if word.enrichment_status == 'pending':
+                enrichment_service.submit(word.id)
+
+        query_counts = self._count_queries(user_id, [word.id for word in resolved])
+        now = datetime.utcnow().isoformat()
+        resolved_data = {}
+        for word in resolved:
+            data = word.to_dict(query_count=query_counts.get(word.id, 0))
+            data['last_query'] = now
+            resolved_data[word.word] = data
+
+        items = []
+        for surface_form in ordered:
+            if surface_form in results:
+                items.append(results[surface_form])
+                continue
+            lemma = lemmas[surface_form]
+            if lemma in resolved_data:
+                data = dict(resolved_data[lemma], surface_form=surface_form)
+                items.append({'word': surface_form, 'status': 'ok', 'data': data})
+            else:
+                items.append(dict(results[surfaces[lemma]], word=surface_form))
+        return items
+
+    def ingest_words(self, user_id, words, tv_show='', season_episode='', context_note='', max_words=None):
+        """
+        导入一批（可能很长的）单词：跳过用户已掌握的单词，其余按批次走 lookup_words
+
+        Args:
+            words: 单词可迭代对象（如字幕解析生成器），应已去重
+            max_words: 最多导入的单词数，超出部分忽略
+
+        Returns:
+            dict: 导入汇总，items 中只包含精简的每词结果
+        """
+        mastered = {
+            row.word for row in db.session.query(Word.word).join(
+                LearningPlan, LearningPlan.word_id == Word.id
+            ).filter(
+                LearningPlan.user_id == user_id,
+                LearningPlan.is_mastered == True
+            )
+        }
+
+        summary = {'total': 0, 'skipped_mastered': 0, 'truncated': False, 'succeeded': 0, 'failed': 0, 'items': []}
+        chunk = []
+
+        def flush():
+            for item in self.lookup_words(user_id, chunk, tv_show, season_episode, context_note):
+                if item['status'] == 'ok':
+                    summary['succeeded'] += 1
+                    summary['items'].append({'word': item['word'], 'status': 'ok', 'word_id': item['data']['id']})
+                else:
+                    summary['failed'] += 1
+                    summary['items'].append(item)
+            chunk.clear()
+
+        for word_text in words:
+            summary['total'] += 1
+            if lemmatizer.lemmatize(word_text) in mastered:
+                summary['skipped_mastered'] += 1
+                continue
+            if max_words is not None and summary['succeeded'] + summary['failed'] + len(chunk) >= max_words:
+                summary['truncated'] = True
+                continue
+
+            chunk.append(word_text)
+            if len(chunk) >= self.max_batch_size:
+                flush()
+
+        if chunk:
+            flush()
+
+        return summary
+
+    @staticmethod
+    def record_user_words(user_id, word_ids, tv_show='', query_time=None):
+        """
+        更新用户单词本汇总表（与查询记录在同一事务中，由调用方提交）
+
+        Args:
+            user_id: 用户ID
+            word_ids: 本次查询的单词ID列表
+            tv_show: 本次查询的剧集
+
+        Returns:
+            dict: word_id -> UserWord
+        """
+        if not word_ids:
+            return {}
+
+        existing = {
+            user_word.word_id: user_word for user_word in UserWord.query.filter(
+                UserWord.user_id == user_id,
+                UserWord.word_id.in_(word_ids)
+            )
+        }
+
+        for word_id in word_ids:
+            user_word = existing.get(word_id)
+            if user_word is None:
+                user_word = UserWord(user_id=user_id, word_id=word_id)
+                db.session.add(user_word)
+                existing[word_id] = user_word
+            user_word.record_query(tv_show, query_time)
+
+        bump_data_version(user_id)
+        return existing
+
+    @staticmethod
+    def sync_mastery(user_id, word_id, mastery_level):
+        """把学习计划的掌握度同步到用户单词本（由调用方提交）"""
+        UserWord.query.filter_by(user_id=user_id, word_id=word_id).update(
+            {'mastery_level': mastery_level},
+            synchronize_session=False
+        )
+        bump_data_version(user_id)
+
+    @staticmethod
+    def sync_mastery_many(user_id, levels):
+        """
+        批量同步掌握度（一条 executemany UPDATE，由调用方提交）
+
+        Args:
+            levels: {word_id: mastery_level}
+        """
+        if not levels:
+            return
+        table = UserWord.__table__
+        db.session.execute(
+            table.update().where(
+                table.c.user_id == user_id,
+                table.c.word_id == bindparam('b_word_id')
+            ).values(mastery_level=bindparam('b_mastery_level')),
+            [{'b_word_id': word_id, 'b_mastery_level': level} for word_id, level in levels.items()]
+        )
+        bump_data_version(user_id)
+
+    @staticmethod
+    def rebuild_user_words(chunk_size=1000):
+        """
+        从查询记录和学习计划重建用户单词本（升级后首次启动时回填）
+
+        Returns:
+            int: 写入的行数
+        """
+        rows = {}
+        aggregates = db.session.query(
+            QueryLog.user_id,
+            QueryLog.word_id,
+            func.count(QueryLog.id),
+            func.min(QueryLog.query_time),
+            func.max(QueryLog.query_time)
+        ).group_by(QueryLog.user_id, QueryLog.word_id)
+
+        for user_id, word_id, count, first_time, last_time in aggregates:
+            rows[(user_id, word_id)] = {
+                'user_id': user_id,
+                'word_id': word_id,
+                'query_count': count,
+                'first_query_time': first_time,
+                'last_query_time': last_time,
+                'mastery_level': 0,
+                'tv_shows': []
+            }
+
+        shows = db.session.query(QueryLog.user_id, QueryLog.word_id, QueryLog.tv_show).filter(
+            QueryLog.tv_show != ''
+        ).distinct()
+        for user_id, word_id, tv_show in shows:
+            row = rows.get((user_id, word_id))
+            if row is not None and tv_show and len(row['tv_shows']) < UserWord.MAX_TV_SHOWS:
+                row['tv_shows'].append(tv_show)
+
+        plans = db.session.query(LearningPlan.user_id, LearningPlan.word_id, LearningPlan.mastery_level)
+        for user_id, word_id, mastery_level in plans:
+            row = rows.get((user_id, word_id))
+            if row is not None:
+                row['mastery_level'] = mastery_level or 0
+
+        values = []
+        for row in rows.values():
+            row['tv_shows'] = json.dumps(row['tv_shows'], ensure_ascii=False) if row['tv_shows'] else None
+            values.append(row)
+
+        UserWord.query.delete()
+        for start in range(0, len(values), chunk_size):
+            db.session.execute(UserWord.__table__.insert(), values[start:start + chunk_size])
+        db.session.commit()
+        return len(values)
+
+    def backfill_if_needed(self):
+        """用户单词本为空但已有查询记录时回填（多个 worker 同时启动时只有一个会成功）"""
+        if UserWord.query.first() is not None or QueryLog.query.first() is None:
+            return 0
+
+        try:
+            count = self.rebuild_user_words()
+            print(f"[单词本] 已从查询记录回填 {count} 行用户单词本")
+            return count
+        except IntegrityError:
+            db.session.rollback()
+            return 0
+
+    def find_inflected_words(self):
+        """
+        找出词形还原之前按输入词形保存的单词
+
+        Returns:
+            list: [(保存的词形, 原形)]
+        """
+        pairs = []
+        for (text,) in db.session.query(Word.word).order_by(Word.word):
+            lemma = lemmatizer.lemmatize(text)
+            if lemma != text:
+                pairs.append((text, lemma))
+        return pairs
+
+    def merge_inflected_words(self, pairs=None):
+        """
+        把词形还原之前按输入词形保存的单词并入原形（一次性维护命令 flask merge-inflected-words 调用）
+
+        原形已有记录时，查询记录、复习记录、学习计划和用户单词本改为指向原形后删除旧单词
+        （同一用户两边都有学习计划时保留复习次数多的一份）；原形没有记录时直接把旧单词改名为原形。
+        全部合并在一个事务中，失败时整体回滚。
+
+        Args:
+            pairs: find_inflected_words() 的结果，为空时重新扫描
+
+        Returns:
+            int: 合并或改名的单词数
+        """
+        from app.services.sync_service import sync_service
+
+        pairs = self.find_inflected_words() if pairs is None else pairs
+        if not pairs:
+            return 0
+        words = {text: word_id for word_id, text in db.session.query(Word.id, Word.word)}
+
+        try:
+            for text, lemma in pairs:
+                source = Word.query.get(words.pop(text))
+                target_id = words.get(lemma)
+                if target_id is None:
+                    source.word = lemma
+                    words[lemma] = source.id
+                    db.session.flush()
+                else:
+                    self._merge_word(source, target_id, sync_service)
+                print(f"[单词本] 已将 {text} 并入原形 {lemma}")
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"[单词本] 合并屈折形式失败: {str(e)}")
+            return 0
+        return len(pairs)
+
+    @staticmethod
+    def _merge_word(source, target_id, sync_service):
+        """把 source 的全部用户数据并入 target_id 对应的单词并删除 source（由调用方提交）"""
+        from app.models.review_log import ReviewLog
+
+        for model in (QueryLog, ReviewLog):
+            for record in model.query.filter_by(word_id=source.id):
+                record.word_id = target_id
+
+        targets = {plan.user_id: plan for plan in LearningPlan.query.filter_by(word_id=target_id)}
+        for plan in LearningPlan.query.filter_by(word_id=source.id).all():
+            target = targets.get(plan.user_id)
+            if target is not None and (target.review_count or 0) >= (plan.review_count or 0):
+                db.session.delete(plan)
+                continue
+            if target is not None:
+                db.session.delete(target)
+                db.session.flush()  # 先删除再改指向，避免 (user_id, word_id) 唯一约束冲突
+            plan.word_id = target_id
+        db.session.flush()
+
+        holders = []
+        target_words = {row.user_id: row for row in UserWord.query.filter_by(word_id=target_id)}
+        for row in UserWord.query.filter_by(word_id=source.id).all():
+            holders.append(row.user_id)
+            target = target_words.get(row.user_id)
+            if target is None:
+                target = UserWord(user_id=row.user_id, word_id=target_id, query_count=0,
+                                  first_query_time=row.first_query_time, last_query_time=row.last_query_time,
+                                  mastery_level=row.mastery_level)
+                db.session.add(target)
+            target.query_count = (target.query_count or 0) + (row.query_count or 0)
+            if row.first_query_time and (not target.first_query_time or row.first_query_time < target.first_query_time):
+                target.first_query_time = row.first_query_time
+            if row.last_query_time and (not target.last_query_time or row.last_query_time > target.last_query_time):
+                target.last_query_time = row.last_query_time
+            shows = target.shows + [show for show in row.shows if show not in target.shows]
+            target.tv_shows = json.dumps(shows[:UserWord.MAX_TV_SHOWS], ensure_ascii=False) if shows else None
+            plan = LearningPlan.query.filter_by(user_id=row.user_id, word_id=target_id).first()
+            if plan is not None:
+                target.mastery_level = plan.mastery_level or 0
+            db.session.delete(row)
+        db.session.flush()
+
+        # 旧单词已不在任何人的单词本中，flush 监听找不到持有者，这里显式记录删除
+        connection = db.session.connection()
+        for user_id in holders:
+            sync_service.record_changes(connection, user_id, 'word', [source.id], op='delete')
+            bump_data_version(user_id)
+        db.session.delete(source)
+        db.session.flush()
+
+    # ---------- 内部方法 ----------
+
+    @staticmethod
+    def _load_words(word_texts):
+        if not word_texts:
+            return {}
+        words = Word.query.filter(Word.word.in_(word_texts)).all()
+        return {word.word: word for word in words}
+
+    def _translate_many(self, word_texts):
+        """通过共享线程池并发翻译，返回 {word: 结果或异常}"""
+        if not word_texts:
+            return {}
+
+        app = current_app._get_current_object()
+
+        def translate(word_text):
+            with app.app_context():
+                return self.translation_service.translate(word_text)
+
+        if self._executor is None or len(word_texts) == 1:
+            futures = None
+        else:
+            futures = {w: self._executor.submit(translate, w) for w in word_texts}
+
+        translations = {}
+        for word_text in word_texts:
+            try:
+                if futures is None:
+                    translations[word_text] = self.translation_service.translate(word_text)
+                else:
+                    translations[word_text] = futures[word_text].result()
+            except Exception as e:
+                translations[word_text] = e
+        return translations
+
+    def _insert_words(self, new_words, known):
+        """
+        批量插入新单词；与并发请求冲突时回滚并改用已存在的记录
+
+        Returns:
+            list: 本次真正插入的 Word
+        """
+        if not new_words:
+            return []
+
+        db.session.add_all(new_words)
+        try:
+            db.session.flush()
+        except IntegrityError:
+            # 其他请求已插入部分单词：回滚后只插入仍然缺失的单词
+            db.session.rollback()
+            existing = self._load_words([w.word for w in new_words])
+            known.update(existing)
+            new_words = [
+                Word(
+                    word=w.word,
+                    phonetic=w.phonetic,
+                    translation=w.translation,
+                    definition=w.definition,
+                    examples=w.examples,
+                    enrichment_status=w.enrichment_status
+                )
+                for w in new_words if w.word not in existing
+            ]
+            db.session.add_all(new_words)
+            db.session.flush()
+
+        for word in new_words:
+            known[word.word] = word
+        return new_words
+
+    @staticmethod
+    def _record_queries(user_id, words, surfaces, tv_show, season_episode, context_note):
+        """为用户批量补齐学习计划并写入查询记录"""
+        if not words:
+            return
+
+        word_ids = [word.id for word in words]
+        planned = {
+            row.word_id for row in db.session.query(LearningPlan.word_id).filter(
+                LearningPlan.user_id == user_id,
+                LearningPlan.word_id.in_(word_ids)
+            )
+        }
+
+        db.session.add_all([
+            LearningPlan(user_id=user_id, word_id=word_id)
+            for word_id in word_ids if word_id not in planned
+        ])
+        db.session.add_all([
+            QueryLog(
+                user_id=user_id,
+                word_id=word.id,
+                tv_show=tv_show,
+                season_episode=season_episode,
+                context_note=context_note,
+                surface_form=surfaces.get(word.word, word.word)
+            )
+            for word in words
+        ])
+        VocabularyService.record_user_words(user_id, word_ids, tv_show)
+
+    @staticmethod
+    def _count_queries(user_id, word_ids):
+        """从用户单词本读取当前用户的查询次数"""
+        if not word_ids:
+            return {}
+        rows = db.session.query(UserWord.word_id, UserWord.query_count).filter(
+            UserWord.user_id == user_id,
+            UserWord.word_id.in_(word_ids)
+        ).all()
+        return dict(rows)
+
+
+# 创建全局单词本服务实例
+vocabulary_service = VocabularyService()
@@ -0,0 +1,89 @@
+"""
+条件请求工具（ETag / 304）
+
+每个用户有一个数据版本号 users.data_version，查词、复习、修改单词等写操作在同一事务中递增它。
+GET 接口的 ETag 由 (用户, 数据版本, 请求路径和参数) 计算，不需要查询业务数据；
+请求带 If-None-Match 且匹配时直接返回 304，不执行任何统计查询。
+"""
+import hashlib
+import time
+from datetime import datetime
+from functools import wraps
+from flask import request, g, current_app, make_response
+from sqlalchemy import func
+from werkzeug.http import http_date
+from app import db
+from app.models import User, UserWord
+
+
+def bump_data_version(user_id):
+    """递增用户的数据版本（与业务写操作在同一事务中，由调用方提交）"""
+    _bump(User.id == user_id)
+
+
+def bump_word_holders(word_id):
+    """单词本身被修改（释义、例句、AI 增强）时，递增所有单词本中有该单词的用户的数据版本"""
+    holders = db.session.query(UserWord.user_id).filter(UserWord.word_id == word_id)
+    _bump(User.id.in_(holders.scalar_subquery()))
+
+
+def _bump(condition):
+    # 旧数据库升级后 data_version 可能为 NULL，按 0 处理
+    User.query.filter(condition).update({
+        'data_version': func.coalesce(User.data_version, 0) + 1,
+        'data_updated_at': datetime.utcnow()
+    }, synchronize_session=False)
+
+
+def conditional_get(time_bucket=False, version_of=None):
+    """
+    条件 GET 装饰器（放在 login_required 之后）
+
+    响应带上 ETag / Last-Modified；请求的 If-None-Match（或 If-Modified-Since）
+    与当前数据版本一致时直接返回 304，不调用视图函数。
+
+    Args:
+        time_bucket: 响应是否随时间变化（如"今日"、"待复习"统计）。
+            为 True 时 ETag 额外包含 ETAG_TIME_BUCKET 秒的时间片，过了时间片即使数据未变也会重新计算。
+        version_of: 响应还依赖用户数据版本之外的数据时（如全局单词表），传入以视图参数调用的函数，
+            返回值计入 ETag；此时不使用 If-Modified-Since。
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            user = g.current_user
+            version = user.data_version or 0
+            last_modified = user.data_updated_at or user.created_at
+
+            key = f'{user.id}:{version}:{request.full_path}'
+            if time_bucket:
+                bucket_seconds = current_app.config.get('ETAG_TIME_BUCKET', 60)
+                key += f':{int(time.time() // bucket_seconds)}'
+            if version_of is not None:
+                key += f':{version_of(**kwargs)}'
+            etag = hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            elif request.if_modified_since and last_modified and not time_bucket and version_of is None:
+                not_modified = last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+            else:
+                not_modified = False
+
+            if not_modified:
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.headers['Last-Modified'] = http_date(last_modified)
+            # 浏览器每次都需要带 ETag 回源验证，不同用户（token）的响应不能混用
+            response.headers['Cache-Control'] = 'private, no-cache'
+            response.vary.add('Authorization')
+            return response
+
+        return decorated_function
+    return decorator
@@ -0,0 +1,71 @@
+"""分页工具（游标 / keyset 分页）"""
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import tuple_
+
+
+def encode_cursor(order_by, sort_value, row_id):
+    """
+    生成不透明游标
+
+    Args:
+        order_by: 排序方式（游标只能用于同一种排序）
+        sort_value: 当前页最后一行的排序键（多列排序时为列表）
+        row_id: 当前页最后一行的ID（排序键相同时的次序）
+
+    Returns:
+        游标字符串
+    """
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([order_by, sort_value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, order_by, is_datetime=False, fields=1):
+    """
+    解析游标
+
+    Args:
+        is_datetime: 排序键是否为时间（游标中保存为 ISO 字符串）
+        fields: 排序键的列数，大于 1 时排序键应为同样长度的列表
+
+    Returns:
+        (sort_value, row_id)
+
+    Raises:
+        ValueError: 游标无效或与排序方式不匹配
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_order, sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded).decode('utf-8'))
+        values = sort_value if fields > 1 else [sort_value]
+        if not isinstance(values, list) or len(values) != fields:
+            raise ValueError
+        if not all(value is None or isinstance(value, (int, float, str)) for value in values):
+            raise ValueError
+        if is_datetime:
+            sort_value = datetime.fromisoformat(sort_value)
+    except Exception:
+        raise ValueError('无效的游标')
+
+    if cursor_order != order_by or not isinstance(row_id, int):
+        raise ValueError('游标与排序方式不匹配')
+    return sort_value, row_id
+
+
+def keyset_after(columns, values, descending=True):
+    """
+    "位于游标之后"的过滤条件：降序时为 (col1, col2, ...) < (value1, value2, ...)，升序时为 >
+
+    使用行值比较，SQLite 和 PostgreSQL 都能直接用 (user_id, sort, id) 复合索引做范围扫描
+
+    Args:
+        columns: 排序列（最后一列应为唯一ID）
+        values: 游标中对应的值
+        descending: 是否按降序排列
+    """
+    if descending:
+        return tuple_(*columns) < tuple_(*values)
+    return tuple_(*columns) > tuple_(*values)
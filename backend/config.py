@@ -5,6 +5,8 @@ from dotenv import load_dotenv
 # 加载环境变量
 load_dotenv()
 
+basedir = os.path.abspath(os.path.dirname(__file__))
+
 class Config:
     """基础配置"""
     # Flask配置
@@ -17,7 +19,85 @@ class Config:
     # 翻译API配置
     YOUDAO_APP_KEY = os.getenv('YOUDAO_APP_KEY', '')
     YOUDAO_APP_SECRET = os.getenv('YOUDAO_APP_SECRET', '')
+
+    # 本地离线词典（由 ECDICT 风格 CSV 编译，见 app/services/local_dictionary.py），优先于有道API
+    LOCAL_DICT_PATH = os.getenv('LOCAL_DICT_PATH', os.path.join(basedir, 'local_dict.bin'))
+
+    # 词形还原表（TSV：屈折形式<TAB>原形），查词前把 running/ran 等还原为 run
+    LEMMA_TABLE_PATH = os.getenv('LEMMA_TABLE_PATH', os.path.join(basedir, 'lemmas.tsv'))
+
+    # 有道API不可用时是否使用模拟数据（模拟释义会写入全局单词表，生产环境默认关闭）
+    ALLOW_MOCK_TRANSLATION = os.getenv('ALLOW_MOCK_TRANSLATION', 'true').lower() == 'true'
+
+    # 出站 HTTP 连接池配置（有道翻译和 AI 服务共用）
+    HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', 10))  # 缓存的主机连接池数量
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 20))  # 每个主机保持的最大连接数
+    HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', 10))
+    HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', 0))
+
+    # 词典缓存配置（内存 LRU + 磁盘 SQLite，所有 worker 共享磁盘层）
+    DICT_CACHE_PATH = os.getenv('DICT_CACHE_PATH', os.path.join(basedir, 'dict_cache.db'))
+    DICT_CACHE_SIZE = int(os.getenv('DICT_CACHE_SIZE', 5000))
+    DICT_CACHE_TTL = int(os.getenv('DICT_CACHE_TTL', 3600))
+    DICT_CACHE_DISK_TTL = int(os.getenv('DICT_CACHE_DISK_TTL', 0))  # 0 表示永不过期
+    DICT_CACHE_WARM_SIZE = int(os.getenv('DICT_CACHE_WARM_SIZE', 1000))
+    DICT_CACHE_HITS_FLUSH_INTERVAL = int(os.getenv('DICT_CACHE_HITS_FLUSH_INTERVAL', 60))  # 命中次数写回磁盘层的间隔（秒）
+
+    # 并发查询合并配置（锁表默认与词典缓存共用同一个 SQLite 文件）
+    SINGLE_FLIGHT_PATH = os.getenv('SINGLE_FLIGHT_PATH', '')
+    SINGLE_FLIGHT_LEASE = int(os.getenv('SINGLE_FLIGHT_LEASE', 75))
     
+    # AI 增强配置（有道释义不完整时在后台线程池中调用 AI，不阻塞查词请求）
+    AI_ENRICHMENT_DEFERRED = os.getenv('AI_ENRICHMENT_DEFERRED', 'true').lower() == 'true'
+    AI_ENRICHMENT_WORKERS = int(os.getenv('AI_ENRICHMENT_WORKERS', 2))
+    AI_ENRICHMENT_RETRY_AFTER = int(os.getenv('AI_ENRICHMENT_RETRY_AFTER', 120))  # 提交后超过该秒数仍为 pending 视为任务丢失，重新提交（租约记录在 words.enrichment_submitted_at）
+
+    # 批量查词配置
+    BATCH_QUERY_MAX = int(os.getenv('BATCH_QUERY_MAX', 300))  # 单次请求最多单词数
+    BATCH_QUERY_WORKERS = int(os.getenv('BATCH_QUERY_WORKERS', 8))  # 并发请求上游的线程数
+    SUBTITLE_MAX_WORDS = int(os.getenv('SUBTITLE_MAX_WORDS', 2000))  # 单个字幕文件最多导入的生词数
+    SUBTITLE_SYNC_MAX_WORDS = int(os.getenv('SUBTITLE_SYNC_MAX_WORDS', 50))  # 生词不超过该数量时在请求中直接导入，否则转为后台任务
+    SUBTITLE_JOB_DIR = os.getenv('SUBTITLE_JOB_DIR', os.path.join(basedir, 'subtitle_jobs'))  # 字幕导入任务状态目录，为空时不支持后台导入
+    SUBTITLE_WORKERS = int(os.getenv('SUBTITLE_WORKERS', 1))  # 后台字幕导入线程数
+    SUBTITLE_JOB_TIMEOUT = int(os.getenv('SUBTITLE_JOB_TIMEOUT', 1800))  # 任务超过该秒数未完成视为失败
+
+    # 导出配置
+    EXPORT_CACHE_DIR = os.getenv('EXPORT_CACHE_DIR', os.path.join(basedir, 'export_cache'))  # 导出结果缓存目录，为空时不缓存、不支持后台导出
+    EXPORT_CACHE_MAX_BYTES = int(os.getenv('EXPORT_CACHE_MAX_BYTES', 200 * 1024 * 1024))  # 缓存总大小上限，超出后按最近使用时间淘汰
+    EXPORT_WORKERS = int(os.getenv('EXPORT_WORKERS', 2))  # 后台导出线程数
+    EXPORT_JOB_TIMEOUT = int(os.getenv('EXPORT_JOB_TIMEOUT', 600))  # 任务超过该秒数未完成视为失败
+    EXPORT_SPOOL_MAX_SIZE = int(os.getenv('EXPORT_SPOOL_MAX_SIZE', 8 * 1024 * 1024))  # 不缓存时，导出文件超过该大小（字节）写入临时文件
+
+    # PDF 导出配置
+    PDF_FONT_DIRS = os.getenv('PDF_FONT_DIRS', '')  # 查找中文字体的目录（多个用系统路径分隔符分隔），为空时使用系统字体目录
+    PDF_FONT_PATH = os.getenv('PDF_FONT_PATH', '')  # 直接指定中文字体文件（.ttf/.ttc），优先于目录查找
+    PDF_RENDER_WORKERS = int(os.getenv('PDF_RENDER_WORKERS', 0))  # 并行渲染进程数，0 表示 min(4, CPU 核数)
+    PDF_CHUNK_ROWS = int(os.getenv('PDF_CHUNK_ROWS', 2000))  # 并行渲染时每块的行数
+    PDF_PARALLEL_MIN_ROWS = int(os.getenv('PDF_PARALLEL_MIN_ROWS', 5000))  # 超过该行数才并行渲染
+    PDF_CHUNK_TIMEOUT = int(os.getenv('PDF_CHUNK_TIMEOUT', 120))  # 并行渲染等待全部块的最长秒数，超时后改为单进程渲染
+
+    # 单词本快照：进程内缓存的总大小上限（字节）
+    SNAPSHOT_CACHE_MAX_BYTES = int(os.getenv('SNAPSHOT_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+    # 条件请求：统计类接口的 ETag 时间片（秒），"今日"、"待复习"等随时间变化的数据最多延迟这么久
+    ETAG_TIME_BUCKET = int(os.getenv('ETAG_TIME_BUCKET', 60))
+
+    # 复习调度算法（sm2 / fixed），用户未单独设置时使用
+    SCHEDULER_ALGORITHM = os.getenv('SCHEDULER_ALGORITHM', 'sm2')
+    # 批量提交复习结果时单次最多的条数
+    REVIEW_BATCH_MAX_SIZE = int(os.getenv('REVIEW_BATCH_MAX_SIZE', 500))
+    # 复习量预测：最多预测天数、模拟次数、进程内缓存的结果数
+    FORECAST_MAX_DAYS = int(os.getenv('FORECAST_MAX_DAYS', 365))
+    FORECAST_TRIALS = int(os.getenv('FORECAST_TRIALS', 8))
+    FORECAST_CACHE_SIZE = int(os.getenv('FORECAST_CACHE_SIZE', 1024))
+    # 复习负载均衡：到期直方图的重建间隔（秒）和进程内最多缓存的用户数
+    LOAD_BALANCE_TTL = int(os.getenv('LOAD_BALANCE_TTL', 600))
+    LOAD_BALANCE_MAX_USERS = int(os.getenv('LOAD_BALANCE_MAX_USERS', 4096))
+
+    # 自动补全配置（内存中的基数树）
+    AUTOCOMPLETE_MAX_WORDS = int(os.getenv('AUTOCOMPLETE_MAX_WORDS', 200000))  # 最多收录的单词数（内存预算）
+    AUTOCOMPLETE_TOP_K = int(os.getenv('AUTOCOMPLETE_TOP_K', 10))  # 单次补全最多返回的数量
+
     # CORS配置
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:5173,http://localhost:3000').split(',')
 
@@ -30,6 +110,7 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     """生产环境配置"""
     DEBUG = False
+    ALLOW_MOCK_TRANSLATION = os.getenv('ALLOW_MOCK_TRANSLATION', 'false').lower() == 'true'
 
 
 # 配置字典
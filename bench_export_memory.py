@@ -0,0 +1,126 @@
+"""
+Excel 导出内存基准：流式导出的峰值内存不随单词数增长
+
+对不同规模的单词本请求 GET /api/words/export?format=excel（磁盘缓存关闭，1 MB 以上落盘，按块读取响应），
+用 tracemalloc 记录整个请求的峰值内存；较小规模时同时测量"ORM 全量加载 + 普通 Workbook"的旧写法作对比。
+
+使用方法：python bench_export_memory.py [最大单词数，默认 50000]
+"""
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+sys.path.insert(0, BACKEND_DIR)
+
+SIZES = (1000, 10000, 50000)
+BASELINE_MAX = 10000  # 旧写法内存随单词数线性增长，只测较小规模
+
+
+def _make_app(tmp):
+    """在临时目录中创建应用（不启用导出磁盘缓存，走流式 + 临时文件路径）"""
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmp, 'test.db')
+    os.environ['DICT_CACHE_PATH'] = os.path.join(tmp, 'dict_cache.db')
+    os.environ['LOCAL_DICT_PATH'] = os.path.join(tmp, 'missing_dict.bin')
+    os.environ['EXPORT_CACHE_DIR'] = ''
+    os.environ['EXPORT_SPOOL_MAX_SIZE'] = str(1024 * 1024)
+    from app import create_app
+    return create_app('development')
+
+
+def _grow(app, user_id, start, end):
+    """把单词本扩充到 end 个单词"""
+    from app import db
+    from app.models import Word
+
+    with app.app_context():
+        rows = [{
+            'word': f'w{i:07d}', 'phonetic': '/wɜːd/', 'translation': '中文释义' * 3,
+            'definition': 'an english definition ' * 6
+        } for i in range(start, end)]
+        for offset in range(0, len(rows), 10000):
+            db.session.execute(Word.__table__.insert(), rows[offset:offset + 10000])
+        db.session.execute(db.text(
+            'INSERT INTO user_words (user_id, word_id, query_count, mastery_level, last_query_time) '
+            "SELECT :user_id, id, id % 7, id % 6, datetime('now') FROM words WHERE id > :start"
+        ), {'user_id': user_id, 'start': start})
+        db.session.commit()
+
+
+def _measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024, elapsed, size
+
+
+def _streaming_export(client, headers):
+    response = client.get('/api/words/export?format=excel', headers=headers, buffered=False)
+    assert response.status_code == 200
+    size = sum(len(chunk) for chunk in response.response)
+    response.close()
+    return size
+
+
+def _baseline_export(app, user_id):
+    """旧写法：加载全部 ORM 对象、构造完整列表，在内存中生成普通 Workbook"""
+    from openpyxl import Workbook
+    from app import db
+    from app.models import Word, UserWord
+
+    with app.app_context():
+        rows = db.session.query(UserWord, Word).join(Word, Word.id == UserWord.word_id).filter(
+            UserWord.user_id == user_id
+        ).all()
+        data = [[word.word, word.phonetic, word.translation, word.definition,
+                 user_word.mastery_level, user_word.query_count, user_word.last_query_time]
+                for user_word, word in rows]
+        workbook = Workbook()
+        sheet = workbook.active
+        for row in data:
+            sheet.append(row)
+        output = io.BytesIO()
+        workbook.save(output)
+        return len(output.getvalue())
+
+
+def main():
+    max_size = int(sys.argv[1]) if len(sys.argv) > 1 else SIZES[-1]
+    sizes = [size for size in SIZES if size < max_size] + [max_size]
+
+    app = _make_app(tempfile.mkdtemp())
+    client = app.test_client()
+    response = client.post('/api/auth/register', json={
+        'username': 'bench', 'email': 'bench@example.com', 'password': 'secret1'
+    })
+    headers = {'Authorization': f"Bearer {response.get_json()['token']}"}
+    user_id = response.get_json()['user']['id']
+
+    print("=" * 60)
+    print("Excel 导出内存基准（tracemalloc 峰值）")
+    print("=" * 60)
+    peaks = []
+    current = 0
+    for size in sizes:
+        _grow(app, user_id, current, size)
+        current = size
+        peak, elapsed, length = _measure(lambda: _streaming_export(client, headers))
+        peaks.append(peak)
+        line = f"  {size:>7} 个单词  流式: {peak:6.1f} MB {elapsed:5.1f}s {length / 1024:.0f} KB"
+        if size <= BASELINE_MAX:
+            base_peak, base_elapsed, _ = _measure(lambda: _baseline_export(app, user_id))
+            line += f"  旧写法: {base_peak:6.1f} MB {base_elapsed:5.1f}s"
+        print(line)
+
+    # 单词数增加数倍，流式导出的峰值内存基本不变
+    assert peaks[-1] < peaks[0] * 2 + 1, peaks
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+PDF 导出基准：单进程渲染与进程池分块并行渲染的耗时对比
+
+同一份单词本分别用 1 个进程和 PDF_RENDER_WORKERS 个进程（默认取 CPU 核数，至少 2）渲染，
+打印耗时、加速比和页数。并行加速依赖多核：单核机器上进程池不会更快，只校验结果一致。
+
+使用方法：python bench_pdf_export.py [单词数，默认 20000] [进程数]
+"""
+import io
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+sys.path.insert(0, BACKEND_DIR)
+
+ROW_COUNT = 20000
+
+
+def _rows(count):
+    return [{
+        'word': f'word{i}', 'phonetic': '/wɜːd/', 'translation': '单词的中文释义',
+        'mastery_level': i % 6, 'query_count': i % 9
+    } for i in range(count)]
+
+
+def _render(engine, rows, workers):
+    """渲染一次，返回 (秒, 页数, 字节数)"""
+    from pypdf import PdfReader
+
+    engine.workers = workers
+    started = time.perf_counter()
+    output = engine.render(rows, {'username': 'bench'})
+    elapsed = time.perf_counter() - started
+    data = output.getvalue()
+    return elapsed, len(PdfReader(io.BytesIO(data)).pages), len(data)
+
+
+def main():
+    from app.services.pdf_engine import pdf_engine
+
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else ROW_COUNT
+    cpus = os.cpu_count() or 1
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else max(2, cpus)
+    rows = _rows(row_count)
+
+    print("=" * 60)
+    print(f"PDF 导出基准：{row_count} 个单词，{cpus} 核，每块 {pdf_engine.chunk_rows} 行")
+    print("=" * 60)
+
+    single, single_pages, _ = _render(pdf_engine, rows, 1)
+    print(f"  单进程:            {single:6.2f}s  {single_pages} 页")
+    cold, cold_pages, _ = _render(pdf_engine, rows, workers)
+    print(f"  {workers} 进程（含启动）: {cold:6.2f}s  {cold_pages} 页")
+    warm, warm_pages, _ = _render(pdf_engine, rows, workers)
+    print(f"  {workers} 进程（已启动）: {warm:6.2f}s  {warm_pages} 页")
+    print(f"加速比：{single / warm:.2f}x")
+
+    # 分块边界最多各多出一页未排满的页面
+    chunks = -(-row_count // pdf_engine.chunk_rows)
+    assert single_pages <= warm_pages <= single_pages + chunks, (single_pages, warm_pages)
+    if cpus >= 4 and workers >= 4:
+        assert single / warm > 1.5, (single, warm)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+单词搜索基准：大词库上 FTS5 trigram 索引与 LIKE '%kw%' 扫描的延迟对比
+
+生成 N 个随机单词并全部加入用户单词本，对每个关键词分别用搜索索引和 LIKE 回退各请求若干次，
+比较 GET /api/words/search 的平均延迟，并检查两种方式返回的结果一致。
+
+使用方法：python bench_search.py [单词数，默认 200000]
+"""
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+sys.path.insert(0, BACKEND_DIR)
+
+WORD_COUNT = 200000
+KEYWORDS = ('tion', 'abc', 'xyz', 'qzq', 'mmo')
+REPEAT = 5
+
+
+def _make_app(tmp):
+    """在临时目录中创建应用（独立的数据库和词典缓存）"""
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmp, 'test.db')
+    os.environ['DICT_CACHE_PATH'] = os.path.join(tmp, 'dict_cache.db')
+    os.environ['LOCAL_DICT_PATH'] = os.path.join(tmp, 'missing_dict.bin')
+    os.environ['EXPORT_CACHE_DIR'] = os.path.join(tmp, 'exports')
+    from app import create_app
+    return create_app('development')
+
+
+def _populate(app, user_id, word_count, seed=1):
+    """批量插入随机单词并全部加入用户单词本"""
+    from app import db
+    from app.models import Word
+
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < word_count:
+        words.add(''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 12))))
+
+    with app.app_context():
+        rows = [{'word': word, 'translation': '测试释义'} for word in sorted(words)]
+        for start in range(0, len(rows), 10000):
+            db.session.execute(Word.__table__.insert(), rows[start:start + 10000])
+        db.session.execute(db.text(
+            'INSERT INTO user_words (user_id, word_id, query_count, mastery_level, last_query_time) '
+            "SELECT :user_id, id, id % 7, 0, datetime('now') FROM words"
+        ), {'user_id': user_id})
+        db.session.commit()
+
+
+def _search(client, headers, keyword):
+    """请求 REPEAT 次，返回 (平均毫秒, 结果单词列表)"""
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        response = client.get(f'/api/words/search?keyword={keyword}', headers=headers)
+        assert response.status_code == 200, response.get_json()
+    elapsed = (time.perf_counter() - started) / REPEAT * 1000
+    return elapsed, [item['word'] for item in response.get_json()['data']]
+
+
+def main():
+    word_count = int(sys.argv[1]) if len(sys.argv) > 1 else WORD_COUNT
+    app = _make_app(tempfile.mkdtemp())
+    client = app.test_client()
+    response = client.post('/api/auth/register', json={
+        'username': 'bench', 'email': 'bench@example.com', 'password': 'secret1'
+    })
+    headers = {'Authorization': f"Bearer {response.get_json()['token']}"}
+    user_id = response.get_json()['user']['id']
+
+    started = time.perf_counter()
+    _populate(app, user_id, word_count)
+    print("=" * 60)
+    print(f"单词搜索基准：{word_count} 个单词（插入并建索引 {time.perf_counter() - started:.1f}s），每个关键词 {REPEAT} 次取平均")
+    print("=" * 60)
+
+    from app.services.search_index import search_index
+    backend = search_index.backend
+    assert backend, '搜索索引未启用'
+
+    totals = {backend: 0.0, 'LIKE': 0.0}
+    for keyword in KEYWORDS:
+        search_index.backend = backend
+        indexed_ms, indexed = _search(client, headers, keyword)
+        search_index.backend = None
+        like_ms, scanned = _search(client, headers, keyword)
+        search_index.backend = backend
+
+        totals[backend] += indexed_ms
+        totals['LIKE'] += like_ms
+        print(f"  {keyword!r:8} {len(indexed):3} 条结果  {backend}: {indexed_ms:7.1f}ms  LIKE: {like_ms:7.1f}ms")
+        assert indexed == scanned, (keyword, indexed[:5], scanned[:5])
+
+    print(f"平均：{backend} {totals[backend] / len(KEYWORDS):.1f}ms，LIKE {totals['LIKE'] / len(KEYWORDS):.1f}ms")
+    assert totals[backend] < totals['LIKE']
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+字幕导入基准：2000 条字幕的解析吞吐、导入耗时和峰值内存
+
+- 解析：流式生成器逐行读取，峰值内存与文件大小无关
+- 导入：通过 POST /api/words/subtitles 提交（生词较多，转为后台任务），轮询任务直到完成
+
+不访问有道/AI：未配置 API 密钥时使用模拟释义。
+使用方法：python bench_subtitle_ingest.py [字幕条数]
+"""
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+sys.path.insert(0, BACKEND_DIR)
+
+CUE_COUNT = 2000
+VOCABULARY_SIZE = 700
+
+
+def _make_app(tmp):
+    """在临时目录中创建应用（独立的数据库、词典缓存和任务目录）"""
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmp, 'test.db')
+    os.environ['DICT_CACHE_PATH'] = os.path.join(tmp, 'dict_cache.db')
+    os.environ['LOCAL_DICT_PATH'] = os.path.join(tmp, 'missing_dict.bin')
+    os.environ['EXPORT_CACHE_DIR'] = os.path.join(tmp, 'exports')
+    os.environ['SUBTITLE_JOB_DIR'] = os.path.join(tmp, 'subtitle_jobs')
+    os.environ['YOUDAO_APP_KEY'] = ''
+    os.environ['AI_ENRICHMENT_DEFERRED'] = 'true'
+    from app import create_app
+    return create_app('development')
+
+
+def make_srt(cue_count, vocabulary_size, seed=1):
+    """生成合成 SRT：每条字幕 6-10 个词，取自 vocabulary_size 个虚构单词"""
+    rng = random.Random(seed)
+    letters = 'bcdfghjklmnprstvwz'
+    vowels = 'aeiou'
+    vocabulary = sorted({
+        ''.join(rng.choice(letters) + rng.choice(vowels) for _ in range(rng.randint(2, 4)))
+        for _ in range(vocabulary_size * 2)
+    })[:vocabulary_size]
+
+    lines = []
+    for index in range(cue_count):
+        start = index * 3
+        lines.append(str(index + 1))
+        lines.append(f'00:{start // 60 % 60:02d}:{start % 60:02d},000 --> 00:{(start + 2) // 60 % 60:02d}:{(start + 2) % 60:02d},500')
+        words = [rng.choice(vocabulary) for _ in range(rng.randint(6, 10))]
+        lines.append('<i>' + ' '.join(words[:4]).capitalize() + '</i>')
+        lines.append(' '.join(words[4:]) + '.')
+        lines.append('')
+    return '\n'.join(lines).encode('utf-8')
+
+
+def bench_parse(data):
+    """只解析不导入：吞吐和峰值内存"""
+    from app.services.subtitle_service import subtitle_service
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    words = list(subtitle_service.extract_words(io.BytesIO(data)))
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return words, elapsed, peak
+
+
+def bench_ingest(data):
+    """通过接口提交后台导入任务并等待完成"""
+    tmp = tempfile.mkdtemp()
+    app = _make_app(tmp)
+    client = app.test_client()
+    response = client.post('/api/auth/register', json={
+        'username': 'bench', 'email': 'bench@example.com', 'password': 'secret1'
+    })
+    headers = {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    response = client.post('/api/words/subtitles', headers=headers, content_type='multipart/form-data', data={
+        'file': (io.BytesIO(data), 'episode.srt'), 'tv_show': 'Bench', 'season_episode': 'S01E01'
+    })
+    accepted = time.perf_counter() - started
+    assert response.status_code == 202, response.get_json()
+    status_url = response.get_json()['data']['status_url']
+
+    while True:
+        job = client.get(status_url, headers=headers).get_json()['data']
+        if job['status'] != 'pending':
+            break
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return job, accepted, elapsed, peak
+
+
+def main():
+    cue_count = int(sys.argv[1]) if len(sys.argv) > 1 else CUE_COUNT
+    data = make_srt(cue_count, VOCABULARY_SIZE)
+    print("=" * 60)
+    print(f"字幕导入基准：{cue_count} 条字幕，{len(data) / 1024:.0f} KB")
+    print("=" * 60)
+
+    words, parse_seconds, parse_peak = bench_parse(data)
+    print(f"解析: {len(words)} 个生词，{parse_seconds * 1000:.0f}ms "
+          f"（{cue_count / parse_seconds:.0f} 条/秒），峰值内存 {parse_peak / 1024 / 1024:.2f} MB")
+
+    job, accepted, elapsed, peak = bench_ingest(data)
+    summary = job['summary']
+    print(f"导入: 请求 {accepted * 1000:.0f}ms 返回 202，任务 {elapsed:.2f}s 完成 "
+          f"（成功 {summary['succeeded']}，失败 {summary['failed']}，{summary['succeeded'] / elapsed:.0f} 词/秒），"
+          f"峰值内存 {peak / 1024 / 1024:.2f} MB")
+    assert job['status'] == 'done', job
+    assert summary['succeeded'] == len(words), summary
+
+
+if __name__ == '__main__':
+    main()
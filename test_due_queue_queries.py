@@ -0,0 +1,104 @@
+"""
+测试待复习队列的 SQL 语句数量（防止 N+1 回归）
+
+待复习单词、学习计划和查询次数由一条关联查询取出，
+GET /api/learning/today 和 GET /api/learning/session 执行的语句数不应随待复习数量增长。
+
+使用方法：python test_due_queue_queries.py
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+sys.path.insert(0, BACKEND_DIR)
+
+QUEUE_SIZES = (1, 50)
+ENDPOINTS = (
+    '/api/learning/today',
+    '/api/learning/today?limit=100',
+    '/api/learning/session?size=100',
+)
+
+
+def _make_app(tmp):
+    """在临时目录中创建应用（独立的数据库和词典缓存）"""
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmp, 'test.db')
+    os.environ['DICT_CACHE_PATH'] = os.path.join(tmp, 'dict_cache.db')
+    os.environ['LOCAL_DICT_PATH'] = os.path.join(tmp, 'missing_dict.bin')
+    os.environ['EXPORT_CACHE_DIR'] = os.path.join(tmp, 'exports')
+    from app import create_app
+    return create_app('development')
+
+
+def _create_user(app, client, name, due_count):
+    """注册用户并为其创建 due_count 个已到期的学习计划"""
+    from app import db
+    from app.models import User, Word, LearningPlan, UserWord
+
+    response = client.post('/api/auth/register', json={
+        'username': name, 'email': f'{name}@example.com', 'password': 'secret1'
+    })
+    headers = {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+    with app.app_context():
+        user = User.query.filter_by(username=name).first()
+        now = datetime.utcnow()
+        for i in range(due_count):
+            word = Word(word=f'{name}-word-{i}', translation='测试释义')
+            db.session.add(word)
+            db.session.flush()
+            db.session.add(LearningPlan(user_id=user.id, word_id=word.id, next_review=now - timedelta(hours=i + 1)))
+            db.session.add(UserWord(user_id=user.id, word_id=word.id, query_count=i + 1))
+        db.session.commit()
+    return headers
+
+
+def _count_statements(app, client, url, headers):
+    """请求一次接口，返回 (状态码, 待复习数, 执行的 SQL 语句数)"""
+    from sqlalchemy import event
+    from app import db
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        response = client.get(url, headers=headers)
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+
+    data = response.get_json()['data']
+    return response.status_code, len(data.get('words', data.get('cards', []))), len(statements)
+
+
+def test_due_queue_constant_statements():
+    """待复习 1 个和 50 个时，每个接口执行的 SQL 语句数相同"""
+    tmp = tempfile.mkdtemp()
+    app = _make_app(tmp)
+    client = app.test_client()
+    users = {size: _create_user(app, client, f'user{size}', size) for size in QUEUE_SIZES}
+
+    for url in ENDPOINTS:
+        counts = {}
+        for size, headers in users.items():
+            status, returned, statements = _count_statements(app, client, url, headers)
+            assert status == 200, (url, status)
+            assert returned == size, (url, size, returned)
+            counts[size] = statements
+        print(f"  {url}: " + ', '.join(f'{size} 个待复习 -> {n} 条语句' for size, n in counts.items()))
+        assert len(set(counts.values())) == 1, (url, counts)
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("测试待复习队列的 SQL 语句数量")
+    print("=" * 60)
+    print(f"\n[test_due_queue_constant_statements] {test_due_queue_constant_statements.__doc__.strip()}")
+    test_due_queue_constant_statements()
+    print("✅ 通过")
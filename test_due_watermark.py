@@ -0,0 +1,128 @@
+"""
+测试待复习水位（users.next_due_at）省下的查询
+
+用户的学习计划都还没到期时，水位在未来：/api/learning/today、/api/learning/session
+不查询 learning_plans，/api/learning/plan 和 /api/statistics/overview 的待复习数也不再查询。
+对比清空水位（旧数据库升级后的状态）时同一接口访问 learning_plans 的语句数和耗时。
+
+使用方法：python test_due_watermark.py
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+sys.path.insert(0, BACKEND_DIR)
+
+PLAN_COUNT = 500
+REPEAT = 20
+ENDPOINTS = (
+    ('/api/learning/today', True),
+    ('/api/learning/session', True),
+    ('/api/learning/plan', False),
+    ('/api/statistics/overview', False),
+)
+
+
+def _make_app(tmp):
+    """在临时目录中创建应用（独立的数据库和词典缓存）"""
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmp, 'test.db')
+    os.environ['DICT_CACHE_PATH'] = os.path.join(tmp, 'dict_cache.db')
+    os.environ['LOCAL_DICT_PATH'] = os.path.join(tmp, 'missing_dict.bin')
+    os.environ['EXPORT_CACHE_DIR'] = os.path.join(tmp, 'exports')
+    from app import create_app
+    return create_app('development')
+
+
+def _create_caught_up_user(app, client):
+    """注册用户，创建 PLAN_COUNT 个都在未来到期的学习计划"""
+    from app import db
+    from app.models import User, Word, LearningPlan, UserWord
+
+    response = client.post('/api/auth/register', json={
+        'username': 'alice', 'email': 'alice@example.com', 'password': 'secret1'
+    })
+    headers = {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+    with app.app_context():
+        user = User.query.filter_by(username='alice').first()
+        now = datetime.utcnow()
+        for i in range(PLAN_COUNT):
+            word = Word(word=f'word-{i}', translation='测试释义')
+            db.session.add(word)
+            db.session.flush()
+            db.session.add(LearningPlan(user_id=user.id, word_id=word.id, next_review=now + timedelta(days=1 + i % 30)))
+            db.session.add(UserWord(user_id=user.id, word_id=word.id, query_count=1))
+        db.session.commit()
+        return headers, user.id
+
+
+def _clear_watermark(app, user_id):
+    from app import db
+    from app.models import User
+
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(User.__table__.update().where(User.__table__.c.id == user_id).values(next_due_at=None))
+
+
+def _measure(app, client, url, headers, before=None):
+    """请求 REPEAT 次，返回 (每次访问 learning_plans 的语句数, 平均毫秒)"""
+    from sqlalchemy import event
+    from app import db
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if 'learning_plans' in statement:
+            statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    elapsed = 0.0
+    for _ in range(REPEAT):
+        if before:
+            before()
+        event.listen(engine, 'before_cursor_execute', count)
+        started = time.perf_counter()
+        try:
+            response = client.get(url, headers=headers)
+        finally:
+            elapsed += time.perf_counter() - started
+            event.remove(engine, 'before_cursor_execute', count)
+        assert response.status_code == 200, (url, response.get_json())
+    return len(statements) / REPEAT, elapsed / REPEAT * 1000
+
+
+def test_watermark_skips_learning_plan_queries():
+    """水位在未来时，待复习接口不查询或少查询 learning_plans"""
+    app = _make_app(tempfile.mkdtemp())
+    client = app.test_client()
+    headers, user_id = _create_caught_up_user(app, client)
+
+    # 第一次请求发现没有到期的计划，重新计算水位
+    client.get('/api/learning/today', headers=headers)
+    from app import db
+    from app.models import User
+    with app.app_context():
+        assert db.session.get(User, user_id).next_due_at > datetime.utcnow()
+
+    for url, skips_all in ENDPOINTS:
+        with_watermark, fast_ms = _measure(app, client, url, headers)
+        without_watermark, slow_ms = _measure(app, client, url, headers, before=lambda: _clear_watermark(app, user_id))
+        print(f"  {url}: learning_plans 查询 {without_watermark:g} -> {with_watermark:g} 条，"
+              f"耗时 {slow_ms:.2f}ms -> {fast_ms:.2f}ms")
+        assert with_watermark < without_watermark, (url, with_watermark, without_watermark)
+        if skips_all:
+            assert with_watermark == 0, (url, with_watermark)
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("测试待复习水位省下的查询")
+    print("=" * 60)
+    print(f"\n[test_watermark_skips_learning_plan_queries] {test_watermark_skips_learning_plan_queries.__doc__.strip()}")
+    test_watermark_skips_learning_plan_queries()
+    print("✅ 通过")
@@ -0,0 +1,109 @@
+"""
+测试出站 HTTP 连接池（keep-alive 复用）
+
+在本机线程中启动一个 http.server 桩服务，通过 http_client 连续发出 N 个请求：
+- 统计应为 1 个新建连接、N-1 次复用，桩服务端也只看到 1 个 TCP 连接
+- 与"每次调用新建 Session"的旧写法对比耗时，打印省下的握手时间
+
+不访问外网。使用方法：python test_http_client.py
+"""
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+sys.path.insert(0, BACKEND_DIR)
+
+REQUEST_COUNT = 200
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """返回固定 JSON 的桩服务，使用 HTTP/1.1 以支持 keep-alive"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # 头和正文分两次写出，避免与延迟 ACK 叠加出 40ms 停顿
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with _StubHandler.lock:
+            _StubHandler.connections += 1
+
+    def do_GET(self):
+        body = b'{"translation": ["test"]}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_stub():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _session_per_call(url):
+    """旧写法：每次调用新建 Session（每次都重新建立 TCP 连接）"""
+    session = requests.Session()
+    session.trust_env = False
+    try:
+        return session.get(url, timeout=10)
+    finally:
+        session.close()
+
+
+def test_pooled_client_reuses_connection():
+    """N 个请求只建立 1 个连接，其余 N-1 个复用；打印与每次新建 Session 的耗时对比"""
+    from app.services.http_client import HttpClient
+
+    server = _start_stub()
+    host = f'127.0.0.1:{server.server_address[1]}'
+    url = f'http://{host}/api'
+    try:
+        client = HttpClient()
+        _StubHandler.connections = 0
+        started = time.perf_counter()
+        for _ in range(REQUEST_COUNT):
+            assert client.get(url).status_code == 200
+        pooled = time.perf_counter() - started
+        stats = client.stats()[host]
+        pooled_connections = _StubHandler.connections
+
+        _StubHandler.connections = 0
+        started = time.perf_counter()
+        for _ in range(REQUEST_COUNT):
+            assert _session_per_call(url).status_code == 200
+        per_call = time.perf_counter() - started
+        per_call_connections = _StubHandler.connections
+        client.reset()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(f"  {REQUEST_COUNT} 个 GET: 连接池 {pooled * 1000:.0f}ms（新建连接 {stats['new_connections']}，"
+          f"复用 {stats['reused_connections']}，服务端连接 {pooled_connections}）")
+    print(f"  每次新建 Session: {per_call * 1000:.0f}ms（服务端连接 {per_call_connections}），"
+          f"平均每次省下 {(per_call - pooled) / REQUEST_COUNT * 1000:.2f}ms")
+    assert stats['requests'] == REQUEST_COUNT
+    assert stats['new_connections'] == 1, stats
+    assert stats['reused_connections'] == REQUEST_COUNT - 1, stats
+    assert pooled_connections == 1
+    assert per_call_connections == REQUEST_COUNT
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("测试出站 HTTP 连接池")
+    print("=" * 60)
+    print(f"\n[test_pooled_client_reuses_connection] {test_pooled_client_reuses_connection.__doc__.strip()}")
+    test_pooled_client_reuses_connection()
+    print("✅ 通过")
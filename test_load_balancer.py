@@ -0,0 +1,159 @@
+"""
+测试复习负载均衡（到期日 fuzz）
+
+- 突发导入大量新词后，开启负载均衡的每日复习量比不开启时更平坦（尖峰更低、日间波动更小）
+- 复习的直方图移动只在事务提交后生效：回滚的复习不会让直方图计数漂移，提交后与数据库重建的结果一致
+
+模拟不访问数据库：学习计划用普通对象，直方图固定为模拟起始日。
+使用方法：python test_load_balancer.py
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+from array import array
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+sys.path.insert(0, BACKEND_DIR)
+
+SIMULATION_DAYS = 90
+
+
+def _make_app(tmp):
+    """在临时目录中创建应用（独立的数据库和词典缓存）"""
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmp, 'test.db')
+    os.environ['DICT_CACHE_PATH'] = os.path.join(tmp, 'dict_cache.db')
+    os.environ['LOCAL_DICT_PATH'] = os.path.join(tmp, 'missing_dict.bin')
+    os.environ['EXPORT_CACHE_DIR'] = os.path.join(tmp, 'exports')
+    from app import create_app
+    return create_app('development')
+
+
+def _simulate(app, fuzz_factor, accuracy=0.85, seed=1):
+    """
+    模拟一个用户 SIMULATION_DAYS 天的复习：第 0 天导入 1500 个、第 10 天导入 800 个新词，其余每天 20 个
+
+    Returns:
+        list: 每天到期的复习数
+    """
+    from app import db
+    from app.services.scheduler_service import scheduler_service, DEFAULT_PARAMS
+    from app.services.load_balancer import load_balancer, _Histogram, HORIZON_DAYS
+
+    rng = random.Random(seed)
+    params = dict(DEFAULT_PARAMS, fuzz_factor=fuzz_factor)
+    start = datetime(2030, 1, 1, 9)
+    histogram = _Histogram(start.replace(hour=0), array('i', bytes(4 * HORIZON_DAYS)))
+    imports = {0: 1500, 10: 800}
+
+    plans, daily = [], []
+    # 模拟期间"今天"固定为起始日，直方图按绝对日期计数
+    load_balancer._get = lambda user_id: histogram
+    try:
+        with app.app_context():
+            for day in range(SIMULATION_DAYS):
+                now = start + timedelta(days=day)
+                due = [plan for plan in plans if not plan.is_mastered and plan.next_review < now + timedelta(hours=12)]
+                daily.append(len(due))
+                for plan in due:
+                    scheduler_service.review(plan, rng.random() < accuracy, params, now)
+                for _ in range(imports.get(day, 20)):
+                    plan = SimpleNamespace(
+                        user_id=1, mastery_level=0, is_mastered=False, review_count=0, last_review=None,
+                        next_review=now, ease_factor=None, interval_days=None, repetitions=None
+                    )
+                    scheduler_service.review(plan, rng.random() < accuracy, params, now)
+                    plans.append(plan)
+                db.session.commit()  # 每天结束时提交，移动写入直方图
+    finally:
+        del load_balancer._get
+    return daily
+
+
+def _local_cv(daily):
+    """相对 7 天滑动平均的偏离程度：去掉整体趋势，只看日与日之间的尖峰"""
+    tail = daily[5:]
+    local = [tail[i] / statistics.mean(tail[max(0, i - 3):i + 4]) for i in range(len(tail))]
+    return statistics.pstdev(local)
+
+
+def test_fuzz_flattens_daily_load():
+    """突发导入后，fuzz_factor=0.1 的每日复习量尖峰和日间波动都低于不开启负载均衡"""
+    app = _make_app(tempfile.mkdtemp())
+    plain = _simulate(app, 0)
+    fuzzed = _simulate(app, 0.1)
+
+    plain_peak, fuzzed_peak = max(plain[15:]), max(fuzzed[15:])
+    plain_cv, fuzzed_cv = _local_cv(plain), _local_cv(fuzzed)
+    print(f"  第 15 天后尖峰: {plain_peak} -> {fuzzed_peak}, 日间波动: {plain_cv:.2f} -> {fuzzed_cv:.2f}")
+    assert fuzzed_peak < plain_peak * 0.6, (plain_peak, fuzzed_peak)
+    assert fuzzed_cv < plain_cv * 0.6, (plain_cv, fuzzed_cv)
+    # 负载均衡只挪动到期日，总复习量基本不变
+    assert abs(sum(fuzzed) - sum(plain)) < sum(plain) * 0.1, (sum(plain), sum(fuzzed))
+
+
+def test_rollback_keeps_histogram():
+    """回滚的复习不改变直方图；提交后直方图与数据库重建的结果一致"""
+    from app import db
+    from app.models import User, Word, LearningPlan
+    from app.services.scheduler_service import scheduler_service
+    from app.services.load_balancer import load_balancer
+
+    app = _make_app(tempfile.mkdtemp())
+    client = app.test_client()
+    client.post('/api/auth/register', json={'username': 'alice', 'email': 'alice@example.com', 'password': 'secret1'})
+
+    with app.app_context():
+        user = User.query.filter_by(username='alice').first()
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        for i in range(30):
+            word = Word(word=f'word-{i}', translation='测试释义')
+            db.session.add(word)
+            db.session.flush()
+            # 已复习过两次的 SM-2 计划，答对后间隔约 15 天，会经过负载均衡挑选
+            db.session.add(LearningPlan(
+                user_id=user.id, word_id=word.id, next_review=today + timedelta(days=i % 20, hours=12),
+                ease_factor=2.5, interval_days=6.0, repetitions=2
+            ))
+        db.session.commit()
+        user_id = user.id
+        load_balancer.invalidate(user_id)
+
+        def review_all():
+            params = scheduler_service.params_for(db.session.get(User, user_id))
+            for plan in LearningPlan.query.filter_by(user_id=user_id).all():
+                scheduler_service.review(plan, True, params)
+
+        before = list(load_balancer._get(user_id).counts)
+        review_all()
+        db.session.rollback()
+        after_rollback = list(load_balancer._get(user_id).counts)
+
+        review_all()
+        db.session.close()  # 请求结束时未提交的会话
+        after_close = list(load_balancer._get(user_id).counts)
+
+        review_all()
+        db.session.commit()
+        after_commit = list(load_balancer._get(user_id).counts)
+        rebuilt = list(load_balancer._build(user_id, today))
+
+    print(f"  回滚后变化的天数: {sum(a != b for a, b in zip(before, after_rollback))}, "
+          f"提交后与重建不一致的天数: {sum(a != b for a, b in zip(after_commit, rebuilt))}")
+    assert after_rollback == before
+    assert after_close == before
+    assert after_commit != before
+    assert after_commit == rebuilt
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("测试复习负载均衡")
+    print("=" * 60)
+    for test in (test_fuzz_flattens_daily_load, test_rollback_keeps_histogram):
+        print(f"\n[{test.__name__}] {test.__doc__.strip()}")
+        test()
+        print("✅ 通过")
@@ -0,0 +1,192 @@
+"""
+测试并发查询合并（single-flight）
+
+- 多个用户同时查询同一个新单词，上游翻译（_translate_uncached）只调用一次
+- 多个进程通过共享 SQLite 锁表合并，只有领头进程执行，其余进程读取共享结果
+- 领头进程崩溃（锁未释放）时，租约过期后由等待方接管
+
+不访问有道/AI：上游调用替换为计数桩函数。
+使用方法：python test_single_flight.py
+"""
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+sys.path.insert(0, BACKEND_DIR)
+
+CONCURRENCY = 16
+
+
+def _make_app(tmp):
+    """在临时目录中创建应用（独立的数据库、词典缓存和锁表）"""
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmp, 'test.db')
+    os.environ['DICT_CACHE_PATH'] = os.path.join(tmp, 'dict_cache.db')
+    os.environ['LOCAL_DICT_PATH'] = os.path.join(tmp, 'missing_dict.bin')
+    os.environ['EXPORT_CACHE_DIR'] = os.path.join(tmp, 'exports')
+    os.environ['AI_ENRICHMENT_DEFERRED'] = 'false'
+    from app import create_app
+    return create_app('development')
+
+
+def test_concurrent_query_single_upstream_call():
+    """N 个并发的 /api/words/query 请求查询同一个新单词，只请求一次上游"""
+    tmp = tempfile.mkdtemp()
+    app = _make_app(tmp)
+    from app.services.translation_service import TranslationService
+    from app.services.dictionary_cache import dictionary_cache
+
+    # 每个请求用不同用户，避免同一用户的学习计划唯一约束冲突
+    tokens = []
+    client = app.test_client()
+    for i in range(CONCURRENCY):
+        response = client.post('/api/auth/register', json={
+            'username': f'user{i}', 'email': f'user{i}@example.com', 'password': 'secret1'
+        })
+        tokens.append(response.get_json()['token'])
+
+    calls = []
+    calls_lock = threading.Lock()
+
+    def counting_stub(self, word):
+        with calls_lock:
+            calls.append(word)
+        time.sleep(0.5)  # 模拟上游延迟，让其他请求都在此期间到达
+        result = {'word': word, 'phonetic': '', 'translation': '测试释义', 'definition': '', 'examples': []}
+        dictionary_cache.set(word, result)
+        return result
+
+    # 替换类属性，words 路由和批量查词持有的实例都会调用桩函数
+    original = TranslationService._translate_uncached
+    TranslationService._translate_uncached = counting_stub
+    barrier = threading.Barrier(CONCURRENCY)
+    statuses = []
+
+    def worker(token):
+        barrier.wait()
+        response = app.test_client().post(
+            '/api/words/query',
+            json={'word': 'serendipity'},
+            headers={'Authorization': f'Bearer {token}'}
+        )
+        with calls_lock:
+            statuses.append(response.status_code)
+
+    try:
+        threads = [threading.Thread(target=worker, args=(token,)) for token in tokens]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        TranslationService._translate_uncached = original
+
+    print(f"  并发请求: {CONCURRENCY}, 状态码: {sorted(set(statuses))}, 上游调用: {len(calls)}")
+    assert statuses == [200] * CONCURRENCY, statuses
+    assert calls == ['serendipity'], calls
+
+
+def _process_worker(path, key, calls_path, start_at, queue):
+    """子进程：用独立的 SingleFlight 实例（不同 owner）合并同一个 key"""
+    sys.path.insert(0, BACKEND_DIR)
+    from app.services.single_flight import SingleFlight
+
+    flight = SingleFlight(path=path, lease=10, poll_interval=0.02)
+    results_db = path + '.results'
+
+    def fn():
+        with open(calls_path, 'a') as f:
+            f.write(f'{os.getpid()}\n')
+        time.sleep(0.5)
+        conn = sqlite3.connect(results_db, timeout=10)
+        conn.execute('INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)', (key, 'shared'))
+        conn.commit()
+        conn.close()
+        return 'shared'
+
+    def lookup():
+        conn = sqlite3.connect(results_db, timeout=10)
+        row = conn.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+        conn.close()
+        return row[0] if row else None
+
+    while time.time() < start_at:
+        time.sleep(0.001)
+    queue.put((flight.do(key, fn, lookup=lookup), flight.stats()['remote_waits']))
+
+
+def test_cross_process_single_call():
+    """多个进程同时调用，锁表保证只有一个进程执行上游调用"""
+    from app.services.single_flight import SingleFlight
+
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, 'locks.db')
+    calls_path = os.path.join(tmp, 'calls.txt')
+    open(calls_path, 'w').close()
+
+    app = type('App', (), {'config': {'SINGLE_FLIGHT_PATH': path}})()
+    SingleFlight().init_app(app)  # 建锁表
+    conn = sqlite3.connect(path + '.results')
+    conn.execute('CREATE TABLE results (key TEXT PRIMARY KEY, value TEXT)')
+    conn.commit()
+    conn.close()
+
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    start_at = time.time() + 2  # 等所有子进程启动完毕后同时开始
+    processes = [
+        context.Process(target=_process_worker, args=(path, 'serendipity', calls_path, start_at, queue))
+        for _ in range(4)
+    ]
+    for process in processes:
+        process.start()
+    results = [queue.get(timeout=30) for _ in processes]
+    for process in processes:
+        process.join()
+
+    with open(calls_path) as f:
+        calls = f.read().split()
+    print(f"  进程数: {len(processes)}, 上游调用: {len(calls)}, 跨进程等待: {sum(r[1] for r in results)}")
+    assert [r[0] for r in results] == ['shared'] * len(processes), results
+    assert len(calls) == 1, calls
+    assert sum(r[1] for r in results) >= 1
+
+
+def test_expired_lease_is_taken_over():
+    """领头进程崩溃未释放锁：租约过期后等待方接管执行"""
+    from app.services.single_flight import SingleFlight
+
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, 'locks.db')
+    app = type('App', (), {'config': {'SINGLE_FLIGHT_PATH': path, 'SINGLE_FLIGHT_LEASE': 1}})()
+
+    crashed = SingleFlight()
+    crashed.init_app(app)
+    assert crashed._acquire('serendipity')  # 获取后不释放，模拟进程崩溃
+
+    survivor = SingleFlight(poll_interval=0.02)
+    survivor.init_app(app)
+    calls = []
+    started = time.time()
+    result = survivor.do('serendipity', lambda: calls.append(1) or 'fresh', lookup=lambda: None)
+    elapsed = time.time() - started
+
+    print(f"  接管耗时: {elapsed:.2f}s, 上游调用: {len(calls)}")
+    assert result == 'fresh'
+    assert calls == [1]
+    assert 0.9 <= elapsed < 5
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("测试并发查询合并（single-flight）")
+    print("=" * 60)
+    for test in (test_concurrent_query_single_upstream_call, test_cross_process_single_call,
+                 test_expired_lease_is_taken_over):
+        print(f"\n[{test.__name__}] {test.__doc__.strip()}")
+        test()
+        print("✅ 通过")